@@ -0,0 +1,362 @@
+"""
+异步接口 - 在 asyncio 程序中使用 PDFToWordConverter
+转换在进程池中执行，文档编辑和搜索在线程池中执行，所有操作共用一个并发上限，
+支持取消，并通过异步迭代器推送转换进度
+"""
+import asyncio
+import contextlib
+import functools
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from pdf_to_word_converter import PDFToWordConverter
+
+# 等待进度事件全部转发的最长时间（秒），工作进程异常退出时不会发送结束标记
+_DRAIN_TIMEOUT = 5.0
+
+# 工作进程中的转换器和进度队列
+_worker_converter = None
+_worker_events = None
+
+
+class ConversionCancelled(Exception):
+    """转换被取消（在工作进程中下一次发布进度事件时抛出）"""
+
+
+def _init_worker(converter_options: dict, events):
+    """在工作进程中创建转换器（进度不打印，改为发回主进程）"""
+    global _worker_converter, _worker_events
+    _worker_converter = PDFToWordConverter(**dict(converter_options, progress_callback=None))
+    _worker_events = events
+
+
+def _convert_in_worker(job_id: int, cancel, pdf_path: str, word_path: Optional[str],
+                       options: dict) -> str:
+    """
+    在工作进程中转换一个文件，进度事件发回主进程
+    
+    每个事件发布时检查取消标志，已取消时抛出 ConversionCancelled，
+    转换在下一个进度点停止。
+    """
+    def forward(event):
+        if cancel.is_set():
+            raise ConversionCancelled("转换已取消")
+        _worker_events.put((job_id, event.to_dict()))
+    
+    _worker_converter.progress.subscribe(forward)
+    try:
+        return _worker_converter.convert_pdf_to_word(pdf_path, word_path, **options)
+    finally:
+        _worker_converter.progress.unsubscribe(forward)
+        # 结束标记：主进程收到后才推送结束事件，保证进度事件不会落在结束事件之后
+        _worker_events.put((job_id, None))
+
+
+class ConversionJob:
+    """
+    一次异步转换
+    
+    用法:
+        job = converter.start_conversion('a.pdf')
+        async for event in job:     # 进度事件，转换结束后迭代停止
+            print(event['type'], event['message'])
+        word_path = await job       # 转换结果（失败时抛出异常）
+        job.cancel()                # 取消转换
+    """
+    
+    def __init__(self, job_id: int, task: asyncio.Task, events: asyncio.Queue):
+        self.job_id = job_id
+        self._task = task
+        self._events = events
+        self._finished = False
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> dict:
+        if self._finished:
+            raise StopAsyncIteration
+        # 同时等待下一个事件和任务结束：任务结束后队列中没有事件时迭代停止
+        get = asyncio.ensure_future(self._events.get())
+        try:
+            await asyncio.wait((get, self._task), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not get.done():
+                get.cancel()
+        if get.done() and not get.cancelled():
+            event = get.result()
+        else:
+            try:
+                event = self._events.get_nowait()
+            except asyncio.QueueEmpty:
+                self._finished = True
+                raise StopAsyncIteration
+        if event['type'] in ('done', 'failed', 'cancelled'):
+            self._finished = True
+        return event
+    
+    def __await__(self):
+        return self._task.__await__()
+    
+    def cancel(self) -> bool:
+        """取消转换：尚未开始的直接取消，正在执行的在下一个进度点停止"""
+        return self._task.cancel()
+    
+    def done(self) -> bool:
+        return self._task.done()
+
+
+class AsyncPDFToWordConverter:
+    """PDFToWordConverter 的异步版本"""
+    
+    def __init__(self, converter_options: Optional[dict] = None,
+                 max_concurrency: Optional[int] = None, process_workers: Optional[int] = None,
+                 thread_workers: Optional[int] = None):
+        """
+        Args:
+            converter_options: 传给 PDFToWordConverter 的参数（每个工作进程各创建一个）
+            max_concurrency: 同时执行的操作数上限（转换和文档操作合计，None=CPU核心数），
+                             超出的调用排队等待
+            process_workers: 转换进程数（None=与 max_concurrency 相同）
+            thread_workers: 文档操作线程数（None=与 max_concurrency 相同）
+        """
+        concurrency = max_concurrency or os.cpu_count() or 1
+        if concurrency < 1:
+            raise ValueError(f"max_concurrency 必须大于 0: {concurrency}")
+        self.converter_options = dict(converter_options or {})
+        self.max_concurrency = concurrency
+        self.process_workers = process_workers or concurrency
+        self.thread_workers = thread_workers or concurrency
+        # 文档操作在当前进程的线程中执行
+        self.converter = PDFToWordConverter(**self.converter_options)
+        self._semaphore = None
+        self._processes = None
+        self._threads = None
+        self._manager = None
+        self._events = None
+        self._pump = None
+        self._loop = None
+        self._listeners = {}
+        self._drained = {}
+        self._file_locks = {}
+        self._job_ids = itertools.count(1)
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    def _start(self):
+        """第一次使用时创建进程池、线程池和进度转发线程"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and self._loop is not loop:
+            raise RuntimeError("AsyncPDFToWordConverter 只能在同一个事件循环中使用")
+        if self._loop is not None:
+            return
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._threads = ThreadPoolExecutor(max_workers=self.thread_workers,
+                                           thread_name_prefix='pdf2word')
+    
+    def _start_processes(self):
+        """第一次转换时创建进程池和进度通道"""
+        if self._processes is not None:
+            return
+        self._manager = multiprocessing.Manager()
+        self._events = multiprocessing.Queue()
+        self._processes = ProcessPoolExecutor(max_workers=self.process_workers,
+                                              initializer=_init_worker,
+                                              initargs=(self.converter_options, self._events))
+        self._pump = threading.Thread(target=self._forward_events, daemon=True)
+        self._pump.start()
+    
+    def _forward_events(self):
+        """把工作进程发来的进度转发到事件循环中对应的任务"""
+        while True:
+            item = self._events.get()
+            if item is None:
+                break
+            job_id, event = item
+            if event is None:
+                self._loop.call_soon_threadsafe(self._mark_drained, job_id)
+            else:
+                # 进度事件带上 ProgressEvent 的全部字段（kind、stage、page、elapsed 等）
+                self._loop.call_soon_threadsafe(
+                    functools.partial(self._emit, job_id, 'progress', **event))
+    
+    def _mark_drained(self, job_id: int):
+        """任务的进度事件已全部转发"""
+        drained = self._drained.get(job_id)
+        if drained is not None and not drained.done():
+            drained.set_result(None)
+    
+    def _emit(self, job_id: int, event_type: str, message: str, **fields):
+        """向任务的事件队列推送一个事件"""
+        queue = self._listeners.get(job_id)
+        if queue is not None:
+            queue.put_nowait(dict(fields, job=job_id, type=event_type, message=message))
+    
+    @contextlib.asynccontextmanager
+    async def _file_lock(self, path: str):
+        """同一个输出文件上的写操作依次执行（没有使用者的锁随即删除）"""
+        key = os.path.abspath(path)
+        lock, users = self._file_locks.get(key, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._file_locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._file_locks[key]
+            if users == 1:
+                del self._file_locks[key]
+            else:
+                self._file_locks[key] = (lock, users - 1)
+    
+    async def _wait(self, future, on_cancel=None):
+        """
+        等待执行器中的任务
+        
+        调用方被取消时先通知任务停止（on_cancel），并等待它真正结束后才
+        释放并发名额，保证同时执行的任务数不超过上限。
+        """
+        wrapped = asyncio.wrap_future(future)
+        try:
+            return await asyncio.shield(wrapped)
+        except asyncio.CancelledError:
+            future.cancel()
+            if on_cancel is not None:
+                on_cancel()
+            with contextlib.suppress(Exception, asyncio.CancelledError):
+                await wrapped
+            raise
+    
+    async def _run_in_thread(self, func, *args, lock_path: Optional[str] = None, **kwargs):
+        """在线程池中执行文档操作（受并发上限约束）"""
+        self._start()
+        lock = self._file_lock(lock_path) if lock_path else contextlib.nullcontext()
+        async with lock, self._semaphore:
+            return await self._wait(self._threads.submit(functools.partial(func, *args, **kwargs)))
+    
+    def start_conversion(self, pdf_path: str, word_path: str = None, use_ocr: bool = None,
+                         hybrid: bool = False, incremental: bool = False) -> ConversionJob:
+        """
+        开始一次转换，立即返回可迭代进度、可等待结果的 ConversionJob
+        
+        Args:
+            pdf_path: PDF 文件路径
+            word_path: 输出的 Word 文件路径（可选）
+            use_ocr: 是否使用OCR（None=自动检测）
+            hybrid: 是否逐页判断类型
+            incremental: 是否增量转换
+        
+        Returns:
+            ConversionJob
+        """
+        self._start()
+        job_id = next(self._job_ids)
+        queue = asyncio.Queue()
+        self._listeners[job_id] = queue
+        options = {'use_ocr': use_ocr, 'hybrid': hybrid, 'incremental': incremental}
+        task = self._loop.create_task(self._convert(job_id, pdf_path, word_path, options))
+        # 结束事件在任务完成时推送：任务开始执行前就被取消时协程体不会运行
+        task.add_done_callback(functools.partial(self._finish, job_id))
+        return ConversionJob(job_id, task, queue)
+    
+    def _finish(self, job_id: int, task: asyncio.Task):
+        """任务结束时推送结束事件（done/failed/cancelled）并移除事件队列"""
+        if task.cancelled():
+            self._emit(job_id, 'cancelled', "转换已取消")
+        elif task.exception() is not None:
+            self._emit(job_id, 'failed', str(task.exception()))
+        else:
+            result = task.result()
+            self._emit(job_id, 'done', f"转换完成: {result}", result=result)
+        # 事件已放入队列，迭代器仍能读到结束事件
+        self._listeners.pop(job_id, None)
+        self._drained.pop(job_id, None)
+    
+    async def _convert(self, job_id: int, pdf_path: str, word_path: Optional[str],
+                       options: dict) -> str:
+        """排队等待并发名额，在进程池中转换，并推送开始事件（结束事件见 _finish）"""
+        lock_path = word_path or os.path.splitext(pdf_path)[0] + '.docx'
+        async with self._file_lock(lock_path), self._semaphore:
+            self._start_processes()
+            self._emit(job_id, 'started', f"开始转换 {pdf_path}")
+            cancel = self._manager.Event()
+            drained = self._drained[job_id] = self._loop.create_future()
+            future = self._processes.submit(_convert_in_worker, job_id, cancel,
+                                            pdf_path, word_path, options)
+            try:
+                return await self._wait(future, on_cancel=cancel.set)
+            finally:
+                if future.done() and not future.cancelled():
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(asyncio.shield(drained), _DRAIN_TIMEOUT)
+    
+    async def convert_pdf_to_word(self, pdf_path: str, word_path: str = None,
+                                  use_ocr: bool = None, hybrid: bool = False,
+                                  incremental: bool = False) -> str:
+        """异步版 PDFToWordConverter.convert_pdf_to_word（不需要进度时使用）"""
+        return await self.start_conversion(pdf_path, word_path, use_ocr, hybrid, incremental)
+    
+    async def check_pdf_has_text(self, pdf_path: str) -> bool:
+        """异步版 check_pdf_has_text"""
+        return await self._run_in_thread(self.converter.check_pdf_has_text, pdf_path)
+    
+    async def classify_pages(self, pdf_path: str) -> List[str]:
+        """异步版 classify_pages"""
+        return await self._run_in_thread(self.converter.classify_pages, pdf_path)
+    
+    async def search_keyword(self, word_path: str, keyword: str) -> List[Tuple[int, str]]:
+        """异步版 search_keyword"""
+        return await self._run_in_thread(self.converter.search_keyword, word_path, keyword)
+    
+    async def highlight_keyword(self, word_path: str, keyword: str,
+                                output_path: str = None) -> str:
+        """异步版 highlight_keyword"""
+        target = output_path or word_path.replace('.docx', '_highlighted.docx')
+        return await self._run_in_thread(self.converter.highlight_keyword, word_path, keyword,
+                                         output_path, lock_path=target)
+    
+    async def highlight_keywords(self, word_path: str, keywords: List[str],
+                                 output_path: str = None) -> str:
+        """异步版 highlight_keywords"""
+        target = output_path or word_path.replace('.docx', '_highlighted.docx')
+        return await self._run_in_thread(self.converter.highlight_keywords, word_path, keywords,
+                                         output_path, lock_path=target)
+    
+    async def replace_text(self, word_path: str, old_text: str, new_text: str,
+                           output_path: str = None) -> str:
+        """异步版 replace_text"""
+        target = output_path or word_path.replace('.docx', '_edited.docx')
+        return await self._run_in_thread(self.converter.replace_text, word_path, old_text,
+                                         new_text, output_path, lock_path=target)
+    
+    async def add_text_to_document(self, word_path: str, text: str,
+                                   output_path: str = None) -> str:
+        """异步版 add_text_to_document"""
+        return await self._run_in_thread(self.converter.add_text_to_document, word_path, text,
+                                         output_path, lock_path=output_path or word_path)
+    
+    async def get_document_info(self, word_path: str) -> dict:
+        """异步版 get_document_info"""
+        return await self._run_in_thread(self.converter.get_document_info, word_path)
+    
+    async def close(self):
+        """关闭进程池、线程池和进度转发线程（等待正在执行的任务结束）"""
+        if self._processes is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._processes.shutdown)
+            self._events.put(None)
+            self._pump.join()
+            self._manager.shutdown()
+            self._processes = None
+        if self._threads is not None:
+            self._threads.shutdown(wait=False)
+            self._threads = None
+        self._loop = None
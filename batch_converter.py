@@ -0,0 +1,382 @@
+"""
+批量转换 - 把目录树或通配符匹配的 PDF 并行转换为 Word
+支持跳过已是最新的文件、中断后续传，并输出吞吐量、失败和每个文件耗时的汇总
+
+用法:
+    python batch_converter.py docs/ -o output/ -j 4
+    python batch_converter.py "scans/**/*.pdf" --ocr
+    python batch_converter.py docs/ -o output/ --index output/index.db
+"""
+import argparse
+import contextlib
+import glob
+import inspect
+import io
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from pdf_classifier import file_hash
+from pdf_to_word_converter import PDFToWordConverter
+from profiler import profile_path
+from search_index import SearchIndex
+
+# 输出根目录中的清单和汇总文件
+MANIFEST_NAME = '.pdf2word_batch.json'
+SUMMARY_NAME = 'batch_summary.json'
+# 清单格式版本，格式变化时旧清单作废
+MANIFEST_VERSION = 1
+# 清单最短保存间隔（秒）：中断后最多重做这段时间内完成的文件
+_SAVE_INTERVAL = 2.0
+
+# 影响输出内容的转换参数，只有它们参与清单的参数比较（其余参数只影响速度或
+# 进度输出，回调等对象的 repr 每次运行都不同，不能作为比较依据）；
+# ocr_preprocessor 的 repr 需包含全部参数（同 OCR 缓存键，见 ImagePreprocessor）
+_OUTPUT_OPTIONS = ('ocr_dpi', 'ocr_lang', 'ocr_config', 'ocr_adaptive_dpi',
+                   'ocr_min_confidence', 'ocr_preprocessor', 'ocr_layout')
+
+# 工作进程中复用的转换器（保留页面类型和语言检测缓存）
+_worker_converter = None
+# 工作进程中的检索索引：转换器先输出到临时文件，改名后才加入索引
+_worker_index = None
+
+
+def _init_worker(converter_options: dict):
+    """在工作进程中创建转换器"""
+    global _worker_converter, _worker_index
+    options = dict(converter_options)
+    _worker_index = options.pop('search_index', None)
+    _worker_converter = PDFToWordConverter(**options)
+
+
+def _convert_file(pdf_path: str, word_path: str, use_ocr: Optional[bool]) -> dict:
+    """
+    转换单个文件（在工作进程中执行）
+    
+    输出先写入 *.partial.docx，成功后再替换为正式文件，中断时不会留下
+    看起来已完成的半成品。转换过程中的输出不打印，失败时附在结果中。
+    
+    Args:
+        pdf_path: PDF 文件路径
+        word_path: 输出的 Word 文件路径
+        use_ocr: 是否使用OCR（None=自动检测）
+    
+    Returns:
+        {'status': 'done'/'failed', 'seconds', 'pages', 'size', 'mtime_ns', 'sha256', ...}
+    """
+    start = time.perf_counter()
+    result = {}
+    tmp_path = str(Path(word_path).with_suffix('.partial.docx'))
+    log = io.StringIO()
+    try:
+        # 转换前记录文件状态，转换期间被修改的文件下次仍会重新转换
+        stat = os.stat(pdf_path)
+        result.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=file_hash(pdf_path))
+        os.makedirs(os.path.dirname(os.path.abspath(word_path)), exist_ok=True)
+        with contextlib.redirect_stdout(log):
+            _worker_converter.convert_pdf_to_word(pdf_path, tmp_path, use_ocr=use_ocr)
+        os.replace(tmp_path, word_path)
+        if _worker_converter.profile:
+            # 性能分析结果随正式文件改名
+            target = profile_path(word_path)
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(profile_path(tmp_path), target)
+        if _worker_index is not None:
+            try:
+                _worker_index.add_document(word_path, force=True)
+            except Exception as e:
+                result['index_error'] = str(e)
+        result.update(status='done',
+                      pages=_worker_converter.open_document(pdf_path).page_count,
+                      ocr_failures=len(_worker_converter.ocr_failures))
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        # 转换失败时未完成文件的性能分析结果也一并删除
+        shutil.rmtree(profile_path(tmp_path), ignore_errors=True)
+        result.update(status='failed', error=str(e), log=log.getvalue()[-2000:])
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _completed(futures: dict):
+    """按完成顺序产出 (文件键, 结果)，工作进程异常退出时记为失败"""
+    for future in as_completed(futures):
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {'status': 'failed', 'error': f"工作进程异常: {e}", 'log': '', 'seconds': 0.0}
+        yield futures[future], result
+
+
+def collect_pdfs(source: str) -> Tuple[str, List[str]]:
+    """
+    收集要转换的 PDF 文件
+    
+    Args:
+        source: 目录（递归查找 *.pdf）或通配符（支持 **）
+    
+    Returns:
+        (基准目录, 按路径排序的 PDF 文件列表)，输出文件按相对基准目录的路径存放
+    """
+    if os.path.isdir(source):
+        base = os.path.abspath(source)
+        pdfs = [str(path) for path in Path(base).rglob('*') if path.suffix.lower() == '.pdf'
+                and path.is_file()]
+    else:
+        pdfs = [os.path.abspath(path) for path in glob.glob(source, recursive=True)
+                if path.lower().endswith('.pdf') and os.path.isfile(path)]
+        base = os.path.commonpath([os.path.dirname(path) for path in pdfs]) if pdfs else os.getcwd()
+    return base, sorted(pdfs)
+
+
+class BatchConverter:
+    """批量转换引擎：进程池并行转换，按清单跳过已是最新的文件，中断后可续传"""
+    
+    def __init__(self, output_dir: Optional[str] = None, workers: Optional[int] = 1,
+                 use_ocr: Optional[bool] = None, converter_options: Optional[dict] = None):
+        """
+        Args:
+            output_dir: 输出根目录（None=每个 Word 文件保存在对应 PDF 旁边），
+                        子目录结构与源目录相同
+            workers: 同时转换的文件数（1=在当前进程中逐个转换，None=使用全部CPU核心）
+            use_ocr: 是否使用OCR（None=每个文件自动检测）
+            converter_options: 传给 PDFToWordConverter 的参数（如 ocr_lang、ocr_cache）；
+                               其中的 search_index 在输出文件改名为正式文件后更新，
+                               已是最新而跳过的文件也会补建索引
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError(f"workers 必须大于 0: {workers}")
+        self.output_dir = output_dir
+        self.workers = workers
+        self.use_ocr = use_ocr
+        self.converter_options = dict(converter_options or {})
+    
+    def _options_key(self) -> str:
+        """影响输出的参数，变化后清单中的记录全部作废"""
+        # 没有指定的参数按默认值比较，显式传入默认值时清单仍然有效
+        defaults = inspect.signature(PDFToWordConverter).parameters
+        options = [(key, repr(self.converter_options.get(key, defaults[key].default)))
+                   for key in _OUTPUT_OPTIONS]
+        return repr((self.use_ocr, options))
+    
+    def _output_path(self, base: str, pdf_path: str) -> str:
+        """PDF 对应的输出路径"""
+        if self.output_dir is None:
+            return str(Path(pdf_path).with_suffix('.docx'))
+        relative = Path(os.path.relpath(pdf_path, base)).with_suffix('.docx')
+        return str(Path(self.output_dir) / relative)
+    
+    @staticmethod
+    def _is_up_to_date(entry: Optional[dict], pdf_path: str, word_path: str) -> bool:
+        """
+        判断文件是否无需重新转换
+        
+        大小和修改时间都没变时直接视为最新；只有修改时间变化时（复制、touch）
+        再比较内容哈希。
+        """
+        if not entry or entry.get('status') != 'done' or not os.path.exists(word_path):
+            return False
+        stat = os.stat(pdf_path)
+        if stat.st_size != entry['size']:
+            return False
+        if stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+        if file_hash(pdf_path) == entry['sha256']:
+            entry['mtime_ns'] = stat.st_mtime_ns
+            return True
+        return False
+    
+    @staticmethod
+    def _load_manifest(path: str, options_key: str) -> dict:
+        """读取清单中的文件记录 {相对路径: 记录}，清单无效或参数变化时返回空字典"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('options') != options_key:
+            return {}
+        return manifest.get('files', {})
+    
+    @staticmethod
+    def _save_json(path: str, data: dict):
+        """原子地写入 JSON 文件"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+    
+    def run(self, source: str, force: bool = False) -> dict:
+        """
+        批量转换
+        
+        每个文件完成后更新清单（最多每 2 秒写一次）。中断或崩溃后重新运行
+        同一命令即可续传：已完成的文件被跳过，未完成的文件重新转换。
+        
+        Args:
+            source: 目录（递归）或通配符
+            force: 忽略清单，全部重新转换
+        
+        Returns:
+            汇总字典（同时写入输出根目录的 batch_summary.json）
+        """
+        base, pdfs = collect_pdfs(source)
+        root = self.output_dir or base
+        os.makedirs(root, exist_ok=True)
+        manifest_path = os.path.join(root, MANIFEST_NAME)
+        options_key = self._options_key()
+        entries = {} if force else self._load_manifest(manifest_path, options_key)
+        
+        def save_manifest():
+            self._save_json(manifest_path, {'version': MANIFEST_VERSION, 'options': options_key,
+                                            'files': entries})
+        
+        keys = [Path(os.path.relpath(pdf_path, base)).as_posix() for pdf_path in pdfs]
+        # 源文件已删除的记录不再保留
+        entries = {key: entries[key] for key in keys if key in entries}
+        jobs = []
+        skipped = []
+        skipped_paths = []
+        for key, pdf_path in zip(keys, pdfs):
+            word_path = self._output_path(base, pdf_path)
+            if self._is_up_to_date(entries.get(key), pdf_path, word_path):
+                skipped.append(key)
+                skipped_paths.append(word_path)
+            else:
+                jobs.append((key, pdf_path, word_path))
+        print(f"共 {len(pdfs)} 个PDF文件：{len(skipped)} 个已是最新，{len(jobs)} 个需要转换"
+              f"（{self.workers} 个进程）")
+        
+        start = time.perf_counter()
+        results = {}
+        last_save = time.monotonic()
+        executor = None
+        try:
+            if self.workers > 1 and len(jobs) > 1:
+                executor = ProcessPoolExecutor(max_workers=min(self.workers, len(jobs)),
+                                               initializer=_init_worker,
+                                               initargs=(self.converter_options,))
+                futures = {executor.submit(_convert_file, pdf_path, word_path, self.use_ocr): key
+                           for key, pdf_path, word_path in jobs}
+                completed = _completed(futures)
+            else:
+                _init_worker(self.converter_options)
+                completed = ((key, _convert_file(pdf_path, word_path, self.use_ocr))
+                             for key, pdf_path, word_path in jobs)
+            
+            for done, (key, result) in enumerate(completed, 1):
+                results[key] = result
+                if result['status'] == 'done':
+                    entries[key] = {field: result[field] for field in
+                                    ('size', 'mtime_ns', 'sha256', 'status', 'pages', 'seconds')}
+                    print(f"[{done}/{len(jobs)}] ✓ {key}（{result['pages']} 页，"
+                          f"{result['seconds']:.1f} 秒）")
+                    if 'index_error' in result:
+                        print(f"  ⚠ 检索索引更新失败: {result['index_error']}")
+                else:
+                    entries.pop(key, None)
+                    print(f"[{done}/{len(jobs)}] ✗ {key}: {result['error']}")
+                if time.monotonic() - last_save >= _SAVE_INTERVAL:
+                    save_manifest()
+                    last_save = time.monotonic()
+        finally:
+            # 中断时取消尚未开始的文件，已完成的记录仍写入清单
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            save_manifest()
+        
+        summary = self._write_summary(root, source, start, len(pdfs), skipped, jobs, results)
+        
+        search_index = self.converter_options.get('search_index')
+        if search_index is not None and skipped_paths:
+            # 跳过的文件可能是在启用索引之前转换的，未变化的文档很快跳过
+            indexed = search_index.add_documents(skipped_paths)
+            print(f"检索索引：补建 {indexed['added']} 个，已是最新 {indexed['skipped']} 个")
+            for path, error in indexed['failed']:
+                print(f"  ⚠ 检索索引更新失败: {path}: {error}")
+        
+        return summary
+    
+    def _write_summary(self, root: str, source: str, start: float, total: int,
+                       skipped: List[str], jobs: list, results: dict) -> dict:
+        """汇总吞吐量、失败文件和每个文件的耗时，写入 batch_summary.json 并打印"""
+        elapsed = time.perf_counter() - start
+        done = {key: result for key, result in results.items() if result['status'] == 'done'}
+        failed = {key: result for key, result in results.items() if result['status'] != 'done'}
+        pages = sum(result['pages'] for result in done.values())
+        summary = {
+            'source': source,
+            'workers': self.workers,
+            'total': total,
+            'converted': len(done),
+            'skipped': len(skipped),
+            'failed': len(failed),
+            'seconds': round(elapsed, 3),
+            'pages': pages,
+            'files_per_minute': round(len(done) / elapsed * 60, 2) if elapsed else 0.0,
+            'pages_per_second': round(pages / elapsed, 3) if elapsed else 0.0,
+            'failures': [{'file': key, 'error': result['error'], 'log': result['log']}
+                         for key, result in failed.items()],
+            'files': [{'file': key, 'output': word_path, 'status': results[key]['status'],
+                       'seconds': results[key]['seconds'], 'pages': results[key].get('pages')}
+                      for key, _, word_path in jobs if key in results],
+        }
+        self._save_json(os.path.join(root, SUMMARY_NAME), summary)
+        
+        print("=" * 50)
+        print(f"转换 {len(done)} 个，跳过 {len(skipped)} 个，失败 {len(failed)} 个，"
+              f"用时 {elapsed:.1f} 秒")
+        print(f"吞吐量: {summary['files_per_minute']} 文件/分钟，"
+              f"{summary['pages_per_second']} 页/秒")
+        slowest = sorted(done.items(), key=lambda item: item[1]['seconds'], reverse=True)[:5]
+        if slowest:
+            print("耗时最长的文件：")
+            for key, result in slowest:
+                print(f"  {result['seconds']:8.1f} 秒  {key}")
+        for key in failed:
+            print(f"✗ 失败: {key}")
+        print(f"汇总已保存: {os.path.join(root, SUMMARY_NAME)}")
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量把 PDF 转换为 Word")
+    parser.add_argument('source', help="PDF 所在目录（递归）或通配符，如 'docs/**/*.pdf'")
+    parser.add_argument('-o', '--output', help="输出根目录（默认保存在 PDF 旁边）")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="同时转换的文件数（0=使用全部CPU核心）")
+    ocr = parser.add_mutually_exclusive_group()
+    ocr.add_argument('--ocr', dest='use_ocr', action='store_const', const=True,
+                     help="全部使用OCR")
+    ocr.add_argument('--no-ocr', dest='use_ocr', action='store_const', const=False,
+                     help="不使用OCR")
+    parser.add_argument('--ocr-lang', help="OCR 识别语言（如 chi_sim+eng 或 auto）")
+    parser.add_argument('--force', action='store_true', help="忽略清单，全部重新转换")
+    parser.add_argument('--profile', action='store_true',
+                        help="按阶段采集性能数据，写入每个输出文档旁的 *.profile 目录")
+    parser.add_argument('--index', metavar='INDEX_DB',
+                        help="把输出文档加入全文检索索引（见 search_index.py）")
+    args = parser.parse_args()
+    
+    options = {}
+    if args.ocr_lang:
+        options['ocr_lang'] = args.ocr_lang
+    if args.profile:
+        options['profile'] = True
+    if args.index:
+        options['search_index'] = SearchIndex(args.index)
+    batch = BatchConverter(output_dir=args.output, workers=args.workers or None,
+                           use_ocr=args.use_ocr, converter_options=options)
+    summary = batch.run(args.source, force=args.force)
+    raise SystemExit(1 if summary['failed'] else 0)
+
+
+if __name__ == '__main__':
+    main()
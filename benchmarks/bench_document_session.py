@@ -0,0 +1,116 @@
+"""
+文档会话与逐个调用文档操作的耗时对比
+
+同一组操作（搜索、高亮、替换、添加文本、查看信息）分别用逐个调用的方法
+（每次都解析文档，写操作每次都保存）和一个文档会话（解析一次、保存一次）执行，
+并检查两种方式得到的文档内容一致。未指定文件时生成一个 --pages 页的测试文档。
+
+用法:
+    python benchmarks/bench_document_session.py [output.docx] [--pages 500] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+from pdf_to_word_converter import PDFToWordConverter
+
+_WORDS = ('合同 甲方 乙方 条款 付款 日期 金额 违约 责任 附件 签字 盖章 '
+          'contract party payment amount clause schedule').split()
+
+
+def make_document(path: str, pages: int, seed: int = 0):
+    """生成测试文档：每页 20 个段落，每 10 页一张 6x4 的表格，页之间分页"""
+    rng = random.Random(seed)
+    doc = Document()
+    for page in range(pages):
+        for _ in range(20):
+            doc.add_paragraph(' '.join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20))))
+        if page % 10 == 0:
+            table = doc.add_table(rows=6, cols=4)
+            for cell in table._cells:
+                cell.text = rng.choice(_WORDS)
+        doc.add_page_break()
+    doc.save(path)
+
+
+def run_separately(converter: PDFToWordConverter, word_path: str, work_dir: str) -> list:
+    """逐个调用转换器的方法（结果依次写入中间文件）"""
+    highlighted = os.path.join(work_dir, 'separate_highlighted.docx')
+    edited = os.path.join(work_dir, 'separate_edited.docx')
+    results = converter.search_keyword(word_path, '合同')
+    converter.highlight_keyword(word_path, '合同', highlighted)
+    converter.replace_text(highlighted, '甲方', '某某公司', edited)
+    converter.add_text_to_document(edited, '（已审阅）')
+    info = converter.get_document_info(edited)
+    return [len(results), info, edited]
+
+
+def run_in_session(converter: PDFToWordConverter, word_path: str, work_dir: str) -> list:
+    """在一个文档会话中执行同样的操作"""
+    output = os.path.join(work_dir, 'session.docx')
+    with converter.document_session(word_path, output) as session:
+        results = session.search_keyword('合同')
+        session.highlight_keyword('合同')
+        session.replace_text('甲方', '某某公司')
+        session.add_text('（已审阅）')
+        info = session.get_document_info()
+    return [len(results), info, output]
+
+
+def _texts(path: str) -> list:
+    doc = Document(path)
+    return ([para.text for para in doc.paragraphs]
+            + [cell.text for table in doc.tables for cell in table._cells])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比文档会话与逐个调用文档操作的耗时")
+    parser.add_argument('docx', nargs='?', help="Word 文件（默认生成测试文档）")
+    parser.add_argument('--pages', type=int, default=500, help="生成的测试文档页数")
+    parser.add_argument('--repeat', type=int, default=3, help="每种方式重复次数，取最快一次")
+    args = parser.parse_args()
+    
+    converter = PDFToWordConverter(progress_callback=None)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        word_path = args.docx
+        if word_path is None:
+            word_path = os.path.join(tmp_dir, 'input.docx')
+            make_document(word_path, args.pages)
+        print(f"{word_path}: {os.path.getsize(word_path) / 1024 / 1024:.1f} MB, "
+              f"{converter.get_document_info(word_path)}")
+        
+        outputs = {}
+        timings = {}
+        for name, workflow in (('逐个调用', run_separately), ('文档会话', run_in_session)):
+            best = None
+            for _ in range(args.repeat):
+                # 每次从原始文件的副本开始
+                source = os.path.join(tmp_dir, 'source.docx')
+                shutil.copyfile(word_path, source)
+                start = time.perf_counter()
+                # 屏蔽各操作打印的结果
+                with contextlib.redirect_stdout(io.StringIO()):
+                    outputs[name] = workflow(converter, source, tmp_dir)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+            print(f"{name}: {best:8.2f} s")
+        
+        print(f"加速比: {timings['逐个调用'] / timings['文档会话']:.2f}x")
+        separate, session = outputs['逐个调用'], outputs['文档会话']
+        if separate[:2] != session[:2] or _texts(separate[2]) != _texts(session[2]):
+            print("注意: 两种方式的结果不一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+OCR 后端性能对比：逐页调用 Tesseract（page）与单次调用识别多页（batch）
+
+用法:
+    python benchmarks/bench_ocr_backend.py scan.pdf [--pages 20] [--dpi 300] [--lang chi_sim+eng]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_to_word_converter import OCR_AVAILABLE, _ocr_chunk
+
+if OCR_AVAILABLE:
+    from pdf2image import convert_from_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比 page 与 batch 两种 OCR 后端的耗时")
+    parser.add_argument('pdf', help="扫描版 PDF 文件")
+    parser.add_argument('--pages', type=int, default=20, help="参与测试的页数")
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--lang', default='chi_sim+eng')
+    parser.add_argument('--repeat', type=int, default=3, help="每个后端重复次数，取最快一次")
+    args = parser.parse_args()
+    
+    if not OCR_AVAILABLE:
+        sys.exit("OCR 功能未安装（需要 pytesseract 和 pdf2image）")
+    
+    # 渲染只做一次，只比较识别阶段
+    images = convert_from_path(args.pdf, dpi=args.dpi, first_page=1, last_page=args.pages)
+    print(f"{len(images)} 页, dpi={args.dpi}, lang={args.lang}")
+    
+    results = {}
+    for backend in ('page', 'batch'):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            texts = [text for text, _ in _ocr_chunk(images, args.lang, backend)]
+            timings.append(time.perf_counter() - start)
+        results[backend] = texts
+        best = min(timings)
+        print(f"{backend:>6}: {best:8.2f} s  ({best / len(images) * 1000:7.1f} ms/页)")
+    
+    mismatched = [i + 1 for i, (a, b) in enumerate(zip(results['page'], results['batch']))
+                  if a.strip() != b.strip()]
+    if mismatched:
+        print(f"注意: 以下页面两种后端输出不一致: {mismatched}")
+
+
+if __name__ == '__main__':
+    main()
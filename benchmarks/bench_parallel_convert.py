@@ -0,0 +1,51 @@
+"""
+标准转换（pdf2docx）并行分片的扩展性测试：不同进程数下的耗时与加速比
+
+用法:
+    python benchmarks/bench_parallel_convert.py report.pdf [--workers 1 2 4 8] [--repeat 1]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+from pdf_to_word_converter import PDFToWordConverter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测试标准转换在不同进程数下的加速比")
+    parser.add_argument('pdf', help="文本型 PDF 文件（页数越多越能体现并行效果）")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="参与测试的进程数")
+    parser.add_argument('--repeat', type=int, default=1, help="每种进程数重复次数，取最快一次")
+    args = parser.parse_args()
+    
+    print(f"CPU 核心数: {os.cpu_count()}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for workers in args.workers:
+            converter = PDFToWordConverter(convert_workers=workers)
+            output = os.path.join(tmp_dir, f'out_{workers}.docx')
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                # 屏蔽转换过程中的进度输出，只保留测试结果
+                with contextlib.redirect_stdout(io.StringIO()):
+                    converter.convert_pdf_to_word(args.pdf, output, use_ocr=False)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            if baseline is None:
+                baseline = best
+            sections = len(Document(output).sections)
+            print(f"workers={workers:>3}: {best:8.2f} s  加速比 {baseline / best:5.2f}x  ({sections} 节)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+"""
+基准测试套件：在合成语料上测量转换和文档操作的耗时、吞吐量和内存，
+并与保存的基准结果比较，超过阈值即视为性能回退（退出码 1）
+
+测试项目:
+    convert_standard/<文档>  标准转换（pdf2docx），文本、表格、混合文档
+    convert_ocr/<文档>       OCR 转换，扫描、混合文档（需要 Tesseract 和 Poppler）
+    search/<语言>            search_keyword
+    highlight/<语言>         highlight_keyword
+    replace/<语言>           replace_text
+    info/<语言>              get_document_info
+
+每个项目在单独的子进程中执行（峰值内存互不影响），准备工作不计时，
+重复 --repeat 次取最快一次。内存不计导入模块的开销（约 100 MB，各项目都
+一样）：计时结束后再执行一次，用 tracemalloc 记录这次操作的 Python 内存分配
+峰值；另记录峰值常驻内存比导入模块、创建转换器后增加了多少（包括 PyMuPDF
+等原生库的内存，但低于导入时的峰值的部分看不出来）。语料见 benchmarks/corpus.py。
+
+用法:
+    python benchmarks/bench_suite.py [--pages 8] [--repeat 3] [--cases convert search]
+    python benchmarks/bench_suite.py --save-baseline         # 把本次结果存为基准
+    python benchmarks/bench_suite.py --time-threshold 0.1    # 与基准比较（默认 benchmarks/baseline.json）
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import CORPUS, KEYWORDS, build_corpus
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块，不记录峰值内存
+    resource = None
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+RESULTS_VERSION = 2
+
+# 标准转换和OCR转换测试的文档
+_STANDARD_DOCS = ('text_en', 'text_zh', 'tables_en', 'tables_zh', 'mixed_en', 'mixed_zh')
+_OCR_DOCS = ('scan_en', 'scan_zh', 'mixed_zh')
+# 文档操作使用的 Word 文件由这些文档转换而来
+_OPERATION_DOCS = {'en': 'text_en', 'zh': 'text_zh'}
+_OCR_LANGS = {'en': 'eng', 'zh': 'chi_sim+eng'}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """当前进程（含已结束的子进程）的峰值常驻内存（MB）"""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _run_case(case: dict, repeat: int) -> dict:
+    """在子进程中执行一个测试项目（准备工作不计时），返回耗时和内存"""
+    from pdf_to_word_converter import PDFToWordConverter
+    
+    # pdf2docx 通过 logging 输出逐页进度
+    logging.disable(logging.INFO)
+    converter = PDFToWordConverter(progress_callback=None, ocr_lang=case.get('ocr_lang', 'eng'))
+    # 导入模块和创建转换器之后的峰值内存，作为本项目内存增量的起点
+    base_rss = _peak_rss_mb()
+    work_dir = case['work_dir']
+    op = case['op']
+    
+    if op == 'convert':
+        output = os.path.join(work_dir, 'output.docx')
+        run = lambda: converter.convert_pdf_to_word(case['pdf'], output, use_ocr=case['use_ocr'])
+    else:
+        # 每次操作前复制一份原始文件，保证各次重复的输入相同
+        source = case['docx']
+        target = os.path.join(work_dir, 'target.docx')
+        output = os.path.join(work_dir, 'output.docx')
+        keyword = case['keyword']
+        operations = {
+            'search': lambda: converter.search_keyword(target, keyword),
+            'highlight': lambda: converter.highlight_keyword(target, keyword, output),
+            'replace': lambda: converter.replace_text(target, keyword, keyword.upper() + '*',
+                                                      output),
+            'info': lambda: converter.get_document_info(target),
+        }
+        
+        def run():
+            shutil.copyfile(source, target)
+            return operations[op]()
+    
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        # 文档操作会打印结果，测试时不输出
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        timings.append(time.perf_counter() - start)
+    # 单独执行一次测量内存分配（tracemalloc 会拖慢执行，不与计时混在一起）
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run()
+    alloc_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if op == 'convert' and converter.ocr_failures:
+        raise RuntimeError(f"{len(converter.ocr_failures)} 页识别失败: "
+                           f"{converter.ocr_failures[0][1]}")
+    peak_rss = _peak_rss_mb()
+    return {'seconds': min(timings), 'median_seconds': statistics.median(timings),
+            'alloc_peak_mb': round(alloc_peak / (1024 * 1024), 1),
+            'base_rss_mb': base_rss, 'peak_rss_mb': peak_rss,
+            'rss_increase_mb': None if peak_rss is None else round(peak_rss - base_rss, 1)}
+
+
+def _ocr_missing(langs: List[str]) -> Optional[str]:
+    """OCR 测试缺少的条件（都满足时返回 None）"""
+    from pdf_to_word_converter import OCR_AVAILABLE
+    if not OCR_AVAILABLE:
+        return "未安装 pytesseract / pdf2image"
+    import pytesseract
+    if shutil.which('pdftoppm') is None:
+        return "未安装 Poppler"
+    try:
+        installed = set(pytesseract.get_languages(config=''))
+    except Exception:
+        return "未安装 Tesseract"
+    missing = [code for lang in langs for code in lang.split('+') if code not in installed]
+    return f"Tesseract 缺少语言包: {', '.join(missing)}" if missing else None
+
+
+def _plan_cases(corpus: dict, work_dir: str, page_count: int) -> List[dict]:
+    """列出全部测试项目"""
+    cases = []
+    for name in _STANDARD_DOCS:
+        cases.append({'name': f'convert_standard/{name}', 'op': 'convert', 'pdf': corpus[name],
+                      'use_ocr': False, 'pages': page_count})
+    for name in _OCR_DOCS:
+        lang = _OCR_LANGS[CORPUS[name][1]]
+        cases.append({'name': f'convert_ocr/{name}', 'op': 'convert', 'pdf': corpus[name],
+                      'use_ocr': True, 'ocr_lang': lang, 'pages': page_count,
+                      'skip': _ocr_missing([lang])})
+    for lang, name in _OPERATION_DOCS.items():
+        docx = os.path.join(work_dir, f'{name}.docx')
+        for op in ('search', 'highlight', 'replace', 'info'):
+            cases.append({'name': f'{op}/{lang}', 'op': op, 'docx': docx,
+                          'keyword': KEYWORDS[lang], 'source_pdf': corpus[name]})
+    return cases
+
+
+def _prepare_documents(cases: List[dict]):
+    """把文档操作用到的 Word 文件转换出来（不计入测试时间）"""
+    from pdf_to_word_converter import PDFToWordConverter
+    
+    logging.disable(logging.INFO)
+    converter = PDFToWordConverter(progress_callback=None)
+    for case in cases:
+        if 'docx' in case and not os.path.exists(case['docx']):
+            converter.convert_pdf_to_word(case['source_pdf'], case['docx'], use_ocr=False)
+
+
+def run_suite(corpus_dir: str, pages: int, seed: int, repeat: int,
+              filters: Optional[List[str]] = None) -> dict:
+    """
+    生成语料并执行选中的测试项目
+    
+    Args:
+        corpus_dir: 语料目录
+        pages: 每个文档的页数
+        seed: 语料随机种子
+        repeat: 每个项目的重复次数
+        filters: 只执行名称包含其中任一字符串的项目（None=全部）
+    
+    Returns:
+        测试结果（可保存为基准）
+    """
+    corpus = build_corpus(corpus_dir, pages, seed)
+    results = {}
+    spawn = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory(prefix='pdf2word_bench_') as work_dir:
+        cases = [case for case in _plan_cases(corpus, work_dir, pages)
+                 if not filters or any(item in case['name'] for item in filters)]
+        _prepare_documents(cases)
+        for case in cases:
+            name = case['name']
+            if case.get('skip'):
+                print(f"{name:<28} 跳过: {case['skip']}")
+                continue
+            case_dir = tempfile.mkdtemp(dir=work_dir)
+            # 每个项目一个新进程，峰值内存只反映本项目
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                result = executor.submit(_run_case, dict(case, work_dir=case_dir),
+                                         repeat).result()
+            if case['op'] == 'convert':
+                result['throughput'] = round(case['pages'] / result['seconds'], 3)
+                result['unit'] = 'pages/s'
+            else:
+                result['throughput'] = round(1 / result['seconds'], 3)
+                result['unit'] = 'ops/s'
+            results[name] = result
+            rss = result['rss_increase_mb']
+            print(f"{name:<28} {result['seconds']:8.3f} s  {result['throughput']:9.2f} "
+                  f"{result['unit']:<8} 分配 {result['alloc_peak_mb']:7.1f} MB"
+                  f"{'' if rss is None else f'  常驻 {rss:+7.1f} MB'}")
+    
+    from importlib.metadata import version
+    return {
+        'version': RESULTS_VERSION,
+        'corpus': {'pages': pages, 'seed': seed},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'pdf2docx': version('pdf2docx'),
+            'python-docx': version('python-docx'),
+        },
+        'repeat': repeat,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'cases': results,
+    }
+
+
+def compare(results: dict, baseline: dict, time_threshold: float,
+            rss_threshold: float, min_delta: float = 0.01,
+            min_rss_delta: float = 5.0) -> List[str]:
+    """
+    与基准结果比较并打印对比表
+    
+    Args:
+        results: 本次结果
+        baseline: 基准结果
+        time_threshold: 允许的耗时增幅（0.2=慢 20% 以内不算回退）
+        rss_threshold: 允许的内存增幅（内存分配峰值和常驻内存增量分别比较）
+        min_delta: 耗时增加不超过该秒数时不算回退（很快的项目计时误差较大）
+        min_rss_delta: 内存增加不超过该 MB 数时不算回退（数值很小时比例误差较大）
+    
+    Returns:
+        回退的项目说明列表（为空表示没有回退）
+    """
+    if baseline.get('version') != results['version']:
+        raise ValueError(f"基准结果的格式版本 {baseline.get('version')} 与本次 "
+                         f"{results['version']} 不同，请重新保存基准")
+    if baseline.get('corpus') != results['corpus']:
+        raise ValueError(f"基准使用的语料参数 {baseline.get('corpus')} 与本次 "
+                         f"{results['corpus']} 不同，无法比较")
+    regressions = []
+    print(f"\n与基准比较（{baseline.get('created', '未知时间')}，耗时阈值 "
+          f"+{time_threshold:.0%}，内存阈值 +{rss_threshold:.0%} 且 +{min_rss_delta:g} MB）:")
+    for name, result in results['cases'].items():
+        old = baseline['cases'].get(name)
+        if old is None:
+            print(f"{name:<28} 新项目")
+            continue
+        change = result['seconds'] / old['seconds'] - 1
+        status = []
+        if change > time_threshold and result['seconds'] - old['seconds'] > min_delta:
+            status.append("变慢")
+            regressions.append(f"{name}: 耗时 {old['seconds']:.3f} → {result['seconds']:.3f} s "
+                               f"({change:+.0%})")
+        rss_text = ''
+        for key, label in (('alloc_peak_mb', '内存分配峰值'), ('rss_increase_mb', '常驻内存增量')):
+            new_mb, old_mb = result[key], old.get(key)
+            if new_mb is None or old_mb is None:
+                continue
+            if key == 'alloc_peak_mb':
+                rss_text = f"内存 {new_mb - old_mb:+6.1f} MB"
+            if new_mb - old_mb > min_rss_delta and new_mb > old_mb * (1 + rss_threshold):
+                status.append("内存增加")
+                regressions.append(f"{name}: {label} {old_mb:.1f} → {new_mb:.1f} MB "
+                                   f"({new_mb - old_mb:+.1f} MB)")
+        print(f"{name:<28} 耗时 {change:+6.1%}  {rss_text:<16} {'、'.join(status) or 'OK'}")
+    for name in baseline['cases']:
+        if name not in results['cases']:
+            print(f"{name:<28} 本次未执行")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在合成语料上测试性能并与基准比较")
+    parser.add_argument('--pages', type=int, default=8, help="每个语料文档的页数")
+    parser.add_argument('--seed', type=int, default=0, help="语料随机种子")
+    parser.add_argument('--repeat', type=int, default=3, help="每个项目重复次数，取最快一次")
+    parser.add_argument('--cases', nargs='+', help="只执行名称包含这些字符串的项目")
+    parser.add_argument('--corpus-dir',
+                        default=os.path.join(tempfile.gettempdir(), 'pdf2word_bench_corpus'),
+                        help="语料目录（参数不变时复用已生成的文件）")
+    parser.add_argument('--output', help="把本次结果写入 JSON 文件")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基准结果文件")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果存为基准")
+    parser.add_argument('--time-threshold', type=float, default=0.2,
+                        help="耗时增幅超过该比例视为回退（默认 0.2）")
+    parser.add_argument('--min-delta', type=float, default=0.01,
+                        help="耗时增加不超过该秒数时不算回退（默认 0.01）")
+    parser.add_argument('--rss-threshold', type=float, default=0.25,
+                        help="内存分配峰值或常驻内存增量的增幅超过该比例视为回退（默认 0.25）")
+    parser.add_argument('--min-rss-delta', type=float, default=5.0,
+                        help="内存增加不超过该 MB 数时不算回退（默认 5）")
+    args = parser.parse_args()
+    
+    print(f"Python {platform.python_version()}，CPU 核心数: {os.cpu_count()}，"
+          f"每个文档 {args.pages} 页，重复 {args.repeat} 次")
+    results = run_suite(args.corpus_dir, args.pages, args.seed, args.repeat, args.cases)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n基准已保存: {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\n没有基准结果（{args.baseline}），使用 --save-baseline 保存本次结果")
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.time_threshold, args.rss_threshold,
+                          args.min_delta, args.min_rss_delta)
+    if regressions:
+        print(f"\n性能回退 {len(regressions)} 项:")
+        for item in regressions:
+            print(f"  {item}")
+        sys.exit(1)
+    print("\n没有性能回退")
+
+
+if __name__ == '__main__':
+    main()
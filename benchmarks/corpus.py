@@ -0,0 +1,239 @@
+"""
+基准测试用的合成 PDF 语料：文本页、扫描页、表格页及混合文档，中英文各一套
+
+同样的参数总是生成逐字节相同的文件（固定随机种子、固定元数据、不写文件 ID），
+不同机器、不同版本的测试结果可以直接比较。PDF 用 PyMuPDF（pdf2docx 的依赖）生成。
+
+用法:
+    python benchmarks/corpus.py output_dir [--pages 8] [--seed 0]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+from typing import Dict, List, Optional
+
+import fitz
+
+# 语料中的文档：名称 → (页面类型, 语言)；mixed 按 文本/扫描/表格 轮流排列
+CORPUS = {
+    'text_en': ('text', 'en'),
+    'text_zh': ('text', 'zh'),
+    'tables_en': ('table', 'en'),
+    'tables_zh': ('table', 'zh'),
+    'scan_en': ('scan', 'en'),
+    'scan_zh': ('scan', 'zh'),
+    'mixed_en': ('mixed', 'en'),
+    'mixed_zh': ('mixed', 'zh'),
+}
+# 每页都会出现的关键词（供搜索、高亮、替换测试使用）
+KEYWORDS = {'en': 'benchmark', 'zh': '基准'}
+
+CORPUS_VERSION = 1
+MANIFEST_NAME = 'corpus.json'
+
+_WORDS_EN = ('the quick brown fox jumps over lazy dog document page report table value '
+             'result analysis section figure data summary method system process design '
+             'performance memory index search convert format layout text scan image '
+             'quality number total average annual review project budget schedule').split()
+_WORDS_ZH = ('文档 页面 报告 表格 数据 结果 分析 章节 图表 摘要 方法 系统 流程 设计 性能 '
+             '内存 索引 搜索 转换 格式 版面 文字 扫描 图片 质量 数量 合计 平均 年度 审查 '
+             '项目 预算 进度 会议 记录 说明 附件 目录 标题 正文').split()
+_FONTS = {'en': 'helv', 'zh': 'china-s'}
+# 每行的字符数上限（A4，11 磅字）
+_LINE_CHARS = {'en': 88, 'zh': 40}
+_PAGE_WIDTH, _PAGE_HEIGHT = fitz.paper_size('a4')
+_MARGIN = 60
+_FONT_SIZE = 11
+_LINE_HEIGHT = 16
+# 扫描页的渲染分辨率
+_SCAN_DPI = 150
+# 固定的文档信息（PyMuPDF 默认写入当前时间）
+_METADATA = {'title': 'pdf2word benchmark corpus', 'author': 'pdf2word', 'subject': '',
+             'keywords': '', 'creator': 'benchmarks/corpus.py', 'producer': 'PyMuPDF',
+             'creationDate': 'D:20240101000000', 'modDate': 'D:20240101000000'}
+
+
+def _sentence(rng: random.Random, lang: str, keyword: bool = False) -> str:
+    """随机句子（keyword=True 时在句中插入关键词）"""
+    words = _WORDS_EN if lang == 'en' else _WORDS_ZH
+    tokens = [rng.choice(words) for _ in range(rng.randint(6, 14))]
+    if keyword:
+        tokens.insert(rng.randrange(len(tokens)), KEYWORDS[lang])
+    if lang == 'en':
+        return ' '.join(tokens).capitalize() + '.'
+    return ''.join(tokens) + '。'
+
+
+def _wrap(text: str, lang: str) -> List[str]:
+    """按每行字符数折行（英文在空格处折行）"""
+    width = _LINE_CHARS[lang]
+    if lang != 'en':
+        return [text[i:i + width] for i in range(0, len(text), width)]
+    lines, line = [], ''
+    for word in text.split(' '):
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _draw_text_page(page, rng: random.Random, lang: str, number: int):
+    """标题加若干段落，每段都含关键词"""
+    font = _FONTS[lang]
+    y = _MARGIN + 10
+    title = f"Section {number}" if lang == 'en' else f"第 {number} 节"
+    page.insert_text((_MARGIN, y), title, fontname=font, fontsize=16)
+    y += 30
+    while True:
+        paragraph = ' ' if lang == 'en' else ''
+        paragraph = paragraph.join(_sentence(rng, lang, keyword=i == 0)
+                                   for i in range(rng.randint(2, 4)))
+        lines = _wrap(paragraph, lang)
+        if y + len(lines) * _LINE_HEIGHT > _PAGE_HEIGHT - _MARGIN:
+            break
+        for line in lines:
+            page.insert_text((_MARGIN, y), line, fontname=font, fontsize=_FONT_SIZE)
+            y += _LINE_HEIGHT
+        y += _LINE_HEIGHT // 2
+
+
+def _draw_table_page(page, rng: random.Random, lang: str, number: int):
+    """两张带边框的表格（表头 + 数据行），pdf2docx 按边框识别为 Word 表格"""
+    font = _FONTS[lang]
+    words = _WORDS_EN if lang == 'en' else _WORDS_ZH
+    columns, rows, row_height = 5, 14, 20
+    col_width = (_PAGE_WIDTH - 2 * _MARGIN) / columns
+    top = _MARGIN
+    for table in range(2):
+        caption = (f"Table {number}.{table + 1} {KEYWORDS['en']}" if lang == 'en'
+                   else f"表 {number}.{table + 1} {KEYWORDS['zh']}")
+        page.insert_text((_MARGIN, top + 12), caption, fontname=font, fontsize=_FONT_SIZE)
+        top += 20
+        # 表格线画成整条横线和竖线（逐格画矩形会产生大量重叠线段）
+        bottom = top + (rows + 1) * row_height
+        for row in range(rows + 2):
+            y = top + row * row_height
+            page.draw_line((_MARGIN, y), (_PAGE_WIDTH - _MARGIN, y), width=0.6)
+        for col in range(columns + 1):
+            x = _MARGIN + col * col_width
+            page.draw_line((x, top), (x, bottom), width=0.6)
+        for row in range(rows + 1):
+            for col in range(columns):
+                if row == 0:
+                    cell = words[col].upper() if lang == 'en' else words[col]
+                elif col == 0:
+                    cell = rng.choice(words)
+                else:
+                    cell = f"{rng.randint(0, 99999):,}"
+                page.insert_text((_MARGIN + col * col_width + 4, top + (row + 1) * row_height - 6),
+                                 cell, fontname=font, fontsize=_FONT_SIZE - 2)
+        top += (rows + 1) * row_height + 30
+
+
+def _add_scan_page(doc, rng: random.Random, lang: str, number: int):
+    """把文本页渲染为灰度图片后作为整页图片插入（没有文字层）"""
+    source = fitz.open()
+    _draw_text_page(source.new_page(width=_PAGE_WIDTH, height=_PAGE_HEIGHT), rng, lang, number)
+    pixmap = source[0].get_pixmap(dpi=_SCAN_DPI, colorspace=fitz.csGRAY)
+    source.close()
+    page = doc.new_page(width=_PAGE_WIDTH, height=_PAGE_HEIGHT)
+    page.insert_image(page.rect, stream=pixmap.tobytes('png'))
+
+
+def generate_pdf(path: str, kind: str, lang: str, pages: int, seed: int = 0):
+    """
+    生成一个合成 PDF
+    
+    Args:
+        path: 输出文件路径
+        kind: 页面类型（'text' / 'table' / 'scan' / 'mixed'）
+        lang: 语言（'en' / 'zh'）
+        pages: 页数
+        seed: 随机种子（同样的参数生成同样的文件）
+    """
+    rng = random.Random(f"{seed}:{kind}:{lang}")
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        page_kind = kind if kind != 'mixed' else ('text', 'scan', 'table')[(number - 1) % 3]
+        if page_kind == 'scan':
+            _add_scan_page(doc, rng, lang, number)
+            continue
+        page = doc.new_page(width=_PAGE_WIDTH, height=_PAGE_HEIGHT)
+        if page_kind == 'table':
+            _draw_table_page(page, rng, lang, number)
+        else:
+            _draw_text_page(page, rng, lang, number)
+    doc.set_metadata(_METADATA)
+    doc.save(path, garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_corpus(output_dir: str, pages: int = 8, seed: int = 0,
+                 names: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    生成（或复用已生成的）语料
+    
+    目录中的 corpus.json 记录生成参数和文件哈希，参数相同且文件未被改动时
+    直接复用。
+    
+    Args:
+        output_dir: 语料目录
+        pages: 每个文档的页数
+        seed: 随机种子
+        names: 要生成的文档（None=CORPUS 中的全部）
+    
+    Returns:
+        {文档名: 文件路径}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    params = {'version': CORPUS_VERSION, 'pages': pages, 'seed': seed,
+              'pymupdf': fitz.VersionBind}
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get('params') != params:
+        manifest = {'params': params, 'files': {}}
+    
+    paths = {}
+    for name in names or CORPUS:
+        kind, lang = CORPUS[name]
+        path = os.path.join(output_dir, f'{name}.pdf')
+        if not (os.path.exists(path) and manifest['files'].get(name) == _sha256(path)):
+            generate_pdf(path, kind, lang, pages, seed)
+            manifest['files'][name] = _sha256(path)
+        paths[name] = path
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成基准测试用的合成 PDF 语料")
+    parser.add_argument('output_dir')
+    parser.add_argument('--pages', type=int, default=8, help="每个文档的页数")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    for name, path in build_corpus(args.output_dir, args.pages, args.seed).items():
+        print(f"{name:>10}: {path}  {_sha256(path)[:12]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,523 @@
+"""
+HTTP 转换服务 - 只依赖标准库，在本机或局域网内提供 PDF 转 Word
+上传 PDF 后进入有界的任务队列，用 Server-Sent Events 推送进度，完成后下载 .docx
+
+用法:
+    python conversion_service.py --port 8765 --workers 2 --max-queue 16
+
+接口:
+    POST   /jobs                 上传 PDF（请求体为文件内容），返回任务信息；队列满时返回 503
+           可选参数 ?use_ocr=auto|true|false&hybrid=1&incremental=0&filename=a.pdf
+    GET    /jobs/<id>            任务状态
+    GET    /jobs/<id>/events     进度事件流（text/event-stream，支持 Last-Event-ID 续传）
+    GET    /jobs/<id>/result     下载转换结果
+    DELETE /jobs/<id>            取消任务
+    GET    /health               服务状态和指标
+    GET    /metrics              各转换阶段耗时直方图（Prometheus 文本格式）
+
+示例:
+    curl --data-binary @a.pdf -H "Content-Type: application/pdf" http://127.0.0.1:8765/jobs
+    curl -N http://127.0.0.1:8765/jobs/<id>/events
+    curl -o a.docx http://127.0.0.1:8765/jobs/<id>/result
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, quote, urlsplit
+
+from async_converter import AsyncPDFToWordConverter
+from progress import PrometheusExporter
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+_FINISHED = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+_STATUS_MESSAGES = {JOB_DONE: "转换完成", JOB_FAILED: "转换失败", JOB_CANCELLED: "任务已取消"}
+
+# 上传时每次读取的字节数
+_CHUNK_SIZE = 1024 * 1024
+# 事件流没有新事件时发送心跳的间隔（秒）
+_KEEPALIVE_INTERVAL = 15.0
+# 队列满时建议客户端重试的间隔（秒）
+_RETRY_AFTER = 5
+# 计算耗时分位数时保留的最近任务数
+_TIMING_WINDOW = 200
+
+_JOB_PATH = re.compile(r'^/jobs/([0-9a-f]{32})(/events|/result)?$')
+
+
+class Job:
+    """一个转换任务：状态、进度事件和结果文件（各线程共享，用条件变量同步）"""
+    
+    def __init__(self, job_id: str, job_dir: str, filename: str, options: dict):
+        self.id = job_id
+        self.dir = job_dir
+        self.filename = filename
+        self.options = options
+        self.pdf_path = os.path.join(job_dir, 'input.pdf')
+        self.docx_path = os.path.join(job_dir, 'output.docx')
+        self.status = JOB_QUEUED
+        self.error = None
+        self.events = []
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.handle = None
+        self.cancel_requested = False
+        self.cond = threading.Condition()
+    
+    def add_event(self, event: dict):
+        """记录一个进度事件并唤醒等待的事件流"""
+        with self.cond:
+            if event['type'] == 'started':
+                self.status = JOB_RUNNING
+                self.started = time.time()
+            self.events.append(dict(event, job=self.id))
+            self.cond.notify_all()
+    
+    def finish(self, status: str, error: Optional[str] = None):
+        """标记任务结束（没有收到结束事件时补发一个）"""
+        with self.cond:
+            self.status = status
+            self.error = error
+            self.finished = time.time()
+            if not self.events or self.events[-1]['type'] not in _FINISHED:
+                self.events.append({'job': self.id, 'type': status,
+                                    'message': error or _STATUS_MESSAGES[status]})
+            self.cond.notify_all()
+    
+    def to_dict(self) -> dict:
+        with self.cond:
+            return {
+                'id': self.id,
+                'filename': self.filename,
+                'status': self.status,
+                'error': self.error,
+                'options': self.options,
+                'created': self.created,
+                'started': self.started,
+                'finished': self.finished,
+                'events': f'/jobs/{self.id}/events',
+                'result': f'/jobs/{self.id}/result',
+            }
+
+
+class ConversionService:
+    """任务队列 + HTTP 服务"""
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, workers: int = 2,
+                 max_queue: int = 16, work_dir: Optional[str] = None,
+                 max_upload_bytes: int = 200 * 1024 * 1024, keep_finished: int = 100,
+                 converter_options: Optional[dict] = None):
+        """
+        Args:
+            host: 监听地址（默认只接受本机连接）
+            port: 监听端口（0=自动分配，启动后见 self.port）
+            workers: 同时转换的任务数（转换进程数）
+            max_queue: 等待中的任务上限，超出时新的上传返回 503
+            work_dir: 上传文件和结果的存放目录（None=临时目录，关闭服务时删除）
+            max_upload_bytes: 单个上传文件的大小上限
+            keep_finished: 保留的已结束任务数，更早的任务及其文件被删除
+            converter_options: 传给 PDFToWordConverter 的参数
+        """
+        if workers < 1:
+            raise ValueError(f"workers 必须大于 0: {workers}")
+        if max_queue < 0:
+            raise ValueError(f"max_queue 不能小于 0: {max_queue}")
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_upload_bytes = max_upload_bytes
+        self.keep_finished = keep_finished
+        self._own_work_dir = work_dir is None
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='pdf2word_service_')
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.converter = AsyncPDFToWordConverter(converter_options, max_concurrency=workers,
+                                                 process_workers=workers)
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._counters = {'submitted': 0, 'rejected': 0, JOB_DONE: 0, JOB_FAILED: 0,
+                          JOB_CANCELLED: 0}
+        self._durations = deque(maxlen=_TIMING_WINDOW)
+        self._waits = deque(maxlen=_TIMING_WINDOW)
+        # 累计各转换阶段的耗时（来自工作进程的进度事件）
+        self.stage_metrics = PrometheusExporter()
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+    
+    # ---------- 任务队列 ----------
+    
+    def submit(self, job: Job):
+        """把已保存好输入文件的任务交给事件循环"""
+        asyncio.run_coroutine_threadsafe(self._run_job(job), self._loop)
+    
+    async def _run_job(self, job: Job):
+        """在事件循环中执行任务，转发进度事件"""
+        with job.cond:
+            # 检查取消标志和保存 handle 在同一把锁中完成：取消请求要么在此之前到达
+            # （不再开始转换），要么在此之后到达（cancel() 拿到 handle 取消任务）
+            if not job.cancel_requested:
+                job.handle = self.converter.start_conversion(job.pdf_path, job.docx_path,
+                                                             **job.options)
+            handle = job.handle
+        if handle is None:
+            self._finish(job, JOB_CANCELLED)
+            return
+        # 任务结束后迭代随即停止（见 ConversionJob.__anext__），不依赖结束事件
+        async for event in handle:
+            if event['type'] not in _FINISHED:
+                self.stage_metrics(event)
+                job.add_event(event)
+        try:
+            await handle
+        except asyncio.CancelledError:
+            self._finish(job, JOB_CANCELLED)
+        except Exception as e:
+            self._finish(job, JOB_FAILED, str(e))
+        else:
+            self._finish(job, JOB_DONE)
+    
+    def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        """记录结束状态和耗时，清理过多的已结束任务"""
+        job.finish(status, error)
+        with self._lock:
+            self._counters[status] += 1
+            if job.started is not None:
+                self._waits.append(job.started - job.created)
+                if status == JOB_DONE:
+                    self._durations.append(job.finished - job.started)
+            finished = [item for item in self.jobs.values() if item.status in _FINISHED]
+            expired = finished[:max(len(finished) - self.keep_finished, 0)]
+            for item in expired:
+                del self.jobs[item.id]
+        for item in expired:
+            shutil.rmtree(item.dir, ignore_errors=True)
+    
+    def cancel(self, job: Job) -> bool:
+        """取消任务（排队中的直接取消，执行中的在下一个进度点停止）"""
+        with job.cond:
+            if job.status in _FINISHED:
+                return False
+            job.cancel_requested = True
+            handle = job.handle
+        if handle is not None:
+            self._loop.call_soon_threadsafe(handle.cancel)
+        return True
+    
+    def metrics(self) -> dict:
+        """服务状态和指标"""
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+            durations = sorted(self._durations)
+            waits = sorted(self._waits)
+            counters = dict(self._counters)
+        uptime = time.time() - self._started_at
+        
+        def percentile(values, q):
+            return round(values[min(int(len(values) * q), len(values) - 1)], 3) if values else None
+        
+        queued = statuses.count(JOB_QUEUED)
+        running = statuses.count(JOB_RUNNING)
+        return {
+            'status': 'ok',
+            'uptime_seconds': round(uptime, 1),
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'queued': queued,
+            'running': running,
+            'accepting': queued + running < self.workers + self.max_queue,
+            'jobs_submitted': counters['submitted'],
+            'jobs_rejected': counters['rejected'],
+            'jobs_done': counters[JOB_DONE],
+            'jobs_failed': counters[JOB_FAILED],
+            'jobs_cancelled': counters[JOB_CANCELLED],
+            'jobs_per_minute': round(counters[JOB_DONE] / uptime * 60, 3) if uptime else 0.0,
+            'convert_seconds_p50': percentile(durations, 0.5),
+            'convert_seconds_p95': percentile(durations, 0.95),
+            'queue_wait_seconds_p50': percentile(waits, 0.5),
+            'queue_wait_seconds_p95': percentile(waits, 0.95),
+        }
+    
+    # ---------- 服务生命周期 ----------
+    
+    def start(self):
+        """在后台线程中启动服务"""
+        self._loop_thread.start()
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"转换服务已启动: http://{self.host}:{self.port}")
+    
+    def serve_forever(self):
+        """在当前线程中运行服务，直到 Ctrl+C"""
+        self._loop_thread.start()
+        print(f"转换服务已启动: http://{self.host}:{self.port}（Ctrl+C 停止）")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+    
+    def stop(self):
+        """停止接受请求，关闭转换进程池并清理临时目录"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.converter.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+        if self._own_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    # ---------- HTTP ----------
+    
+    def _handler_class(self):
+        service = self
+        
+        class Handler(_RequestHandler):
+            pass
+        Handler.service = service
+        return Handler
+
+
+def _parse_bool(value: str) -> Optional[bool]:
+    """解析查询参数中的布尔值（'auto' 返回 None）"""
+    value = value.lower()
+    if value in ('auto', ''):
+        return None
+    if value in ('1', 'true', 'yes', 'on'):
+        return True
+    if value in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(f"无效的参数值: {value}")
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """转换服务的请求处理"""
+    
+    service: ConversionService = None
+    server_version = 'PDFToWord/1.0'
+    
+    def log_message(self, format, *args):
+        # 只记录错误，正常请求不打印
+        pass
+    
+    def _send_json(self, status: int, data: dict, headers: Optional[dict] = None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_error(self, status: int, message: str, headers: Optional[dict] = None):
+        self._send_json(status, {'error': message}, headers)
+    
+    def _find_job(self):
+        """解析路径中的任务 ID，返回 (任务, 子路径)；不存在时已返回 404"""
+        match = _JOB_PATH.match(urlsplit(self.path).path)
+        if not match:
+            self._send_error(HTTPStatus.NOT_FOUND, "路径不存在")
+            return None, None
+        with self.service._lock:
+            job = self.service.jobs.get(match.group(1))
+        if job is None:
+            self._send_error(HTTPStatus.NOT_FOUND, "任务不存在")
+            return None, None
+        return job, match.group(2)
+    
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/health':
+            self._send_json(HTTPStatus.OK, self.service.metrics())
+            return
+        if path == '/metrics':
+            body = self.service.stage_metrics.render().encode('utf-8')
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        job, sub = self._find_job()
+        if job is None:
+            return
+        if sub == '/events':
+            self._stream_events(job)
+        elif sub == '/result':
+            self._send_result(job)
+        else:
+            self._send_json(HTTPStatus.OK, job.to_dict())
+    
+    def do_DELETE(self):
+        job, sub = self._find_job()
+        if job is None:
+            return
+        if sub:
+            self._send_error(HTTPStatus.METHOD_NOT_ALLOWED, "只能取消任务本身")
+            return
+        if not self.service.cancel(job):
+            self._send_error(HTTPStatus.CONFLICT, f"任务已结束: {job.status}")
+            return
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+    
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/jobs':
+            self._send_error(HTTPStatus.NOT_FOUND, "路径不存在")
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            options = {'use_ocr': _parse_bool(query.get('use_ocr', 'auto')),
+                       'hybrid': bool(_parse_bool(query.get('hybrid', '0'))),
+                       'incremental': bool(_parse_bool(query.get('incremental', '0')))}
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, f"请求参数错误: {e}")
+            return
+        if length > self.service.max_upload_bytes:
+            self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                             f"文件超过上限 {self.service.max_upload_bytes} 字节")
+            return
+        
+        service = self.service
+        # 准入控制：排队和执行中的任务达到上限时拒绝，不读取请求体
+        with service._lock:
+            active = sum(1 for job in service.jobs.values() if job.status not in _FINISHED)
+            if active >= service.workers + service.max_queue:
+                service._counters['rejected'] += 1
+                admitted = None
+            else:
+                job_id = uuid.uuid4().hex
+                filename = os.path.basename(query.get('filename', '')) or 'upload.pdf'
+                admitted = Job(job_id, os.path.join(service.work_dir, job_id), filename, options)
+                service.jobs[job_id] = admitted
+        if admitted is None:
+            self.close_connection = True
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "任务队列已满，请稍后重试",
+                             {'Retry-After': str(_RETRY_AFTER)})
+            return
+        
+        job = admitted
+        error = self._receive_upload(job, length)
+        if error:
+            with service._lock:
+                service.jobs.pop(job.id, None)
+            shutil.rmtree(job.dir, ignore_errors=True)
+            self._send_error(HTTPStatus.BAD_REQUEST, error)
+            return
+        with service._lock:
+            service._counters['submitted'] += 1
+        service.submit(job)
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict(),
+                        {'Location': f'/jobs/{job.id}'})
+    
+    def _receive_upload(self, job: Job, length: int) -> Optional[str]:
+        """把请求体分块写入任务目录，返回错误信息（成功时返回 None）"""
+        os.makedirs(job.dir)
+        remaining = length
+        with open(job.pdf_path, 'wb') as f:
+            while remaining > 0:
+                chunk = self.rfile.read(min(_CHUNK_SIZE, remaining))
+                if not chunk:
+                    return "上传不完整"
+                if remaining == length and not chunk.startswith(b'%PDF'):
+                    return "上传的不是 PDF 文件"
+                f.write(chunk)
+                remaining -= len(chunk)
+        return None if length else "请求体为空"
+    
+    def _stream_events(self, job: Job):
+        """以 Server-Sent Events 推送任务事件，任务结束后关闭连接"""
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            index = int(self.headers.get('Last-Event-ID', '-1')) + 1
+        except ValueError:
+            index = 0
+        try:
+            while True:
+                with job.cond:
+                    if index >= len(job.events):
+                        job.cond.wait(_KEEPALIVE_INTERVAL)
+                    events = job.events[index:]
+                if not events:
+                    self.wfile.write(b': keepalive\n\n')
+                    self.wfile.flush()
+                    continue
+                for event in events:
+                    data = json.dumps(event, ensure_ascii=False)
+                    self.wfile.write(f"id: {index}\nevent: {event['type']}\ndata: {data}\n\n"
+                                     .encode('utf-8'))
+                    index += 1
+                self.wfile.flush()
+                if events[-1]['type'] in _FINISHED:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端断开，任务继续执行
+            return
+    
+    def _send_result(self, job: Job):
+        """下载转换结果"""
+        with job.cond:
+            status = job.status
+        if status != JOB_DONE:
+            self._send_error(HTTPStatus.CONFLICT, f"任务尚未完成: {status}")
+            return
+        size = os.path.getsize(job.docx_path)
+        name = os.path.splitext(job.filename)[0] + '.docx'
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.'
+                                         'wordprocessingml.document')
+        self.send_header('Content-Length', str(size))
+        self.send_header('Content-Disposition',
+                         f"attachment; filename*=UTF-8''{quote(name, safe='')}")
+        self.end_headers()
+        with open(job.docx_path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile, _CHUNK_SIZE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 转 Word HTTP 服务")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址（0.0.0.0=允许其他机器访问）")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2, help="同时转换的任务数")
+    parser.add_argument('--max-queue', type=int, default=16, help="等待中的任务上限")
+    parser.add_argument('--work-dir', help="上传文件和结果的存放目录（默认临时目录）")
+    parser.add_argument('--ocr-lang', help="OCR 识别语言（如 chi_sim+eng 或 auto）")
+    parser.add_argument('--profile', action='store_true',
+                        help="按阶段采集性能数据，写入任务目录中的 output.profile（配合 --work-dir 保留）")
+    args = parser.parse_args()
+    
+    options = {}
+    if args.ocr_lang:
+        options['ocr_lang'] = args.ocr_lang
+    if args.profile:
+        options['profile'] = True
+    ConversionService(args.host, args.port, workers=args.workers, max_queue=args.max_queue,
+                      work_dir=args.work_dir, converter_options=options).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Word 文档会话 - 只解析一次 .docx，在内存中执行多次搜索和编辑，最后只保存一次
+段落文字也只提取一次，在各操作之间共用；PDFToWordConverter 的单次文档操作也使用这里的函数
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+from docx import Document
+
+from keyword_search import highlight_keywords, search_keywords
+from progress import ProgressReporter
+
+
+def paragraph_texts(doc) -> List[Tuple[object, str]]:
+    """
+    正文段落及其文字 [(段落, 文字), ...]
+
+    python-docx 每次读取 paragraph.text 都要遍历段落中的全部文字块，是文档
+    操作的主要开销；先算一次，在多个操作之间共用。
+    """
+    return [(para, para.text) for para in doc.paragraphs]
+
+
+def search_paragraphs(paragraphs: List[Tuple[object, str]],
+                      keyword: str) -> List[Tuple[int, str]]:
+    """不区分大小写搜索段落（paragraph_texts 的结果），返回 [(段落索引, 段落内容), ...]"""
+    keyword = keyword.lower()
+    return [(idx, text) for idx, (_, text) in enumerate(paragraphs)
+            if keyword in text.lower()]
+
+
+def _replace_in_runs(para, old_text: str, new_text: str) -> int:
+    count = 0
+    for run in para.runs:
+        if old_text in run.text:
+            run.text = run.text.replace(old_text, new_text)
+            count += 1
+    return count
+
+
+def replace_in_document(doc, paragraphs: List[Tuple[object, str]], old_text: str,
+                        new_text: str) -> int:
+    """
+    替换正文段落和表格中的文本，返回替换的文字块数
+
+    paragraphs 为 paragraph_texts 的结果，其中被修改的段落的文字随之更新。
+    """
+    count = 0
+    for index, (para, text) in enumerate(paragraphs):
+        if old_text in text:
+            replaced = _replace_in_runs(para, old_text, new_text)
+            if replaced:
+                count += replaced
+                paragraphs[index] = (para, para.text)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                if old_text in cell.text:
+                    for para in cell.paragraphs:
+                        count += _replace_in_runs(para, old_text, new_text)
+    return count
+
+
+def document_info(doc, paragraphs: List[Tuple[object, str]]) -> dict:
+    """段落数、表格数和总字符数"""
+    return {
+        '段落数': len(paragraphs),
+        '表格数': len(doc.tables),
+        '总字符数': sum(len(text) for _, text in paragraphs),
+    }
+
+
+class DocumentSession:
+    """
+    打开一个 Word 文档，在内存中依次执行多个操作，最后保存一次
+
+    用法:
+        with converter.document_session('output.docx') as session:
+            results = session.search_keyword('合同')
+            session.highlight_keyword('合同')
+            session.replace_text('甲方', '某某公司')
+            session.add_text('（已审阅）')
+            info = session.get_document_info()
+        # 离开 with 时有修改才保存；块内出错时不保存，原文件保持不变
+
+    直接修改 session.document 后需调用 refresh()，重新提取段落文字。
+    """
+
+    def __init__(self, word_path: str, output_path: Optional[str] = None,
+                 progress: Optional[ProgressReporter] = None):
+        """
+        Args:
+            word_path: Word 文件路径
+            output_path: 保存路径（None=覆盖原文件）
+            progress: 保存等状态信息发布到的进度发布者（None=不输出）
+        """
+        if not os.path.exists(word_path):
+            raise FileNotFoundError(f"Word 文件不存在: {word_path}")
+        self.word_path = word_path
+        self.output_path = output_path or word_path
+        self.progress = progress
+        self.document = Document(word_path)
+        # 段落文字只计算一次，修改时同步更新
+        self._paragraphs = paragraph_texts(self.document)
+        # 尚未保存的修改 [(操作, 说明), ...]
+        self.changes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None and self.changes:
+            self.save()
+
+    @property
+    def modified(self) -> bool:
+        """是否有尚未保存的修改"""
+        return bool(self.changes)
+
+    def refresh(self):
+        """重新提取段落文字（直接修改 self.document 之后调用）"""
+        self._paragraphs = paragraph_texts(self.document)
+
+    def search_keyword(self, keyword: str) -> List[Tuple[int, str]]:
+        """同 PDFToWordConverter.search_keyword（包含本会话中已做的修改）"""
+        return search_paragraphs(self._paragraphs, keyword)
+
+    def search_keywords(self, keywords: List[str]) -> Dict[str, List[dict]]:
+        """同 PDFToWordConverter.search_keywords（包含本会话中已做的修改）"""
+        return search_keywords(self.document, keywords)
+
+    def highlight_keyword(self, keyword: str) -> int:
+        """高亮关键词，返回高亮的出现次数"""
+        return self.highlight_keywords([keyword])[keyword]
+
+    def highlight_keywords(self, keywords: List[str]) -> Dict[str, int]:
+        """一次高亮多个关键词，返回 {关键词: 高亮的出现次数}（拆分文字块不改变段落文字）"""
+        counts = highlight_keywords(self.document, keywords)
+        self.changes.append(('highlight', ', '.join(counts)))
+        return counts
+
+    def replace_text(self, old_text: str, new_text: str) -> int:
+        """替换文本，返回替换的文字块数"""
+        count = replace_in_document(self.document, self._paragraphs, old_text, new_text)
+        self.changes.append(('replace', f"{old_text} → {new_text}"))
+        return count
+
+    def add_text(self, text: str):
+        """在文档末尾添加一个段落"""
+        para = self.document.add_paragraph(text)
+        self._paragraphs.append((para, para.text))
+        self.changes.append(('add', text))
+
+    def get_document_info(self) -> dict:
+        """同 PDFToWordConverter.get_document_info"""
+        return document_info(self.document, self._paragraphs)
+
+    def save(self, output_path: Optional[str] = None) -> str:
+        """
+        保存文档（with 块正常结束时自动调用）
+
+        Args:
+            output_path: 保存路径（None=创建会话时指定的路径）
+
+        Returns:
+            保存的文件路径
+        """
+        output_path = output_path or self.output_path
+        self.document.save(output_path)
+        if self.progress is not None:
+            self.progress.message(f"已保存 {len(self.changes)} 项修改: {output_path}")
+        self.changes = []
+        return output_path
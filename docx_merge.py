@@ -0,0 +1,280 @@
+"""
+Word 文档合并 - 按顺序拼接多个 .docx，保留各部分的样式、图片和分节设置
+"""
+import copy
+import re
+from io import BytesIO
+from typing import List, Tuple
+
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+# 引用关系 ID 的属性（图片、超链接、页眉页脚等）
+_REL_ATTRS = (qn('r:id'), qn('r:embed'), qn('r:link'))
+
+# 增量转换时标记每页开头的书签（以下划线开头的书签在 Word 中隐藏）
+PAGE_BOOKMARK_PREFIX = '_PdfPage'
+# 页面书签的 ID 起始值，避开文档自身的书签
+_PAGE_BOOKMARK_ID = 1 << 20
+
+
+def _merge_styles(target, source):
+    """把 source 中有而 target 中没有的样式复制过去"""
+    target_styles = target.styles.element
+    existing = {style.get(qn('w:styleId')) for style in target_styles.iterfind(qn('w:style'))}
+    for style in source.styles.element.iterfind(qn('w:style')):
+        if style.get(qn('w:styleId')) not in existing:
+            target_styles.append(copy.deepcopy(style))
+
+
+def _relink(element, source_part, target_part, rel_map: dict):
+    """把复制过来的元素中的关系 ID 重新指向 target 中的部件"""
+    package = target_part.package
+    for node in element.iter():
+        for attr in _REL_ATTRS:
+            r_id = node.get(attr)
+            if not r_id or r_id not in source_part.rels:
+                continue
+            if r_id not in rel_map:
+                rel = source_part.rels[r_id]
+                if rel.is_external:
+                    rel_map[r_id] = target_part.relate_to(rel.target_ref, rel.reltype,
+                                                          is_external=True)
+                elif rel.reltype == RT.IMAGE:
+                    # 图片按内容去重
+                    rel_map[r_id], _ = target_part.get_or_add_image(
+                        BytesIO(rel.target_part.blob))
+                else:
+                    part = rel.target_part
+                    names = {p.partname for p in package.iter_parts()}
+                    if part.partname in names:
+                        template = re.sub(r'\d*(\.\w+)$', r'%d\1', part.partname)
+                        part.partname = package.next_partname(template)
+                    rel_map[r_id] = target_part.relate_to(part, rel.reltype)
+            node.set(attr, rel_map[r_id])
+
+
+def append_document(target, source):
+    """
+    把 source 文档的正文追加到 target 末尾
+    
+    source 的内容作为新的一节接在 target 之后（分节即分页），两边各自的
+    页面设置保持不变；缺失的样式、图片和超链接一并复制。
+    
+    Args:
+        target: 目标 Document（原地修改）
+        source: 要追加的 Document
+    """
+    _merge_styles(target, source)
+    
+    target_body = target.element.body
+    source_body = source.element.body
+    target_sect = target_body.find(qn('w:sectPr'))
+    if target_sect is None:
+        target_sect = OxmlElement('w:sectPr')
+        target_body.append(target_sect)
+    
+    # target 已有内容时，把它末尾的节属性移到一个分节段落中，结束当前节
+    if len(target_body) > 1:
+        para = OxmlElement('w:p')
+        p_pr = OxmlElement('w:pPr')
+        p_pr.append(copy.deepcopy(target_sect))
+        para.append(p_pr)
+        target_sect.addprevious(para)
+    
+    rel_map = {}
+    for child in source_body:
+        if child.tag == qn('w:sectPr'):
+            continue
+        element = copy.deepcopy(child)
+        _relink(element, source.part, target.part, rel_map)
+        target_sect.addprevious(element)
+    
+    # 最后一节使用 source 的页面设置
+    source_sect = source_body.find(qn('w:sectPr'))
+    if source_sect is not None:
+        new_sect = copy.deepcopy(source_sect)
+        _relink(new_sect, source.part, target.part, rel_map)
+        target_sect.addprevious(new_sect)
+        target_body.remove(target_sect)
+
+
+def _section_break(sect_pr):
+    """生成一个携带 sect_pr 的分节段落"""
+    para = OxmlElement('w:p')
+    p_pr = OxmlElement('w:pPr')
+    p_pr.append(sect_pr)
+    para.append(p_pr)
+    return para
+
+
+def _is_page_break(element) -> bool:
+    """是否为只包含分页符的段落（Document.add_page_break 生成）"""
+    if element.tag != qn('w:p') or element.xpath('string(.)'):
+        return False
+    return bool(element.xpath('.//w:br[@w:type="page"]'))
+
+
+def _page_bookmark_name(element):
+    """页面书签的名称，不是页面书签时返回 None"""
+    if element.tag != qn('w:bookmarkStart'):
+        return None
+    name = element.get(qn('w:name'), '')
+    return name if name.startswith(PAGE_BOOKMARK_PREFIX) else None
+
+
+def document_pages(doc, split_page_breaks: bool = False) -> List[list]:
+    """
+    把文档正文拆分为逐页的片段
+    
+    每个片段是一页的正文元素列表，以携带该页节属性的分节段落结尾，可以
+    直接交给 assemble_pages 拼接。文档中有页面书签（assemble_pages 生成）
+    时按书签拆分；split_page_breaks=True 时按分页符段落拆分（OCR 生成的
+    文档）；否则整个文档作为一页。
+    
+    Args:
+        doc: Document（按书签拆分时返回的是文档中原有的元素，不复制）
+        split_page_breaks: 没有页面书签时是否按分页符拆分
+        
+    Returns:
+        [[元素, ...], ...]，按页顺序
+    """
+    body = doc.element.body
+    body_sect = body.find(qn('w:sectPr'))
+    children = [child for child in body if child is not body_sect]
+    
+    if any(_page_bookmark_name(child) for child in children):
+        if not _page_bookmark_name(children[0]):
+            raise ValueError("文档开头缺少页面书签")
+        pages = []
+        for child in children:
+            if _page_bookmark_name(child):
+                pages.append([])
+                bookmark_id = child.get(qn('w:id'))
+            elif child.tag == qn('w:bookmarkEnd') and child.get(qn('w:id')) == bookmark_id:
+                continue
+            else:
+                pages[-1].append(child)
+        pages[-1].append(_section_break(copy.deepcopy(body_sect)))
+        return pages
+    
+    if split_page_breaks:
+        pages = [[]]
+        for child in children:
+            if _is_page_break(child):
+                pages.append([])
+            else:
+                pages[-1].append(child)
+        for page in pages:
+            page.append(_section_break(copy.deepcopy(body_sect)))
+        return pages
+    
+    return [children + [_section_break(copy.deepcopy(body_sect))]]
+
+
+def paragraph_pages(doc) -> List[int]:
+    """
+    正文每个段落（与 doc.paragraphs 一一对应）所在的PDF页码
+    
+    文档中有页面书签时按书签的页码；否则按分节段落（pdf2docx 每页一节）
+    和分页符段落（OCR 生成的文档）依次计数，分隔段落本身算作前一页。
+    
+    Args:
+        doc: Document
+    
+    Returns:
+        [页码, ...]，页码从1开始
+    """
+    body = doc.element.body
+    bookmarks = any(_page_bookmark_name(child) for child in body)
+    pages = []
+    page = 1
+    for child in body:
+        if bookmarks:
+            name = _page_bookmark_name(child)
+            if name:
+                page = int(name[len(PAGE_BOOKMARK_PREFIX):])
+        if child.tag != qn('w:p'):
+            continue
+        pages.append(page)
+        if not bookmarks and (child.find(qn('w:pPr') + '/' + qn('w:sectPr')) is not None
+                              or _is_page_break(child)):
+            page += 1
+    return pages
+
+
+def _drop_unused_images(doc):
+    """删除正文中已不再引用的图片和超链接关系（保存时不再写入对应部件）"""
+    part = doc.part
+    used = {node.get(attr) for node in part.element.iter() for attr in _REL_ATTRS}
+    for r_id, rel in list(part.rels.items()):
+        if rel.reltype in (RT.IMAGE, RT.HYPERLINK) and r_id not in used:
+            part.drop_rel(r_id)
+
+
+def assemble_pages(target, pages: List[Tuple[object, list]]):
+    """
+    用逐页片段重建 target 的正文，并在每页开头插入页面书签
+    
+    来自 target 自身的片段直接移动；来自其他文档的片段会被复制，并合并
+    样式、重新关联图片等部件。不再被引用的图片在保存时丢弃。
+    
+    Args:
+        target: 目标 Document（原地修改，原有正文被替换）
+        pages: [(片段所在的 Document, document_pages 返回的片段), ...]，按页顺序
+    """
+    if not pages:
+        raise ValueError("没有要拼接的页面")
+    body = target.element.body
+    for child in list(body):
+        body.remove(child)
+    
+    rel_maps = {}
+    for number, (source, elements) in enumerate(pages, 1):
+        bookmark_id = str(_PAGE_BOOKMARK_ID + number)
+        start = OxmlElement('w:bookmarkStart')
+        start.set(qn('w:id'), bookmark_id)
+        start.set(qn('w:name'), f'{PAGE_BOOKMARK_PREFIX}{number}')
+        end = OxmlElement('w:bookmarkEnd')
+        end.set(qn('w:id'), bookmark_id)
+        body.append(start)
+        body.append(end)
+        
+        if source is target:
+            body.extend(elements)
+            continue
+        if id(source) not in rel_maps:
+            _merge_styles(target, source)
+            rel_maps[id(source)] = {}
+        for child in elements:
+            element = copy.deepcopy(child)
+            _relink(element, source.part, target.part, rel_maps[id(source)])
+            body.append(element)
+    
+    # 最后一页的分节段落还原为正文末尾的节属性
+    last = body[-1]
+    body.remove(last)
+    body.append(last.find(qn('w:pPr')).find(qn('w:sectPr')))
+    _drop_unused_images(target)
+
+
+def merge_documents(paths: List[str], output_path: str) -> str:
+    """
+    按顺序合并多个 Word 文档
+    
+    Args:
+        paths: 要合并的 .docx 文件路径列表（至少一个）
+        output_path: 输出文件路径
+        
+    Returns:
+        输出文件路径
+    """
+    if not paths:
+        raise ValueError("没有要合并的文档")
+    merged = Document(paths[0])
+    for path in paths[1:]:
+        append_document(merged, Document(path))
+    merged.save(output_path)
+    return output_path
@@ -0,0 +1,305 @@
+"""
+Word 文档流式读取 - 只读操作（搜索、文档信息）直接从压缩包中增量解析正文 XML
+不构建 python-docx 对象模型，处理完的元素随即丢弃，内存占用与文档大小无关；
+段落文字的提取规则与 python-docx 的 paragraph.text 完全相同
+
+文本容器的遍历（正文段落、文本框、内容控件、表格、页眉页脚、脚注和尾注）也在
+这里定义，python-docx 文档上的搜索、高亮和检索索引使用同一套遍历规则
+"""
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Iterable, Iterator, List, Tuple
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import nsmap, qn
+from lxml import etree
+
+_W_BODY = qn('w:body')
+_W_P = qn('w:p')
+_W_TBL = qn('w:tbl')
+_W_SDT = qn('w:sdt')
+_W_SECT_PR = qn('w:sectPr')
+_W_ID = qn('w:id')
+_R_ID = qn('r:id')
+_W_R = qn('w:r')
+_W_HYPERLINK = qn('w:hyperlink')
+_W_BR = qn('w:br')
+_W_TYPE = qn('w:type')
+# 文字块中各元素对应的文字（同 python-docx 各元素的 __str__；w:t 和 w:br 见 run_child_text）
+_RUN_TEXT = {
+    qn('w:tab'): '\t',
+    qn('w:ptab'): '\t',
+    qn('w:cr'): '\n',
+    qn('w:noBreakHyphen'): '-',
+}
+_W_T = qn('w:t')
+_BODY_KINDS = {_W_P: 'paragraph', _W_TBL: 'table', _W_SDT: 'sdt', _W_SECT_PR: 'sectPr'}
+_PACKAGE_RELS = '_rels/.rels'
+_MC_NS = 'http://schemas.openxmlformats.org/markup-compatibility/2006'
+_NAMESPACES = dict(nsmap, mc=_MC_NS)
+
+# 文本容器中的段落；mc:Fallback 是同一内容（如文本框）供旧版 Word 使用的副本，不重复计入
+_PARAGRAPHS = etree.XPath('.//w:p[not(ancestor::mc:Fallback)]', namespaces=_NAMESPACES)
+# 段落中的文本框（嵌套的文本框随外层文本框一起处理）
+_TEXT_BOXES = etree.XPath('.//w:txbxContent[not(ancestor::mc:Fallback)]'
+                          '[not(ancestor::w:txbxContent)]', namespaces=_NAMESPACES)
+# 表格的行和行中的单元格（包括行、单元格级内容控件中的）
+_ROWS = etree.XPath('./w:tr | ./w:sdt/w:sdtContent/w:tr', namespaces=_NAMESPACES)
+_CELLS = etree.XPath('./w:tc | ./w:sdt/w:sdtContent/w:tc', namespaces=_NAMESPACES)
+# 段落中的分节属性
+_PARAGRAPH_SECT_PR = etree.XPath('./w:pPr/w:sectPr', namespaces=_NAMESPACES)
+
+# 每节的页眉页脚：(位置, XML 中的 w:type, 类型)，顺序同 keyword_search.header_footer_elements
+HEADER_FOOTER_TYPES = (
+    ('header', 'default', 'default'),
+    ('header', 'first', 'first_page'),
+    ('header', 'even', 'even_page'),
+    ('footer', 'default', 'default'),
+    ('footer', 'first', 'first_page'),
+    ('footer', 'even', 'even_page'),
+)
+# 脚注和尾注部件：(位置, 关系类型)
+NOTE_PARTS = (('footnote', RT.FOOTNOTES), ('endnote', RT.ENDNOTES))
+_RELS_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_DEFAULT_MAIN_PART = 'word/document.xml'
+
+
+def _main_part_name(archive: zipfile.ZipFile) -> str:
+    """正文部件在压缩包中的名称（按包关系查找，与 python-docx 一致）"""
+    try:
+        rels = ET.fromstring(archive.read(_PACKAGE_RELS))
+    except KeyError:
+        return _DEFAULT_MAIN_PART
+    for rel in rels.iter(f'{_RELS_NS}Relationship'):
+        if rel.get('Type') == RT.OFFICE_DOCUMENT and rel.get('TargetMode') != 'External':
+            return posixpath.normpath(posixpath.join('/', rel.get('Target'))).lstrip('/')
+    return _DEFAULT_MAIN_PART
+
+
+def run_child_text(child) -> str:
+    """文字块中一个子元素对应的文字（w:t 为其文字，制表符和换行类元素为对应字符，其他为空）"""
+    tag = child.tag
+    if tag == _W_T:
+        return child.text or ''
+    if tag == _W_BR:
+        return '\n' if child.get(_W_TYPE, 'textWrapping') == 'textWrapping' else ''
+    return _RUN_TEXT.get(tag, '')
+
+
+def paragraph_text(para) -> str:
+    """段落元素的文字：直属的文字块和超链接中的文字块（同 python-docx 的 paragraph.text）"""
+    parts = []
+    for child in para:
+        if child.tag == _W_R:
+            parts.extend(map(run_child_text, child))
+        elif child.tag == _W_HYPERLINK:
+            for run in child.iterchildren(_W_R):
+                parts.extend(map(run_child_text, run))
+    return ''.join(parts)
+
+
+def body_paragraphs(children: Iterable) -> Iterator[Tuple[dict, object]]:
+    """
+    正文中全部文本容器的段落，按文档顺序
+    
+    位置为字典：
+        正文段落 {'part': 'body', 'paragraph': 索引（与 doc.paragraphs 一致）}
+        文本框   {'part': 'textbox', 'textbox': 序号, 'paragraph'}（紧跟在所在段落之后）
+        表格     {'part': 'table', 'table': 索引（与 doc.tables 一致）, 'row', 'cell', 'paragraph'}
+        内容控件 {'part': 'sdt', 'sdt': 序号, 'paragraph'}
+    表格和内容控件中的文本框、嵌套表格计入所在的单元格或内容控件。
+    
+    Args:
+        children: w:body 的子元素（可以是 iter_body 流式产出的）
+    
+    Returns:
+        依次产出 (位置, 段落元素)
+    """
+    paragraph = table = sdt = textbox = 0
+    for child in children:
+        if child.tag == _W_P:
+            yield {'part': 'body', 'paragraph': paragraph}, child
+            paragraph += 1
+            for box in _TEXT_BOXES(child):
+                for index, para in enumerate(_PARAGRAPHS(box)):
+                    yield {'part': 'textbox', 'textbox': textbox, 'paragraph': index}, para
+                textbox += 1
+        elif child.tag == _W_TBL:
+            for row_index, row in enumerate(_ROWS(child)):
+                for cell_index, cell in enumerate(_CELLS(row)):
+                    for index, para in enumerate(_PARAGRAPHS(cell)):
+                        yield ({'part': 'table', 'table': table, 'row': row_index,
+                                'cell': cell_index, 'paragraph': index}, para)
+            table += 1
+        elif child.tag == _W_SDT:
+            for index, para in enumerate(_PARAGRAPHS(child)):
+                yield {'part': 'sdt', 'sdt': sdt, 'paragraph': index}, para
+            sdt += 1
+
+
+def part_paragraphs(root, location: dict) -> Iterator[Tuple[dict, object]]:
+    """页眉或页脚中的段落（包括其中的表格和文本框），位置为 location 加上 'paragraph'"""
+    for index, para in enumerate(_PARAGRAPHS(root)):
+        yield dict(location, paragraph=index), para
+
+
+def note_paragraphs(root, part: str) -> Iterator[Tuple[dict, object]]:
+    """
+    脚注或尾注部件中的段落（跳过分隔符等特殊注释）
+    
+    Returns:
+        依次产出 ({'part': 'footnote'/'endnote', 'note': 注释 ID, 'paragraph'}, 段落元素)
+    """
+    for note in root:
+        if note.get(_W_TYPE, 'normal') != 'normal':
+            continue
+        note_id = int(note.get(_W_ID))
+        for index, para in enumerate(_PARAGRAPHS(note)):
+            yield {'part': part, 'note': note_id, 'paragraph': index}, para
+
+
+def _iter_body_elements(source) -> Iterator[Tuple[str, object]]:
+    """从正文部件的字节流中依次产出 w:body 的子元素（见 iter_body）"""
+    # 与 python-docx 使用相同的解析参数，空白文字的处理方式一致
+    events = etree.iterparse(source, events=('end',), tag=(_W_P, _W_TBL, _W_SDT, _W_SECT_PR),
+                             remove_blank_text=True, resolve_entities=False)
+    for _, element in events:
+        parent = element.getparent()
+        if parent is None or parent.tag != _W_BODY:
+            # 表格、内容控件、文本框中的段落和段落中的分节属性，随外层元素一起处理
+            continue
+        yield _BODY_KINDS[element.tag], element
+        # 丢弃已处理的元素及其之前的兄弟元素（书签等），正文只保留当前位置之后的部分
+        element.clear()
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def iter_body(word_path: str) -> Iterator[Tuple[str, object]]:
+    """
+    按顺序产出正文中的段落、表格、内容控件和末尾的分节属性（只包括 w:body 的直接子元素）
+    
+    产出的元素在下一次迭代时被清空，需要的数据要在此之前取出。
+    
+    Args:
+        word_path: Word 文件路径
+    
+    Returns:
+        依次产出 ('paragraph'/'table'/'sdt'/'sectPr', 元素)
+    """
+    with zipfile.ZipFile(word_path) as archive:
+        with archive.open(_main_part_name(archive)) as source:
+            yield from _iter_body_elements(source)
+
+
+def _part_targets(archive: zipfile.ZipFile, part_name: str) -> dict:
+    """部件的内部关系 {关系 ID: (关系类型, 目标部件名称)}"""
+    directory, name = posixpath.split(part_name)
+    try:
+        rels = ET.fromstring(archive.read(posixpath.join(directory, '_rels', name + '.rels')))
+    except KeyError:
+        return {}
+    return {rel.get('Id'): (rel.get('Type'), posixpath.normpath(
+                posixpath.join('/', directory, rel.get('Target'))).lstrip('/'))
+            for rel in rels.iter(f'{_RELS_NS}Relationship')
+            if rel.get('TargetMode') != 'External'}
+
+
+def _header_footer_refs(sect_pr) -> List[Tuple[str, str, str]]:
+    """一节自己定义的页眉页脚 [(位置, 类型, 关系 ID), ...]，按 HEADER_FOOTER_TYPES 的顺序"""
+    refs = []
+    for part, xml_type, kind in HEADER_FOOTER_TYPES:
+        for ref in sect_pr.iterchildren(qn(f'w:{part}Reference')):
+            if ref.get(_W_TYPE) == xml_type:
+                refs.append((part, kind, ref.get(_R_ID)))
+                break
+    return refs
+
+
+def _parse_part(archive: zipfile.ZipFile, part_name: str):
+    return etree.fromstring(archive.read(part_name), etree.XMLParser(
+        remove_blank_text=True, resolve_entities=False))
+
+
+def stream_text_paragraphs(word_path: str) -> Iterator[Tuple[dict, object]]:
+    """
+    流式产出文档全部文本容器的段落：正文（见 body_paragraphs）、各节的页眉和页脚、
+    脚注和尾注，顺序和位置与 keyword_search.text_paragraphs 相同
+    
+    Args:
+        word_path: Word 文件路径
+    
+    Returns:
+        依次产出 (位置, 段落元素)，正文中的段落元素在下一次迭代时被清空
+    """
+    with zipfile.ZipFile(word_path) as archive:
+        main = _main_part_name(archive)
+        targets = _part_targets(archive, main)
+        sections = []
+        
+        def children(source):
+            for kind, element in _iter_body_elements(source):
+                if kind == 'sectPr':
+                    sections.append(_header_footer_refs(element))
+                    continue
+                if kind == 'paragraph':
+                    for sect_pr in _PARAGRAPH_SECT_PR(element):
+                        sections.append(_header_footer_refs(sect_pr))
+                yield element
+        
+        with archive.open(main) as source:
+            yield from body_paragraphs(children(source))
+        
+        # 没有自己定义的页眉页脚沿用前一节的，与前一节共用的只产出一次
+        seen = set()
+        for section_index, refs in enumerate(sections):
+            for part, kind, r_id in refs:
+                name = targets.get(r_id, (None, None))[1]
+                if name is None or name in seen:
+                    continue
+                seen.add(name)
+                yield from part_paragraphs(_parse_part(archive, name),
+                                           {'part': part, 'section': section_index,
+                                            'kind': kind})
+        
+        for part, reltype in NOTE_PARTS:
+            for rel_type, name in targets.values():
+                if rel_type == reltype:
+                    yield from note_paragraphs(_parse_part(archive, name), part)
+
+
+def iter_paragraphs(word_path: str) -> Iterator[Tuple[int, str]]:
+    """
+    流式读取正文段落
+    
+    Args:
+        word_path: Word 文件路径
+    
+    Returns:
+        依次产出 (段落索引, 段落文字)，与 enumerate(doc.paragraphs) 一致
+    """
+    index = 0
+    for kind, element in iter_body(word_path):
+        if kind == 'paragraph':
+            yield index, paragraph_text(element)
+            index += 1
+
+
+def stream_search(word_path: str, keyword: str) -> List[Tuple[int, str]]:
+    """不区分大小写搜索正文段落，返回 [(段落索引, 段落内容), ...]（同 search_keyword）"""
+    keyword = keyword.lower()
+    return [(index, text) for index, text in iter_paragraphs(word_path)
+            if keyword in text.lower()]
+
+
+def stream_document_info(word_path: str) -> dict:
+    """段落数、表格数和总字符数（同 PDFToWordConverter.get_document_info）"""
+    paragraphs = tables = chars = 0
+    for kind, element in iter_body(word_path):
+        if kind == 'paragraph':
+            paragraphs += 1
+            chars += len(paragraph_text(element))
+        elif kind == 'table':
+            tables += 1
+    return {'段落数': paragraphs, '表格数': tables, '总字符数': chars}
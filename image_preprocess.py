@@ -0,0 +1,231 @@
+"""
+OCR 前的页面图片预处理 - 灰度化、自适应二值化、纠偏和裁剪页边距（基于 NumPy）
+"""
+import time
+
+import numpy as np
+from PIL import Image
+
+
+class ImagePreprocessor:
+    """可配置的页面预处理流水线，各步骤可单独开关"""
+    
+    def __init__(self, grayscale: bool = True, binarize: bool = True, deskew: bool = True,
+                 crop_margins: bool = True, block_size: int = 41, offset: int = 12,
+                 max_skew: float = 5.0, skew_step: float = 0.25, margin_padding: int = 10):
+        """
+        Args:
+            grayscale: 转为8位灰度图（grayscale 和 binarize 都关闭时，纠偏和裁剪
+                       按灰度图检测，作用在原彩色图片上）
+            binarize: 自适应二值化（局部均值阈值，能处理阴影和不均匀光照）
+            deskew: 检测并纠正页面倾斜
+            crop_margins: 裁掉没有内容的页边距
+            block_size: 二值化的局部窗口边长（像素）
+            offset: 二值化阈值相对局部均值的偏移（越大越少像素被判为文字）
+            max_skew: 纠偏时搜索的最大角度（度）
+            skew_step: 纠偏时的角度步长（度）
+            margin_padding: 裁剪后保留的边距（像素）
+        """
+        if block_size < 3:
+            raise ValueError(f"block_size 必须不小于 3: {block_size}")
+        self.grayscale = grayscale
+        self.binarize = binarize
+        self.deskew = deskew
+        self.crop_margins = crop_margins
+        self.block_size = block_size
+        self.offset = offset
+        self.max_skew = max_skew
+        self.skew_step = skew_step
+        self.margin_padding = margin_padding
+        # 各步骤累计耗时（秒）
+        self.timings = {}
+    
+    def __repr__(self):
+        # 用作 OCR 缓存键的一部分，需包含所有影响输出的参数
+        return (f"ImagePreprocessor(grayscale={self.grayscale}, binarize={self.binarize}, "
+                f"deskew={self.deskew}, crop_margins={self.crop_margins}, "
+                f"block_size={self.block_size}, offset={self.offset}, "
+                f"max_skew={self.max_skew}, skew_step={self.skew_step}, "
+                f"margin_padding={self.margin_padding})")
+    
+    def __call__(self, image: Image.Image) -> Image.Image:
+        """
+        按配置依次处理一页图片
+        
+        Args:
+            image: PIL 页面图片
+            
+        Returns:
+            处理后的 PIL 图片
+        """
+        if not (self.grayscale or self.binarize or self.deskew or self.crop_margins):
+            return image
+        
+        # 只纠偏/裁剪时保留彩色：在灰度图上检测角度和内容范围，再作用到原图上
+        keep_colour = not self.grayscale and not self.binarize and image.mode != 'L'
+        if keep_colour and image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        
+        with self._timed('grayscale'):
+            # 检测都在单通道上进行
+            pixels = np.asarray(image.convert('L'))
+        
+        if self.binarize:
+            with self._timed('binarize'):
+                pixels = adaptive_threshold(pixels, self.block_size, self.offset)
+        
+        if self.deskew:
+            with self._timed('deskew'):
+                angle = estimate_skew(self._ink(pixels), self.max_skew, self.skew_step)
+                if angle:
+                    rotated = Image.fromarray(pixels).rotate(
+                        angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+                    pixels = np.asarray(rotated)
+                    if keep_colour:
+                        image = image.rotate(angle, resample=Image.BILINEAR, expand=True,
+                                             fillcolor=(255,) * len(image.mode))
+        
+        if self.crop_margins:
+            with self._timed('crop_margins'):
+                box = content_box(self._ink(pixels), self.margin_padding)
+                if box is not None:
+                    top, bottom, left, right = box
+                    pixels = pixels[top:bottom, left:right]
+                    if keep_colour:
+                        image = image.crop((left, top, right, bottom))
+        
+        if keep_colour:
+            return image
+        return Image.fromarray(pixels)
+    
+    def _ink(self, pixels: np.ndarray) -> np.ndarray:
+        """文字（深色）像素掩码"""
+        if self.binarize:
+            return pixels < 128
+        return pixels < pixels.mean() - pixels.std() / 2
+    
+    def _timed(self, step: str):
+        return _StepTimer(self.timings, step)
+
+
+class _StepTimer:
+    """把 with 块的耗时累加到 timings[step]"""
+    
+    def __init__(self, timings: dict, step: str):
+        self.timings = timings
+        self.step = step
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+    
+    def __exit__(self, *exc):
+        self.timings[self.step] = (self.timings.get(self.step, 0.0)
+                                   + time.perf_counter() - self.start)
+
+
+def adaptive_threshold(gray: np.ndarray, block_size: int, offset: int) -> np.ndarray:
+    """
+    局部均值自适应二值化
+    
+    用积分图在 O(1) 时间内求每个像素周围 block_size×block_size 窗口的均值，
+    比均值低 offset 以上的像素判为文字（0），其余为背景（255）。
+    
+    Args:
+        gray: 8位灰度图数组
+        block_size: 局部窗口边长
+        offset: 阈值偏移
+        
+    Returns:
+        二值化后的 uint8 数组（0 或 255）
+    """
+    half = block_size // 2
+    padded = np.pad(gray.astype(np.int64), half + 1, mode='edge')
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    
+    height, width = gray.shape
+    # 以像素为中心的窗口和 = 积分图四个角相减（切片运算，无逐像素循环）
+    k = 2 * half + 1
+    window_sum = (integral[k:k + height, k:k + width] - integral[:height, k:k + width]
+                  - integral[k:k + height, :width] + integral[:height, :width])
+    mean = window_sum / k ** 2
+    
+    return np.where(gray < mean - offset, 0, 255).astype(np.uint8)
+
+
+def estimate_skew(ink: np.ndarray, max_angle: float, step: float,
+                  max_samples: int = 50000) -> float:
+    """
+    投影法估计页面倾斜角度
+    
+    把文字像素按候选角度旋转后做水平投影，文字行对齐时投影的方差最大。
+    所有候选角度一次性向量化计算。
+    
+    Args:
+        ink: 文字像素掩码
+        max_angle: 搜索范围 [-max_angle, max_angle]（度）
+        step: 角度步长（度）
+        max_samples: 参与计算的最多像素数（超出时均匀抽样）
+        
+    Returns:
+        纠正倾斜需要旋转的角度（度，逆时针为正），检测不到文字时返回 0
+    """
+    ys, xs = np.nonzero(ink)
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > max_samples:
+        pick = np.linspace(0, len(ys) - 1, max_samples).astype(np.int64)
+        ys, xs = ys[pick], xs[pick]
+    
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    radians = np.deg2rad(angles)[:, None]
+    # 每个候选角度下各像素旋转后的行号
+    rows = np.rint(ys[None, :] * np.cos(radians) + xs[None, :] * np.sin(radians)).astype(np.int64)
+    rows -= rows.min()
+    
+    height = int(rows.max()) + 1
+    offsets = (np.arange(len(angles)) * height)[:, None]
+    histograms = np.bincount((rows + offsets).ravel(),
+                             minlength=len(angles) * height).reshape(len(angles), height)
+    best = angles[int(np.argmax(histograms.var(axis=1)))]
+    return float(-best)
+
+
+def content_box(ink: np.ndarray, padding: int):
+    """
+    文字像素的范围（加上边距）
+    
+    Args:
+        ink: 文字像素掩码
+        padding: 保留的边距（像素）
+        
+    Returns:
+        (top, bottom, left, right)，bottom 和 right 不含；整页空白时返回 None
+    """
+    rows = np.flatnonzero(ink.any(axis=1))
+    cols = np.flatnonzero(ink.any(axis=0))
+    if len(rows) == 0:
+        return None
+    top = max(int(rows[0]) - padding, 0)
+    bottom = min(int(rows[-1]) + padding + 1, ink.shape[0])
+    left = max(int(cols[0]) - padding, 0)
+    right = min(int(cols[-1]) + padding + 1, ink.shape[1])
+    return top, bottom, left, right
+
+
+def crop_to_content(pixels: np.ndarray, ink: np.ndarray, padding: int) -> np.ndarray:
+    """
+    裁掉没有文字像素的页边距
+    
+    Args:
+        pixels: 图片数组
+        ink: 文字像素掩码
+        padding: 保留的边距（像素）
+        
+    Returns:
+        裁剪后的数组；整页空白时原样返回
+    """
+    box = content_box(ink, padding)
+    if box is None:
+        return pixels
+    top, bottom, left, right = box
+    return pixels[top:bottom, left:right]
@@ -0,0 +1,394 @@
+"""
+多关键词搜索和高亮 - 用 Aho-Corasick 自动机一次遍历文档的全部文本容器（正文、文本框、内容控件、
+表格、页眉页脚、脚注和尾注），同时处理全部关键词
+每段文字只转小写、扫描一次，耗时与文档大小成正比，与关键词个数基本无关
+"""
+import copy
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from docx.enum.text import WD_COLOR_INDEX
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsmap, qn
+from lxml import etree
+
+from docx_stream import (NOTE_PARTS, body_paragraphs, note_paragraphs, paragraph_text,
+                         part_paragraphs, run_child_text, stream_text_paragraphs)
+
+_W_R = qn('w:r')
+_W_T = qn('w:t')
+_RPR = qn('w:rPr')
+_XML_SPACE = qn('xml:space')
+
+# 段落中的文字块（直属的和超链接中的，与 paragraph.text 的来源一致）
+_RUNS = etree.XPath('./w:r | ./w:hyperlink/w:r', namespaces=nsmap)
+
+# 关键词不超过该数量时不走自动机，直接逐个查找
+_FEW_KEYWORDS = 4
+
+# 每节的页眉页脚：(位置, 类型, Section 属性名)
+_HEADER_FOOTERS = (
+    ('header', 'default', 'header'),
+    ('header', 'first_page', 'first_page_header'),
+    ('header', 'even_page', 'even_page_header'),
+    ('footer', 'default', 'footer'),
+    ('footer', 'first_page', 'first_page_footer'),
+    ('footer', 'even_page', 'even_page_footer'),
+)
+
+
+def _lower(text: str) -> str:
+    """转小写并保持长度不变（个别字符转小写后变长时只取第一个字符），位置可以一一对应"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered = ''.join(char.lower()[0] for char in text)
+    return lowered
+
+
+class KeywordAutomaton:
+    """Aho-Corasick 自动机：扫描一遍文本，找出全部关键词的全部出现位置（包括相互重叠的）"""
+    
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Args:
+            keywords: 关键词（不区分大小写，只有大小写不同的重复关键词只保留第一个）
+        """
+        unique = {}
+        for keyword in keywords:
+            unique.setdefault(_lower(keyword), keyword)
+        if not unique:
+            raise ValueError("没有要搜索的关键词")
+        if '' in unique:
+            raise ValueError("关键词不能为空")
+        self.keywords = list(unique.values())
+        patterns = list(unique)
+        self._patterns = patterns
+        # 各关键词的长度（_lower 不改变长度）
+        self.lengths = [len(pattern) for pattern in patterns]
+        
+        # 字典树：每个状态的转移、失败指针和在该状态结束的关键词序号
+        goto = [{}]
+        fail = [0]
+        output = [()]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = goto[state][char] = len(goto)
+                    goto.append({})
+                    fail.append(0)
+                    output.append(())
+                state = next_state
+            output[state] += (index,)
+        
+        # 按层计算失败指针，并把失败链上的关键词并入各状态的输出
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                target = fail[state]
+                while target and char not in goto[target]:
+                    target = fail[target]
+                fail[next_state] = goto[target].get(char, 0)
+                output[next_state] += output[fail[next_state]]
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+    
+    def find(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        扫描已转为小写的文本
+        
+        Args:
+            text: 文本（调用方负责 _lower()，同一段文字只需转换一次）
+        
+        Returns:
+            依次产出 (关键词序号, 起始位置)，按结束位置排列
+        """
+        if len(self._patterns) <= _FEW_KEYWORDS:
+            # 关键词很少时逐个用 str.find（C 实现）比逐字走自动机快
+            matches = []
+            for index, pattern in enumerate(self._patterns):
+                position = text.find(pattern)
+                while position >= 0:
+                    matches.append((position + len(pattern), index, position))
+                    position = text.find(pattern, position + 1)
+            for _, index, position in sorted(matches):
+                yield index, position
+            return
+        
+        goto, fail, output, lengths = self._goto, self._fail, self._output, self.lengths
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for index in output[state]:
+                    yield index, position + 1 - lengths[index]
+
+
+def header_footer_elements(doc) -> Iterator[Tuple[str, int, str, object]]:
+    """
+    各节自己定义的页眉页脚（与前一节共用的只产出一次）
+    
+    Returns:
+        依次产出 ('header'/'footer', 节序号, 'default'/'first_page'/'even_page', 根元素)
+    """
+    seen = set()
+    for section_index, section in enumerate(doc.sections):
+        for part, kind, attr in _HEADER_FOOTERS:
+            header_footer = getattr(section, attr)
+            # 没有自己定义的页眉页脚沿用前一节的（读取 part 不会新建定义）
+            if header_footer.is_linked_to_previous:
+                continue
+            element = header_footer.part.element
+            if id(element) in seen:
+                continue
+            seen.add(id(element))
+            yield part, section_index, kind, element
+
+
+def note_elements(doc) -> Iterator[Tuple[str, object, object]]:
+    """
+    脚注和尾注部件
+    
+    python-docx 不解析这两个部件，这里从部件内容解析；修改后的元素需要用
+    save_note_element 写回部件。
+    
+    Returns:
+        依次产出 ('footnote'/'endnote', 部件, 根元素)
+    """
+    for part, reltype in NOTE_PARTS:
+        for rel in doc.part.rels.values():
+            if rel.reltype == reltype and not rel.is_external:
+                note_part = rel.target_part
+                element = getattr(note_part, 'element', None)
+                if element is None:
+                    element = parse_xml(note_part.blob)
+                yield part, note_part, element
+
+
+def save_note_element(note_part, element):
+    """把修改后的脚注或尾注元素写回部件（部件由 python-docx 解析时不需要）"""
+    if getattr(note_part, 'element', None) is not element:
+        note_part._blob = serialize_part_xml(element)
+
+
+def _document_paragraphs(doc) -> Iterator[Tuple[dict, object]]:
+    """正文和页眉页脚中的段落（见 text_paragraphs）"""
+    yield from body_paragraphs(doc.element.body.iterchildren())
+    for part, section_index, kind, element in header_footer_elements(doc):
+        yield from part_paragraphs(element, {'part': part, 'section': section_index,
+                                             'kind': kind})
+
+
+def text_paragraphs(doc) -> Iterator[Tuple[dict, object]]:
+    """
+    按文档顺序产出全部文本容器中的段落：正文段落（其后紧跟其中的文本框）、正文表格、
+    内容控件、各节的页眉和页脚、脚注和尾注
+    
+    位置为字典（与 docx_stream.stream_text_paragraphs 相同）：
+        正文段落 {'part': 'body', 'paragraph': 索引（与 doc.paragraphs 一致）}
+        文本框   {'part': 'textbox', 'textbox': 序号, 'paragraph'}
+        表格     {'part': 'table', 'table': 索引（与 doc.tables 一致）, 'row', 'cell', 'paragraph'}
+        内容控件 {'part': 'sdt', 'sdt': 序号, 'paragraph'}
+        页眉页脚 {'part': 'header'/'footer', 'section': 节序号,
+                  'kind': 'default'/'first_page'/'even_page', 'paragraph'}
+        脚注尾注 {'part': 'footnote'/'endnote', 'note': 注释 ID, 'paragraph'}
+    与前一节共用的页眉页脚只在第一次出现时产出。搜索、高亮和检索索引都按这个顺序遍历。
+    
+    Args:
+        doc: Document
+    
+    Returns:
+        依次产出 (位置, 段落元素)
+    """
+    yield from _document_paragraphs(doc)
+    for part, _, element in note_elements(doc):
+        yield from note_paragraphs(element, part)
+
+
+def text_locations(doc) -> Iterator[Tuple[dict, str]]:
+    """
+    按文档顺序产出每个段落的位置和文字（位置见 text_paragraphs，文字与 python-docx
+    的 paragraph.text 相同）
+    
+    Args:
+        doc: Document
+    """
+    for location, para in text_paragraphs(doc):
+        yield location, paragraph_text(para)
+
+
+def _search(locations: Iterable[Tuple[dict, str]],
+            keywords: Iterable[str]) -> Dict[str, List[dict]]:
+    """在 (位置, 文字) 序列中搜索全部关键词（见 search_keywords）"""
+    automaton = KeywordAutomaton(keywords)
+    hits = {keyword: [] for keyword in automaton.keywords}
+    lists = [hits[keyword] for keyword in automaton.keywords]
+    for location, text in locations:
+        if not text:
+            continue
+        # 用 _lower 保持长度不变，位置与高亮时一致
+        for index, offset in automaton.find(_lower(text)):
+            lists[index].append(dict(location, offset=offset, text=text))
+    return hits
+
+
+def search_keywords(doc, keywords: Iterable[str]) -> Dict[str, List[dict]]:
+    """
+    一次遍历文档，同时搜索多个关键词（不区分大小写）
+    
+    Args:
+        doc: Document
+        keywords: 关键词
+    
+    Returns:
+        {关键词: [命中, ...]}，每个关键词都有一项（没有命中时为空列表，只有大小写
+        不同的关键词合为一项，以第一次出现的写法为键）；命中为
+        text_paragraphs 的位置字典，另加 'offset'（在段落文字中的起始位置）和
+        'text'（段落文字），按文档顺序排列。同一段落中出现多次时每次一条。
+    """
+    return _search(text_locations(doc), keywords)
+
+
+def stream_search_keywords(word_path: str, keywords: Iterable[str]) -> Dict[str, List[dict]]:
+    """同 search_keywords，但直接流式读取文件，不构建 python-docx 对象模型"""
+    return _search(((location, paragraph_text(para))
+                    for location, para in stream_text_paragraphs(word_path)), keywords)
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """合并重叠或相邻的区间"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _split_run(run, items: list, spans: List[Tuple[int, int, bool]], color):
+    """
+    按区间把一个文字块拆成几个格式相同的文字块，标记区间内的设为高亮
+    
+    Args:
+        run: w:r 元素
+        items: [(子元素, 在文字块中的起始位置, 对应文字), ...]（不含 w:rPr）
+        spans: [(起始位置, 结束位置, 是否高亮), ...]，首尾相接覆盖整个文字块
+        color: 高亮颜色
+    """
+    rpr = run.find(_RPR)
+    # 高亮的格式只生成一次，各分段复制使用（python-docx 负责元素顺序）
+    marked_rpr = copy.deepcopy(rpr) if rpr is not None else OxmlElement('w:rPr')
+    marked_rpr.highlight_val = color
+    length = spans[-1][1]
+    for start, end, highlighted in spans:
+        new_run = run.makeelement(_W_R, run.attrib)
+        if highlighted:
+            new_run.append(copy.deepcopy(marked_rpr))
+        elif rpr is not None:
+            new_run.append(copy.deepcopy(rpr))
+        for child, offset, text in items:
+            child_end = offset + len(text)
+            if not text:
+                # 图片、域代码等没有文字的元素跟随所在位置的分段
+                if start <= offset < end or offset == end == length:
+                    new_run.append(child)
+            elif start <= offset and child_end <= end:
+                new_run.append(child)
+            elif offset < end and child_end > start:
+                # 跨越分段边界的文字只取本段的部分
+                piece = run.makeelement(_W_T, {_XML_SPACE: 'preserve'})
+                piece.text = text[max(start - offset, 0):end - offset]
+                new_run.append(piece)
+        run.addprevious(new_run)
+    run.getparent().remove(run)
+
+
+def _highlight_paragraph(para, automaton: KeywordAutomaton, counts: List[int], color):
+    """高亮一个段落中的全部匹配，必要时在匹配边界处拆分文字块"""
+    runs = []
+    texts = []
+    position = 0
+    for run in _RUNS(para):
+        items = []
+        start = position
+        for child in run:
+            if child.tag == _RPR:
+                continue
+            text = run_child_text(child)
+            items.append((child, position - start, text))
+            texts.append(text)
+            position += len(text)
+        runs.append((run, start, position, items))
+    if not position:
+        return
+    
+    ranges = []
+    for index, offset in automaton.find(_lower(''.join(texts))):
+        counts[index] += 1
+        ranges.append((offset, offset + automaton.lengths[index]))
+    if not ranges:
+        return
+    
+    ranges = _merge_ranges(ranges)
+    for run, run_start, run_end, items in runs:
+        if run_start == run_end:
+            continue
+        # 与本文字块相交的匹配区间（相对文字块的位置）
+        marked = [(max(start, run_start) - run_start, min(end, run_end) - run_start)
+                  for start, end in ranges if start < run_end and end > run_start]
+        if not marked:
+            continue
+        length = run_end - run_start
+        if marked == [(0, length)]:
+            run.get_or_add_rPr().highlight_val = color
+            continue
+        spans = []
+        cursor = 0
+        for start, end in marked:
+            if start > cursor:
+                spans.append((cursor, start, False))
+            spans.append((start, end, True))
+            cursor = end
+        if cursor < length:
+            spans.append((cursor, length, False))
+        _split_run(run, items, spans, color)
+
+
+def highlight_keywords(doc, keywords: Iterable[str],
+                       color=WD_COLOR_INDEX.YELLOW) -> Dict[str, int]:
+    """
+    一次遍历文档，高亮全部关键词（不区分大小写）
+    
+    只有匹配到的字符被高亮：匹配跨越多个文字块时分别标记各部分，文字块只有
+    一部分匹配时在匹配边界处拆分为格式相同的几个文字块。范围与
+    search_keywords 相同（见 text_paragraphs）。
+    
+    Args:
+        doc: Document（原地修改）
+        keywords: 关键词
+        color: 高亮颜色（WD_COLOR_INDEX）
+    
+    Returns:
+        {关键词: 高亮的出现次数}
+    """
+    automaton = KeywordAutomaton(keywords)
+    counts = [0] * len(automaton.keywords)
+    # 与搜索使用同一套遍历（text_paragraphs），高亮的正是搜索到的位置
+    for _, para in _document_paragraphs(doc):
+        _highlight_paragraph(para, automaton, counts, color)
+    for part, note_part, element in note_elements(doc):
+        before = sum(counts)
+        for _, para in note_paragraphs(element, part):
+            _highlight_paragraph(para, automaton, counts, color)
+        if sum(counts) != before:
+            save_note_element(note_part, element)
+    return dict(zip(automaton.keywords, counts))
@@ -0,0 +1,147 @@
+"""
+OCR 结果磁盘缓存 - 按页面内容寻址，跳过未变化页面的重复识别
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class OCRCache:
+    """按页面图片哈希缓存 OCR 文字，超过容量上限时按最近使用时间淘汰"""
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes 必须大于 0: {max_bytes}")
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = sum(path.stat().st_size for path in self._entries())
+    
+    def __getstate__(self):
+        # 锁不能跨进程传递（批量转换时缓存随转换参数发送到工作进程）
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(image, lang: str, dpi: int, config: str = '') -> str:
+        """
+        计算缓存键：渲染后的页面内容 + 识别语言 + DPI + Tesseract 配置
+        
+        Args:
+            image: PIL 页面图片，或渲染出的页面图片文件路径（按文件内容计算）
+            lang: Tesseract 识别语言
+            dpi: 渲染分辨率
+            config: Tesseract 额外配置
+            
+        Returns:
+            十六进制 SHA-256 字符串
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{lang}|{dpi}|{config}|".encode('utf-8'))
+        if isinstance(image, (str, os.PathLike)):
+            with open(image, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        else:
+            digest.update(f"{image.mode}|{image.size}|".encode('utf-8'))
+            digest.update(image.tobytes())
+        return digest.hexdigest()
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.txt"
+    
+    def _entries(self):
+        return self.cache_dir.glob('*/*.txt')
+    
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，命中时刷新该条目的使用时间；未命中返回 None"""
+        path = self._path(key)
+        try:
+            text = path.read_text(encoding='utf-8')
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return text
+    
+    def put(self, key: str, text: str):
+        """写入缓存（先写临时文件再替换，避免并发读到半个文件）"""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        data = text.encode('utf-8')
+        old_size = path.stat().st_size if path.exists() else 0
+        
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        
+        with self._lock:
+            self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+    
+    def _evict(self):
+        """按最近使用时间淘汰最旧的条目，直到总大小低于上限"""
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._size -= size
+    
+    def clear(self):
+        """清空缓存并重置计数"""
+        with self._lock:
+            for path in list(self._entries()):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+    
+    @property
+    def size(self) -> int:
+        """当前缓存总大小（字节）"""
+        return self._size
+    
+    def stats(self) -> dict:
+        """命中统计"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': self._size,
+        }
@@ -0,0 +1,117 @@
+"""
+增量转换的页面指纹清单 - 记录输出文档中每页对应的 PDF 页面内容哈希和转换方式
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject, NameObject,
+                            StreamObject)
+
+# 清单格式版本，格式变化时旧清单作废
+MANIFEST_VERSION = 1
+# 不参与页面指纹的键（指向页面树和所属页面的反向引用）
+_SKIP_KEYS = {'/Parent', '/P'}
+
+
+def _digest_object(obj, digest, seen: dict):
+    """
+    把 PDF 对象（含间接引用的字体、图片、Form XObject 等）写入哈希
+    
+    只使用对象内容，不使用对象编号，同一页面在重新生成的 PDF 中指纹不变。
+    
+    Args:
+        obj: PDF 对象
+        digest: hashlib 哈希对象
+        seen: 已访问的间接对象 {(对象号, 版本号): 访问序号}，用于处理循环和重复引用
+    """
+    if isinstance(obj, IndirectObject):
+        ref = (obj.idnum, obj.generation)
+        if ref in seen:
+            digest.update(b'@%d' % seen[ref])
+            return
+        seen[ref] = len(seen)
+        obj = obj.get_object()
+    
+    if isinstance(obj, DictionaryObject):
+        digest.update(b'<<')
+        for key in sorted(obj):
+            if key in _SKIP_KEYS:
+                continue
+            digest.update(key.encode('utf-8'))
+            _digest_object(obj.raw_get(key), digest, seen)
+        digest.update(b'>>')
+        if isinstance(obj, StreamObject):
+            # 直接使用编码后的数据，不解压图片
+            data = obj._data
+            if isinstance(data, str):
+                data = data.encode('latin-1')
+            digest.update(b'stream%d:' % len(data))
+            digest.update(data)
+    elif isinstance(obj, ArrayObject):
+        digest.update(b'[')
+        for item in obj:
+            _digest_object(item, digest, seen)
+        digest.update(b']')
+    elif isinstance(obj, NameObject):
+        digest.update(obj.encode('utf-8'))
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+    digest.update(b' ')
+
+
+def page_fingerprint(page) -> str:
+    """
+    计算单页内容指纹（内容流、资源、页面尺寸和旋转）
+    
+    Args:
+        page: PyPDF2 PageObject
+    
+    Returns:
+        十六进制 SHA-256
+    """
+    digest = hashlib.sha256()
+    _digest_object(page, digest, {})
+    return digest.hexdigest()
+
+
+def manifest_path(word_path: str) -> str:
+    """输出文档对应的清单路径（与 .docx 同目录，如 report.docx -> report.pages.json）"""
+    return str(Path(word_path).with_suffix('.pages.json'))
+
+
+def load_manifest(word_path: str) -> Optional[dict]:
+    """
+    读取输出文档的页面清单
+    
+    Args:
+        word_path: Word 文件路径
+    
+    Returns:
+        清单字典，不存在、无法解析或版本不符时返回 None
+    """
+    try:
+        with open(manifest_path(word_path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(word_path: str, manifest: dict):
+    """
+    原子地写入页面清单
+    
+    Args:
+        word_path: Word 文件路径
+        manifest: 清单字典（'docx'、'options'、'pages'）
+    """
+    path = manifest_path(word_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(manifest, version=MANIFEST_VERSION), f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
@@ -0,0 +1,122 @@
+"""
+PDF 页面类型判断 - 检查内容流中的文字操作符、字体资源和整页图片，不做文字提取
+"""
+import bisect
+import hashlib
+import re
+from typing import List
+
+import PyPDF2
+from PyPDF2.generic import ArrayObject
+
+# 页面类型
+PAGE_TEXT = 'text'    # 有文字层，可直接提取
+PAGE_SCAN = 'scan'    # 扫描/图片页，需要OCR
+PAGE_BLANK = 'blank'  # 既没有文字也没有图片
+
+# 文字层少于这么多字节且有整页图片时，视为扫描页（如扫描件上盖的页码）
+MIN_TEXT_BYTES = 50
+# 图片覆盖页面面积的比例达到该值时视为整页图片
+FULL_PAGE_RATIO = 0.8
+# Form XObject 的最大嵌套深度
+_MAX_FORM_DEPTH = 5
+
+_BT_ET = re.compile(rb'\bBT\b(.*?)\bET\b', re.S)
+_STRING = re.compile(rb'\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>')
+_NUMBER = rb'(-?[\d.]+)'
+_CM = re.compile(rb'\s+'.join([_NUMBER] * 6) + rb'\s+cm\b')
+_DO = re.compile(rb'/([^\s/\[\]()<>{}%]+)\s+Do\b')
+
+
+def _stream_data(contents) -> bytes:
+    """读取页面内容流（可能是多个流组成的数组）的解码数据"""
+    if contents is None:
+        return b''
+    contents = contents.get_object()
+    if isinstance(contents, ArrayObject):
+        return b'\n'.join(item.get_object().get_data() for item in contents)
+    return contents.get_data()
+
+
+def _inspect(data: bytes, resources, page_area: float, depth: int = 0) -> tuple:
+    """
+    扫描一段内容流
+    
+    Returns:
+        (文字字节数, 是否有图片, 是否有整页图片)
+    """
+    resources = resources.get_object() if resources is not None else {}
+    fonts = resources.get('/Font')
+    text_bytes = 0
+    if fonts is not None and len(fonts.get_object()) > 0:
+        for block in _BT_ET.finditer(data):
+            for string in _STRING.finditer(block.group(1)):
+                literal = string.group(0)
+                # 十六进制字符串两个字符为一个字节
+                text_bytes += (len(literal) - 2) // (2 if literal[:1] == b'<' else 1)
+    
+    xobjects = resources.get('/XObject')
+    xobjects = xobjects.get_object() if xobjects is not None else {}
+    has_image = False
+    full_page_image = False
+    matrices = list(_CM.finditer(data)) if xobjects else []
+    positions = [matrix.start() for matrix in matrices]
+    for match in _DO.finditer(data):
+        name = '/' + match.group(1).decode('latin-1')
+        if name not in xobjects:
+            continue
+        xobject = xobjects[name].get_object()
+        subtype = xobject.get('/Subtype')
+        if subtype == '/Image':
+            has_image = True
+            # 取 Do 之前最近的 cm 矩阵估算图片在页面上的大小
+            index = bisect.bisect_left(positions, match.start()) - 1
+            if index >= 0 and page_area > 0:
+                a, b, c, d = (float(v) for v in matrices[index].groups()[:4])
+                if abs(a * d - b * c) >= FULL_PAGE_RATIO * page_area:
+                    full_page_image = True
+        elif subtype == '/Form' and depth < _MAX_FORM_DEPTH:
+            form_text, form_image, form_full = _inspect(
+                xobject.get_data(), xobject.get('/Resources', resources), page_area, depth + 1)
+            text_bytes += form_text
+            has_image = has_image or form_image
+            full_page_image = full_page_image or form_full
+    return text_bytes, has_image, full_page_image
+
+
+def classify_page(page) -> str:
+    """
+    判断单个页面的类型
+    
+    Args:
+        page: PyPDF2 页面对象
+        
+    Returns:
+        PAGE_TEXT、PAGE_SCAN 或 PAGE_BLANK
+    """
+    box = page.mediabox
+    page_area = float(box.width) * float(box.height)
+    text_bytes, has_image, full_page_image = _inspect(
+        _stream_data(page.get('/Contents')), page.get('/Resources'), page_area)
+    
+    if full_page_image and text_bytes < MIN_TEXT_BYTES:
+        return PAGE_SCAN
+    if text_bytes > 0:
+        return PAGE_TEXT
+    if has_image:
+        return PAGE_SCAN
+    return PAGE_BLANK
+
+
+def classify_reader(reader: PyPDF2.PdfReader) -> List[str]:
+    """判断已打开 PDF 的每一页类型"""
+    return [classify_page(page) for page in reader.pages]
+
+
+def file_hash(path: str) -> str:
+    """文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
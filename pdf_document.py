@@ -0,0 +1,221 @@
+"""
+PDF 文档句柄 - 一次转换只解析一次文件，页数、元数据、页面类型和页面指纹在各阶段之间共用
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import PyPDF2
+from pdf2docx import Converter
+
+from page_manifest import page_fingerprint
+from pdf_classifier import classify_reader, file_hash
+
+
+class PDFDocument:
+    """
+    已打开的 PDF 文件
+
+    解析器（PyPDF2 和 pdf2docx/PyMuPDF）在第一次用到时才打开，之后各阶段
+    共用同一个对象；页数、元数据等结果算出后一直缓存。用 with 语句使用
+    句柄，最后一个使用者退出时关闭解析器、释放内存，已缓存的结果保留，
+    下次转换同一文件时不必重新解析。页面类型还按文件内容哈希缓存在
+    DocumentCache 中，改名、复制的文件也能命中。
+    """
+
+    def __init__(self, path: str, cache: 'DocumentCache' = None):
+        """
+        Args:
+            path: PDF 文件路径
+            cache: 所属的 DocumentCache（页面类型按内容哈希存放其中），None=不共享
+        """
+        self.path = os.path.abspath(path)
+        self.cache = cache
+        stat = os.stat(self.path)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self._lock = threading.RLock()
+        self._users = 0
+        self._reader = None
+        self._converter = None
+        self._page_count = None
+        self._metadata = None
+        self._page_kinds = None
+        self._fingerprints = None
+        self._sha256 = None
+
+    def __enter__(self):
+        with self._lock:
+            self._users += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._lock:
+            self._users -= 1
+            if self._users == 0:
+                self.release()
+
+    @property
+    def key(self) -> tuple:
+        """缓存键：路径、大小和修改时间"""
+        return self.path, self.size, self.mtime_ns
+
+    @property
+    def reader(self) -> PyPDF2.PdfReader:
+        """PyPDF2 解析结果（第一次访问时解析）"""
+        with self._lock:
+            if self._reader is None:
+                self._reader = PyPDF2.PdfReader(self.path)
+            return self._reader
+
+    def pdf2docx(self) -> Converter:
+        """pdf2docx 转换器（第一次调用时创建，release 时关闭）"""
+        with self._lock:
+            if self._converter is None:
+                self._converter = Converter(self.path)
+            return self._converter
+
+    @property
+    def page_count(self) -> int:
+        """页数（优先使用已经打开的解析器）"""
+        with self._lock:
+            if self._page_count is None:
+                if self._converter is not None:
+                    self._page_count = len(self._converter.fitz_doc)
+                else:
+                    self._page_count = len(self.reader.pages)
+            return self._page_count
+
+    @property
+    def metadata(self) -> Dict[str, str]:
+        """文档信息字典（标题、作者等，键名不带 '/'）"""
+        with self._lock:
+            if self._metadata is None:
+                info = self.reader.metadata or {}
+                self._metadata = {key.lstrip('/'): str(value) for key, value in info.items()}
+            return dict(self._metadata)
+
+    @property
+    def page_kinds(self) -> List[str]:
+        """每页类型（PAGE_TEXT / PAGE_SCAN / PAGE_BLANK），按页码顺序"""
+        with self._lock:
+            if self._page_kinds is None:
+                kinds = self.cache.page_kinds(self.sha256) if self.cache is not None else None
+                if kinds is None:
+                    kinds = classify_reader(self.reader)
+                    if self.cache is not None:
+                        self.cache.store_page_kinds(self.sha256, kinds)
+                self._page_kinds = kinds
+            return list(self._page_kinds)
+
+    @property
+    def fingerprints(self) -> List[str]:
+        """每页内容指纹（见 page_manifest.page_fingerprint）"""
+        with self._lock:
+            if self._fingerprints is None:
+                self._fingerprints = [page_fingerprint(page) for page in self.reader.pages]
+            return list(self._fingerprints)
+
+    @property
+    def sha256(self) -> str:
+        """文件内容的 SHA-256"""
+        with self._lock:
+            if self._sha256 is None:
+                self._sha256 = file_hash(self.path)
+            return self._sha256
+
+    def release(self):
+        """关闭解析器，只保留已缓存的结果"""
+        with self._lock:
+            if self._converter is not None:
+                self._converter.close()
+                self._converter = None
+            self._reader = None
+
+
+class DocumentCache:
+    """
+    按路径、大小和修改时间缓存 PDFDocument，按文件内容哈希缓存页面类型，
+    超出容量时淘汰最久未使用的
+    """
+
+    def __init__(self, max_entries: int = 64, max_page_kinds: int = 256):
+        """
+        Args:
+            max_entries: 最多缓存的文件数
+            max_page_kinds: 最多缓存页面类型的文件内容数
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries 必须大于 0: {max_entries}")
+        self.max_entries = max_entries
+        self.max_page_kinds = max_page_kinds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._page_kinds = OrderedDict()
+        self._lock = threading.Lock()
+        # 页面类型单独加锁：查找时调用方持有文档的锁，而淘汰文档时先持有 self._lock
+        self._kinds_lock = threading.Lock()
+
+    def open(self, path: str) -> PDFDocument:
+        """
+        获取文件的文档句柄，文件修改后自动换成新的句柄
+
+        Args:
+            path: PDF 文件路径
+
+        Returns:
+            PDFDocument
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"PDF 文件不存在: {path}")
+        document = PDFDocument(path, self)
+        with self._lock:
+            cached = self._entries.get(document.path)
+            if cached is not None and cached.key == document.key:
+                self._entries.move_to_end(document.path)
+                self.hits += 1
+                return cached
+            self.misses += 1
+            self._entries[document.path] = document
+            self._entries.move_to_end(document.path)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                with evicted._lock:
+                    if evicted._users == 0:
+                        evicted.release()
+            return document
+
+    def page_kinds(self, sha256: str) -> Optional[List[str]]:
+        """按文件内容哈希查找页面类型，没有缓存时返回 None"""
+        with self._kinds_lock:
+            kinds = self._page_kinds.get(sha256)
+            if kinds is not None:
+                self._page_kinds.move_to_end(sha256)
+                return list(kinds)
+            return None
+
+    def store_page_kinds(self, sha256: str, kinds: List[str]):
+        """按文件内容哈希保存页面类型"""
+        with self._kinds_lock:
+            self._page_kinds[sha256] = list(kinds)
+            self._page_kinds.move_to_end(sha256)
+            while len(self._page_kinds) > self.max_page_kinds:
+                self._page_kinds.popitem(last=False)
+
+    def stats(self) -> dict:
+        """命中率统计"""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for document in self._entries.values():
+                with document._lock:
+                    if document._users == 0:
+                        document.release()
+            self._entries.clear()
+        with self._kinds_lock:
+            self._page_kinds.clear()
@@ -2,30 +2,387 @@
 PDF 到 Word 转换器 - 支持文字识别、转换、编辑和关键词搜索
 支持普通PDF和扫描版PDF的文字识别（OCR）
 """
+import json
 import os
+import re
+import shlex
+import subprocess
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from pdf2docx import Converter
 from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.opc.part import Part
 from docx.shared import RGBColor, Pt
-from docx.enum.text import WD_COLOR_INDEX
-import PyPDF2
+
+from docx_merge import append_document, assemble_pages, document_pages, merge_documents
+from docx_stream import stream_document_info, stream_search
+from document_session import DocumentSession, paragraph_texts, replace_in_document
+from keyword_search import highlight_keywords, stream_search_keywords
+from ocr_cache import OCRCache
+from page_manifest import load_manifest, save_manifest
+from pdf_classifier import PAGE_SCAN, PAGE_TEXT, file_hash
+from pdf_document import DocumentCache, PDFDocument
+from profiler import StageProfiler, profile_path
+from progress import (STAGE_CLASSIFY, STAGE_CONVERT, STAGE_DETECT_LANG, STAGE_INDEX,
+                      STAGE_LAYOUT, STAGE_MERGE, STAGE_OCR, STAGE_RENDER, STAGE_SAVE,
+                      ProgressReporter, print_progress)
+from search_index import SearchIndex
 
 # OCR相关导入（可选）
 try:
     from pdf2image import convert_from_path
+    from PIL import Image
     import pytesseract
     OCR_AVAILABLE = True
 except ImportError:
     OCR_AVAILABLE = False
 
 
+OCR_BACKENDS = ('page', 'batch')
+
+DEFAULT_OCR_LANG = 'chi_sim+eng'
+# ocr_lang 取该值时按文档内容自动选择语言
+OCR_LANG_AUTO = 'auto'
+# Tesseract OSD 检测出的文字系统 → 识别语言（未列出的使用 DEFAULT_OCR_LANG）
+SCRIPT_LANGS = {
+    'Latin': 'eng',
+    'Han': 'chi_sim+eng',
+}
+# 标准转换分片时每片的最少页数
+_MIN_SHARD_PAGES = 4
+# 语言检测时用于抽样的页数和渲染分辨率
+_LANG_PROBE_PAGES = 3
+_LANG_PROBE_DPI = 150
+
+# 各 Tesseract 命令路径是否可用 {tesseract_cmd: True/False}
+_TESSERACT_CHECKS = {}
+
+# TSV 输出中的整数列
+_TSV_INT_FIELDS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+                   'left', 'top', 'width', 'height')
+
+
+def tesseract_available() -> bool:
+    """
+    能否真正调用 Tesseract（OCR_AVAILABLE 只表示 pytesseract 可以导入，
+    这里还检查可执行文件；按命令路径缓存检查结果）
+    """
+    if not OCR_AVAILABLE:
+        return False
+    command = pytesseract.pytesseract.tesseract_cmd
+    if command not in _TESSERACT_CHECKS:
+        try:
+            pytesseract.get_tesseract_version()
+            _TESSERACT_CHECKS[command] = True
+        except Exception:
+            _TESSERACT_CHECKS[command] = False
+    return _TESSERACT_CHECKS[command]
+
+
+def _parse_tsv(tsv: str) -> List[dict]:
+    """解析 Tesseract TSV 输出为行字典列表（多页输出中重复的表头会被跳过）"""
+    lines = tsv.splitlines()
+    if not lines:
+        return []
+    header = lines[0].split('\t')
+    rows = []
+    for line in lines[1:]:
+        values = line.split('\t')
+        if values[0] == header[0] or len(values) < len(header) - 1:
+            continue
+        row = dict(zip(header, values))
+        for field in _TSV_INT_FIELDS:
+            row[field] = int(row[field])
+        row['conf'] = float(row['conf'])
+        row['text'] = row.get('text', '')
+        rows.append(row)
+    return rows
+
+
+def _is_cjk(char: str) -> bool:
+    """是否为中日韩文字或全角符号"""
+    return ('\u2e80' <= char <= '\u9fff' or '\uf900' <= char <= '\ufaff'
+            or '\uff00' <= char <= '\uffef')
+
+
+def _join_words(words: List[str]) -> str:
+    """拼接一行中的单词，中文字符之间不加空格"""
+    line = ''
+    for word in words:
+        if line and not (_is_cjk(line[-1]) and _is_cjk(word[0])):
+            line += ' '
+        line += word
+    return line
+
+
+def _text_from_words(rows: List[dict]) -> Tuple[str, Optional[float]]:
+    """
+    由 TSV 单词行重建页面文字，并计算平均置信度
+    
+    同一行的单词拼成一行，行之间换行；Tesseract 的块/段落编号变化或
+    行间距明显大于正常行高时视为新段落，段落之间空一行。
+    
+    Returns:
+        (文字, 平均置信度)，页面没有识别出单词时置信度为 None
+    """
+    lines = {}
+    boxes = {}
+    confidences = []
+    for row in rows:
+        word = row['text'].strip()
+        if row['level'] != 5 or not word:
+            continue
+        key = (row['block_num'], row['par_num'], row['line_num'])
+        lines.setdefault(key, []).append(word)
+        top, bottom = boxes.get(key, (row['top'], row['top'] + row['height']))
+        boxes[key] = (min(top, row['top']), max(bottom, row['top'] + row['height']))
+        if row['conf'] >= 0:
+            confidences.append(row['conf'])
+    
+    heights = sorted(bottom - top for top, bottom in boxes.values())
+    line_height = heights[len(heights) // 2] if heights else 0
+    
+    output = []
+    previous = None
+    for key, words in lines.items():
+        if previous is not None:
+            new_paragraph = key[:2] != previous[:2]
+            # 同一段落内出现明显空白（超过一行高）也分段
+            gap = boxes[key][0] - boxes[previous][1]
+            if new_paragraph or (line_height and gap > line_height):
+                output.append('')
+        output.append(_join_words(words))
+        previous = key
+    
+    confidence = sum(confidences) / len(confidences) if confidences else None
+    return '\n'.join(output), confidence
+
+
+def _ocr_page(image, lang: str, config: str = '',
+              structured: bool = False) -> Tuple[str, Optional[float]]:
+    """
+    识别单页图片中的文字（模块级函数，便于在子进程中执行）
+    
+    image 可以是 PIL 图片或图片文件路径。structured=True 时使用 TSV 输出，
+    一次调用同时得到文字、段落结构和置信度。
+    
+    Returns:
+        (文字, 平均置信度)，structured=False 时置信度为 None
+    """
+    if structured:
+        tsv = pytesseract.image_to_data(image, lang=lang, config=config)
+        return _text_from_words(_parse_tsv(tsv))
+    return pytesseract.image_to_string(image, lang=lang, config=config), None
+
+
+def _ocr_batch(images: list, lang: str, config: str = '',
+               structured: bool = False) -> List[Tuple[str, Optional[float]]]:
+    """
+    用一次 Tesseract 调用识别多页图片，避免每页重复启动进程和加载语言模型
+    
+    图片写入临时目录并通过文件列表传给 tesseract。文本输出按分页符
+    (\f) 拆回单页；structured=True 时使用 TSV 输出并按 page_num 拆分。
+    """
+    with tempfile.TemporaryDirectory(prefix='pdf2word_ocr_') as tmp_dir:
+        paths = []
+        for i, image in enumerate(images):
+            # 已经是文件的页面直接使用，不再重写
+            if isinstance(image, str):
+                paths.append(image)
+                continue
+            path = os.path.join(tmp_dir, f'page_{i:04d}.png')
+            image.save(path)
+            paths.append(path)
+        
+        list_path = os.path.join(tmp_dir, 'pages.txt')
+        with open(list_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(paths) + '\n')
+        
+        command = [pytesseract.pytesseract.tesseract_cmd, list_path, 'stdout', '-l', lang,
+                   *shlex.split(config)]
+        if structured:
+            command.append('tsv')
+        result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', errors='replace').strip())
+    output = result.stdout.decode('utf-8')
+    
+    if structured:
+        page_rows = [[] for _ in images]
+        for row in _parse_tsv(output):
+            if not 1 <= row['page_num'] <= len(images):
+                raise RuntimeError(f"Tesseract 输出了无效页码: {row['page_num']}")
+            page_rows[row['page_num'] - 1].append(row)
+        return [_text_from_words(rows) for rows in page_rows]
+    
+    # 每页输出以分页符结尾，最后一个分页符之后为空
+    pages = output.split('\f')
+    if len(pages) == len(images) + 1 and not pages[-1].strip():
+        pages.pop()
+    if len(pages) != len(images):
+        raise RuntimeError(f"Tesseract 输出 {len(pages)} 页，期望 {len(images)} 页")
+    return [(text, None) for text in pages]
+
+
+def _ocr_chunk(images: list, lang: str, backend: str, config: str = '',
+               structured: bool = False,
+               preprocessor=None) -> List[Tuple[str, Optional[float]]]:
+    """按指定后端识别一组页面（有预处理器时先在当前进程中预处理）"""
+    if preprocessor is not None:
+        images = [preprocessor(Image.open(image) if isinstance(image, str) else image)
+                  for image in images]
+    if backend == 'batch' and len(images) > 1:
+        return _ocr_batch(images, lang, config, structured)
+    return [_ocr_page(image, lang, config, structured) for image in images]
+
+
+def _convert_shard(pdf_path: str, start: int, end: int, part_path: str) -> str:
+    """用 pdf2docx 转换 [start, end) 页（从0开始）到单独的文档（在子进程中执行）"""
+    cv = Converter(pdf_path)
+    try:
+        cv.convert(part_path, start=start, end=end)
+    finally:
+        cv.close()
+    return part_path
+
+
+# 输出文档中记录每页OCR分辨率和置信度的部件
+OCR_INFO_PARTNAME = '/customXml/ocrPages.xml'
+
+
+def write_ocr_page_info(doc, page_info: List[dict]):
+    """
+    把每页OCR使用的分辨率和置信度写入文档的自定义XML部件
+    
+    Args:
+        doc: 要写入的 Document
+        page_info: [{'page': 页码, 'dpi': 分辨率, 'confidence': 置信度或None}, ...]
+    """
+    root = ET.Element('ocrPages')
+    for info in page_info:
+        confidence = info['confidence']
+        ET.SubElement(root, 'page', number=str(info['page']), dpi=str(info['dpi']),
+                      confidence='' if confidence is None else f"{confidence:.2f}")
+    blob = ET.tostring(root, encoding='UTF-8', xml_declaration=True)
+    # 替换文档中已有的记录（增量转换时在旧文档上重新写入）
+    for r_id, rel in list(doc.part.rels.items()):
+        if not rel.is_external and rel.target_part.partname == OCR_INFO_PARTNAME:
+            doc.part.drop_rel(r_id)
+    part = Part(PackURI(OCR_INFO_PARTNAME), 'application/xml', blob, doc.part.package)
+    doc.part.relate_to(part, RT.CUSTOM_XML)
+
+
+def read_ocr_page_info(word_path: str) -> List[dict]:
+    """
+    读取 write_ocr_page_info 写入的每页OCR信息
+    
+    Args:
+        word_path: Word 文件路径
+        
+    Returns:
+        [{'page', 'dpi', 'confidence'}, ...]，文档中没有记录时返回空列表
+    """
+    with zipfile.ZipFile(word_path) as archive:
+        try:
+            blob = archive.read(OCR_INFO_PARTNAME.lstrip('/'))
+        except KeyError:
+            return []
+    return [{'page': int(node.get('number')), 'dpi': int(node.get('dpi')),
+             'confidence': float(node.get('confidence')) if node.get('confidence') else None}
+            for node in ET.fromstring(blob)]
+
+
 class PDFToWordConverter:
     """PDF 转 Word 转换器类 - 支持文字识别和提取"""
     
-    def __init__(self):
+    def __init__(self, ocr_dpi: int = 300, ocr_lang: str = DEFAULT_OCR_LANG,
+                 ocr_window: int = 4, ocr_workers: Optional[int] = 1,
+                 ocr_backend: str = 'page', ocr_config: str = '',
+                 ocr_cache: Optional[OCRCache] = None,
+                 ocr_adaptive_dpi: Optional[int] = None, ocr_min_confidence: float = 80.0,
+                 ocr_preprocessor=None, ocr_render_threads: Optional[int] = None,
+                 ocr_layout: bool = False, convert_workers: Optional[int] = 1,
+                 document_cache: Optional[DocumentCache] = None,
+                 progress_callback: Optional[Callable] = print_progress,
+                 profile: bool = False, search_index: Optional[SearchIndex] = None):
+        """
+        Args:
+            ocr_dpi: OCR 渲染页面时使用的分辨率
+            ocr_lang: Tesseract 识别语言（'auto'=按文档抽样页面的文字系统自动选择）
+            ocr_window: OCR 时每次渲染的页数（流式处理，内存占用与总页数无关）
+            ocr_workers: OCR 并行进程数（1=串行，None=使用全部CPU核心）
+            ocr_backend: OCR 调用方式（'page'=每页一次 Tesseract，
+                         'batch'=每个窗口/进程一次 Tesseract 识别多页）
+            ocr_config: 传给 Tesseract 的额外命令行参数（如 '--psm 6'）
+            ocr_cache: OCR 结果缓存（None=不缓存），未变化的页面直接复用识别结果
+            ocr_adaptive_dpi: 自适应模式的首轮分辨率（None=关闭），平均置信度低于
+                              ocr_min_confidence（或未识别出文字）的页面再以 ocr_dpi
+                              重新识别，置信度没有降低时才采用新结果
+            ocr_min_confidence: 自适应模式下的置信度阈值（0-100）
+            ocr_preprocessor: 识别前的页面预处理（如 image_preprocess.ImagePreprocessor，
+                              None=不预处理），在OCR进程中执行
+            ocr_render_threads: poppler 渲染页面的并行数（None=CPU核心数）
+            ocr_layout: 按 Tesseract 识别出的段落和行生成 Word 段落和换行
+                        （与自适应DPI共用同一次 TSV 识别，不额外识别）
+            convert_workers: 标准转换（pdf2docx）的并行进程数，按页码范围分片后
+                             合并（1=不分片，None=使用全部CPU核心）
+            document_cache: PDF 文档句柄缓存（None=新建），可在多个转换器之间
+                            共用，反复转换同一文件时不再重新解析
+            progress_callback: 进度事件订阅者（默认打印到控制台，None=不输出），
+                               更多订阅者可通过 self.progress.subscribe 添加
+            profile: 为每次转换按阶段（类型检测、渲染、OCR、版面重建、保存等）采集
+                     cProfile 数据，写入输出文档旁的 *.profile 目录（见 profiler.py）
+            search_index: 全文检索索引（None=不建立），每次转换成功后把输出文档
+                          加入索引（见 search_index.py）
+        """
+        if ocr_window < 1:
+            raise ValueError(f"ocr_window 必须大于 0: {ocr_window}")
+        if ocr_workers is None:
+            ocr_workers = os.cpu_count() or 1
+        if ocr_workers < 1:
+            raise ValueError(f"ocr_workers 必须大于 0: {ocr_workers}")
+        if convert_workers is None:
+            convert_workers = os.cpu_count() or 1
+        if convert_workers < 1:
+            raise ValueError(f"convert_workers 必须大于 0: {convert_workers}")
+        if ocr_backend not in OCR_BACKENDS:
+            raise ValueError(f"不支持的 OCR 后端: {ocr_backend}")
+        if not 0 <= ocr_min_confidence <= 100:
+            raise ValueError(f"ocr_min_confidence 必须在 0-100 之间: {ocr_min_confidence}")
         self.converted_file = None
         self.ocr_available = OCR_AVAILABLE
+        self.ocr_dpi = ocr_dpi
+        self.ocr_lang = ocr_lang
+        self.ocr_window = ocr_window
+        self.ocr_workers = ocr_workers
+        self.ocr_backend = ocr_backend
+        self.ocr_config = ocr_config
+        self.ocr_cache = ocr_cache
+        self.ocr_adaptive_dpi = ocr_adaptive_dpi
+        self.ocr_min_confidence = ocr_min_confidence
+        self.ocr_preprocessor = ocr_preprocessor
+        self.ocr_render_threads = ocr_render_threads or os.cpu_count() or 1
+        self.ocr_layout = ocr_layout
+        self.convert_workers = convert_workers
+        self.documents = document_cache if document_cache is not None else DocumentCache()
+        # 转换进度事件（阶段开始/结束及耗时、页码进度、提示和警告）
+        self.progress = ProgressReporter()
+        if progress_callback is not None:
+            self.progress.subscribe(progress_callback)
+        self.profile = profile
+        self.search_index = search_index
+        # 自动语言检测结果 {(文件路径, 大小, 修改时间): 语言}
+        self._lang_cache = {}
+        # 最近一次OCR转换中识别失败的页面 [(页码, 错误信息), ...]
+        self.ocr_failures = []
+        # 最近一次OCR转换每页使用的分辨率和置信度 [{'page', 'dpi', 'confidence'}, ...]
+        self.ocr_page_info = []
     
     def check_pdf_has_text(self, pdf_path: str) -> bool:
         """
@@ -38,21 +395,15 @@ class PDFToWordConverter:
             True 如果包含文字，False 如果是纯图片/扫描版
         """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                # 检查前几页
-                pages_to_check = min(3, len(pdf_reader.pages))
-                
-                for i in range(pages_to_check):
-                    page = pdf_reader.pages[i]
-                    text = page.extract_text().strip()
-                    if text and len(text) > 50:  # 如果有足够的文字内容
-                        return True
-                return False
+            kinds = self.classify_pages(pdf_path)
         except:
             return False
+        # 多数页面有文字层才算文本型（带打字封面的扫描件仍算扫描版）
+        text_pages = kinds.count(PAGE_TEXT)
+        return text_pages > 0 and text_pages >= kinds.count(PAGE_SCAN)
     
-    def convert_pdf_to_word(self, pdf_path: str, word_path: str = None, use_ocr: bool = None) -> str:
+    def convert_pdf_to_word(self, pdf_path: str, word_path: str = None, use_ocr: bool = None,
+                            hybrid: bool = False, incremental: bool = False) -> str:
         """
         将 PDF 文件转换为 Word 文档（智能识别PDF类型并提取文字）
         
@@ -60,6 +411,9 @@ class PDFToWordConverter:
             pdf_path: PDF 文件路径
             word_path: 输出的 Word 文件路径（可选）
             use_ocr: 是否使用OCR（None=自动检测，True=强制OCR，False=不使用OCR）
+            hybrid: 是否逐页判断类型（文本页直接提取，图片页使用OCR），忽略 use_ocr
+            incremental: 增量转换，只重新转换内容有变化的页面并拼接到已有的输出
+                         文档中（输出文档旁保存每页指纹清单 *.pages.json）
             
         Returns:
             生成的 Word 文件路径
@@ -71,41 +425,85 @@ class PDFToWordConverter:
         if word_path is None:
             word_path = str(Path(pdf_path).with_suffix('.docx'))
         
+        profiler = StageProfiler() if self.profile else None
+        if profiler is not None:
+            self.progress.subscribe(profiler)
+        try:
+            # 本次转换的各个阶段共用同一个文档句柄，结束时释放解析器
+            with self.open_document(pdf_path), self.progress.stage(STAGE_CONVERT):
+                word_path = self._convert_document(pdf_path, word_path, use_ocr, hybrid,
+                                                   incremental)
+                if self.search_index is not None:
+                    self._update_index(word_path)
+                return word_path
+        finally:
+            if profiler is not None:
+                # 转换失败时也写出，便于分析出错前的耗时
+                self.progress.unsubscribe(profiler)
+                output_dir = profile_path(word_path)
+                profiler.write(output_dir)
+                self.progress.message(f"性能分析结果已保存: {output_dir}")
+    
+    def _update_index(self, word_path: str):
+        """把输出文档加入全文检索索引（失败时只警告，不影响转换结果）"""
+        with self.progress.stage(STAGE_INDEX, "正在更新检索索引..."):
+            try:
+                self.search_index.add_document(word_path, force=True)
+            except Exception as e:
+                self.progress.warning(f"⚠ 检索索引更新失败: {e}")
+    
+    def _convert_document(self, pdf_path: str, word_path: str, use_ocr: Optional[bool],
+                          hybrid: bool, incremental: bool) -> str:
+        """选择转换方式并转换（参数同 convert_pdf_to_word）"""
+        if hybrid and not self.ocr_available:
+            self.progress.warning("警告: OCR功能未安装，无法逐页识别，将尝试直接转换...")
+            hybrid = False
+            use_ocr = False
+        
         # 自动检测是否需要OCR
-        if use_ocr is None:
-            has_text = self.check_pdf_has_text(pdf_path)
-            use_ocr = not has_text
-            if use_ocr:
-                print(f"检测到扫描版PDF，将使用OCR识别文字...")
+        if use_ocr is None and not hybrid:
+            with self.progress.stage(STAGE_CLASSIFY):
+                kinds = self.classify_pages(pdf_path)
+            text_pages = kinds.count(PAGE_TEXT)
+            scan_pages = kinds.count(PAGE_SCAN)
+            # 自动逐页处理要求 Tesseract 确实可用，否则图片页只会得到识别失败的占位文字
+            if text_pages and scan_pages and tesseract_available():
+                self.progress.message(f"检测到混合型PDF（{text_pages} 页文本页，"
+                                      f"{scan_pages} 页扫描页），将逐页处理...")
+                hybrid = True
             else:
-                print(f"检测到文本型PDF，直接提取文字...")
+                use_ocr = scan_pages > text_pages
+                if use_ocr:
+                    self.progress.message("检测到扫描版PDF，将使用OCR识别文字...")
+                else:
+                    self.progress.message("检测到文本型PDF，直接提取文字...")
         
         # 如果需要OCR但不可用
         if use_ocr and not self.ocr_available:
-            print("警告: OCR功能未安装，将尝试直接转换...")
-            print("提示: 安装 pytesseract 和 pdf2image 以支持扫描版PDF")
+            self.progress.warning("警告: OCR功能未安装，将尝试直接转换...")
+            self.progress.message("提示: 安装 pytesseract 和 pdf2image 以支持扫描版PDF")
             use_ocr = False
         
+        self.ocr_failures = []
+        self.ocr_page_info = []
         try:
-            if use_ocr:
+            if incremental:
+                # 增量转换总是逐页处理；use_ocr 为 None 时按每页类型决定是否OCR
+                return self._convert_incremental(pdf_path, word_path, use_ocr)
+            elif hybrid:
+                return self._convert_hybrid(pdf_path, word_path)
+            elif use_ocr:
                 # 使用OCR方式
                 return self._convert_with_ocr(pdf_path, word_path)
             else:
                 # 使用标准方式
-                print(f"正在转换 {pdf_path} 到 {word_path}...")
-                print("正在提取PDF文字内容...")
-                cv = Converter(pdf_path)
-                cv.convert(word_path)
-                cv.close()
-                print(f"✓ 文字提取和转换完成！文件保存在: {word_path}")
-                self.converted_file = word_path
-                return word_path
+                return self._convert_standard(pdf_path, word_path)
         except Exception as e:
             raise Exception(f"转换失败: {str(e)}")
     
-    def _convert_with_ocr(self, pdf_path: str, word_path: str) -> str:
+    def _convert_standard(self, pdf_path: str, word_path: str) -> str:
         """
-        使用OCR方式转换扫描版PDF（识别图片中的文字）
+        使用 pdf2docx 转换文本型PDF（直接提取文字并保留版式）
         
         Args:
             pdf_path: PDF 文件路径
@@ -114,38 +512,702 @@ class PDFToWordConverter:
         Returns:
             生成的 Word 文件路径
         """
-        print(f"正在使用OCR识别 {pdf_path} 中的文字...")
+        self.progress.message(f"正在转换 {pdf_path} 到 {word_path}...")
+        document = self.open_document(pdf_path)
+        # 每个进程至少分到 _MIN_SHARD_PAGES 页，页数太少时不分片
+        shards = min(self.convert_workers, document.page_count // _MIN_SHARD_PAGES)
+        if shards > 1:
+            # 分片在各进程中自行打开 PDF，当前进程不需要 pdf2docx 转换器
+            self._convert_sharded(pdf_path, word_path, document.page_count, shards)
+        else:
+            # pdf2docx 在转换结束时直接保存，保存耗时计入版面重建
+            with self.progress.stage(STAGE_LAYOUT, "正在提取PDF文字内容...",
+                                     document.page_count):
+                document.pdf2docx().convert(word_path)
+        self.progress.message(f"✓ 文字提取和转换完成！文件保存在: {word_path}")
+        self.converted_file = word_path
+        return word_path
+    
+    def open_document(self, pdf_path: str) -> PDFDocument:
+        """
+        获取 PDF 的文档句柄（页数、元数据、页面类型等只解析一次，按文件缓存）
         
-        # 将PDF转换为图片
-        print("步骤 1/3: 将PDF页面转换为图片...")
-        images = convert_from_path(pdf_path, dpi=300)
+        在 with 语句中使用，最后一个使用者退出时关闭解析器。
         
-        # 创建新的Word文档
-        doc = Document()
+        Args:
+            pdf_path: PDF 文件路径
+            
+        Returns:
+            PDFDocument
+        """
+        return self.documents.open(pdf_path)
+    
+    def classify_pages(self, pdf_path: str) -> List[str]:
+        """
+        逐页判断页面类型（检查内容流，不提取文字；结果随文档句柄缓存）
         
-        # 对每一页进行OCR识别
-        print(f"步骤 2/3: 识别文字（共 {len(images)} 页）...")
-        for i, image in enumerate(images, 1):
-            print(f"  正在识别第 {i}/{len(images)} 页...")
+        Args:
+            pdf_path: PDF 文件路径
             
-            # 使用Tesseract进行OCR
-            # 支持中文和英文
-            text = pytesseract.image_to_string(image, lang='chi_sim+eng')
+        Returns:
+            每页类型列表：'text'（有文字层）、'scan'（扫描/图片页）、'blank'（空白页）
+        """
+        # 在转换之外调用时，退出后立即关闭为此打开的解析器
+        with self.open_document(pdf_path) as document:
+            return document.page_kinds
+    
+    def _convert_sharded(self, pdf_path: str, word_path: str, page_count: int, shards: int):
+        """
+        把页码范围均分为若干连续分片，在进程池中分别用 pdf2docx 转换，
+        再按顺序合并（各分片的样式和分节设置保持不变）
+        
+        Args:
+            pdf_path: PDF 文件路径
+            word_path: 输出的 Word 文件路径
+            page_count: PDF 总页数
+            shards: 分片数（同时也是进程数）
+        """
+        bounds = [page_count * i // shards for i in range(shards + 1)]
+        with tempfile.TemporaryDirectory(prefix='pdf2word_shards_') as tmp_dir, \
+                ProcessPoolExecutor(max_workers=shards) as executor:
+            with self.progress.stage(STAGE_LAYOUT, f"按页码分为 {shards} 片并行转换...",
+                                     page_count):
+                futures = [executor.submit(_convert_shard, pdf_path, bounds[i], bounds[i + 1],
+                                           os.path.join(tmp_dir, f'shard_{i:04d}.docx'))
+                           for i in range(shards)]
+                parts = [future.result() for future in futures]
+            with self.progress.stage(STAGE_MERGE, "正在合并分片..."):
+                merge_documents(parts, word_path)
+    
+    def _convert_hybrid(self, pdf_path: str, word_path: str) -> str:
+        """
+        混合模式转换：文本页用 pdf2docx 提取，图片页用 OCR 识别，按页码顺序合并
+        
+        Args:
+            pdf_path: PDF 文件路径
+            word_path: 输出的 Word 文件路径
             
-            # 添加到Word文档
-            if i > 1:
-                doc.add_page_break()
+        Returns:
+            生成的 Word 文件路径
+        """
+        # 只有扫描页需要OCR，空白页交给 pdf2docx
+        with self.progress.stage(STAGE_CLASSIFY):
+            kinds = self.classify_pages(pdf_path)
+        page_types = [kind != PAGE_SCAN for kind in kinds]
+        page_count = len(page_types)
+        text_count = sum(page_types)
+        self.progress.message(f"逐页检测完成：{text_count} 页文本页，"
+                              f"{page_count - text_count} 页图片页")
+        
+        # 全部同类时无需拆分
+        if text_count == page_count:
+            return self._convert_standard(pdf_path, word_path)
+        if text_count == 0:
+            return self._convert_with_ocr(pdf_path, word_path)
+        
+        # 把连续同类页面分为一段 [(是否文本页, [页码, ...]), ...]
+        runs = []
+        for page, is_text in enumerate(page_types, 1):
+            if runs and runs[-1][0] == is_text:
+                runs[-1][1].append(page)
+            else:
+                runs.append((is_text, [page]))
+        
+        # 按全部图片页抽样检测语言，之后各段OCR复用同一结果
+        self._resolve_ocr_lang(pdf_path, [page for page, is_text in
+                                          enumerate(page_types, 1) if not is_text])
+        
+        executor = self._create_ocr_executor()
+        cv = self.open_document(pdf_path).pdf2docx()
+        try:
+            with tempfile.TemporaryDirectory(prefix='pdf2word_hybrid_') as tmp_dir:
+                parts = []
+                for index, (is_text, pages) in enumerate(runs):
+                    part_path = os.path.join(tmp_dir, f'part_{index:04d}.docx')
+                    if is_text:
+                        with self.progress.stage(
+                                STAGE_LAYOUT, f"正在提取第 {pages[0]}-{pages[-1]} 页的文字...",
+                                len(pages)):
+                            cv.convert(part_path, pages=[page - 1 for page in pages])
+                    else:
+                        self.progress.message(f"正在识别第 {pages[0]}-{pages[-1]} 页的文字...")
+                        failures = len(self.ocr_failures)
+                        doc = self._ocr_to_document(pdf_path, pages, page_count, executor)
+                        failed = {page for page, _ in self.ocr_failures[failures:]}
+                        if failed:
+                            parts.extend(self._fallback_failed_pages(
+                                doc, pages, failed, cv, os.path.join(tmp_dir, f'part_{index:04d}')))
+                            continue
+                        doc.save(part_path)
+                    parts.append(part_path)
+                
+                with self.progress.stage(STAGE_MERGE, "正在合并文档..."):
+                    doc = Document(parts[0])
+                    for part_path in parts[1:]:
+                        append_document(doc, Document(part_path))
+                if self.ocr_adaptive_dpi is not None:
+                    write_ocr_page_info(doc, self.ocr_page_info)
+                with self.progress.stage(STAGE_SAVE):
+                    doc.save(word_path)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        self._print_ocr_summary(page_count)
+        self.progress.message(f"✓ 混合转换完成！文件保存在: {word_path}")
+        self.converted_file = word_path
+        return word_path
+    
+    def _fallback_failed_pages(self, doc: Document, pages: List[int], failed: set, cv,
+                               path_prefix: str) -> List[str]:
+        """
+        混合模式中OCR失败的页面改用 pdf2docx 转换，不在文档中留下占位文字
+        
+        把一段图片页的识别结果按页拆开，连续的成功页和失败页各成一段。
+        
+        Args:
+            doc: _ocr_to_document 生成的文档（每页之间分页）
+            pages: 该文档对应的页码列表
+            failed: 识别失败的页码
+            cv: pdf2docx 转换器
+            path_prefix: 各段文件路径的前缀
+            
+        Returns:
+            按页码顺序的各段文件路径
+        """
+        self.progress.warning(f"第 {', '.join(map(str, sorted(failed)))} 页识别失败，"
+                              f"改用 pdf2docx 直接转换")
+        # 连续的成功页和失败页分为一组 [(是否失败, [(页码, 片段), ...]), ...]
+        groups = []
+        for page, elements in zip(pages, document_pages(doc, split_page_breaks=True)):
+            if groups and groups[-1][0] == (page in failed):
+                groups[-1][1].append((page, elements))
+            else:
+                groups.append((page in failed, [(page, elements)]))
+        
+        paths = []
+        for number, (is_failed, items) in enumerate(groups):
+            path = f'{path_prefix}_{number:02d}.docx'
+            if is_failed:
+                with self.progress.stage(STAGE_LAYOUT, page_count=len(items)):
+                    cv.convert(path, pages=[page - 1 for page, _ in items])
+            else:
+                part = Document()
+                sect_pr = part.element.body.sectPr
+                for position, (_, elements) in enumerate(items):
+                    if position:
+                        part.add_page_break()
+                    # 片段最后是 document_pages 补上的分节段落，不需要
+                    for element in elements[:-1]:
+                        sect_pr.addprevious(element)
+                part.save(path)
+            paths.append(path)
+        
+        # 失败页没有使用OCR结果，不再记录其分辨率和置信度
+        self.ocr_page_info = [info for info in self.ocr_page_info if info['page'] not in failed]
+        return paths
+    
+    def _convert_incremental(self, pdf_path: str, word_path: str,
+                             use_ocr: Optional[bool]) -> str:
+        """
+        增量转换：只重新转换内容指纹有变化的页面，拼接到已有的输出文档中
+        
+        输出文档旁的清单记录每页的内容指纹和转换方式（'text' 或 'ocr'）。
+        再次转换时，指纹和转换方式都相同的页面直接复用已有文档中的内容
+        （按指纹匹配，页面插入、删除、移动后也能复用），其余页面逐页转换后
+        按页码顺序拼接。输出文档在上次转换后被修改过、转换参数变化或清单
+        缺失时，全部页面重新转换。
+        
+        Args:
+            pdf_path: PDF 文件路径
+            word_path: 输出的 Word 文件路径
+            use_ocr: True=全部页面OCR，False=全部直接提取，None=扫描页OCR、其余直接提取
             
-            doc.add_paragraph(text)
+        Returns:
+            生成的 Word 文件路径
+        """
+        self.progress.message(f"正在增量转换 {pdf_path} 到 {word_path}...")
+        document = self.open_document(pdf_path)
+        with self.progress.stage(STAGE_CLASSIFY):
+            fingerprints = document.fingerprints
+            kinds = document.page_kinds
+        page_count = len(fingerprints)
+        ocr_enabled = self.ocr_available and use_ocr is not False
+        modes = ['ocr' if ocr_enabled and (use_ocr or kind == PAGE_SCAN) else 'text'
+                 for kind in kinds]
+        options = self._incremental_options()
+        old_doc, old_entries, old_pages = self._load_incremental_state(word_path, options)
+        
+        # 按 (指纹, 转换方式) 为每页找一个可复用的旧页面
+        available = {}
+        for index, entry in enumerate(old_entries):
+            available.setdefault((entry['hash'], entry['mode']), []).append(index)
+        plan = []
+        for fingerprint, mode in zip(fingerprints, modes):
+            candidates = available.get((fingerprint, mode))
+            plan.append(candidates.pop(0) if candidates else None)
+        changed = [page for page, old in enumerate(plan, 1) if old is None]
+        
+        if not changed and plan == list(range(len(old_entries))):
+            self.ocr_page_info = [{'page': page, 'dpi': entry['dpi'],
+                                   'confidence': entry['confidence']}
+                                  for page, entry in enumerate(old_entries, 1) if 'dpi' in entry]
+            self.progress.message(f"✓ {page_count} 页均未变化，无需重新转换: {word_path}")
+            self.converted_file = word_path
+            return word_path
+        self.progress.message(f"{page_count - len(changed)} 页未变化，{len(changed)} 页需要转换")
+        
+        new_pages = self._convert_pages(pdf_path, changed, modes, page_count)
+        with self.progress.stage(STAGE_MERGE, "正在拼接文档..."):
+            doc = old_doc if old_doc is not None else Document()
+            assemble_pages(doc, [new_pages[page] if old is None else (old_doc, old_pages[old])
+                                 for page, old in enumerate(plan, 1)])
+        
+        # 新清单：复用页沿用旧记录，新转换的页记录OCR分辨率和置信度，失败页不记指纹
+        ocr_info = {info['page']: info for info in self.ocr_page_info}
+        failed = {page for page, _ in self.ocr_failures}
+        entries = []
+        for page, (fingerprint, mode, old) in enumerate(zip(fingerprints, modes, plan), 1):
+            if old is not None:
+                entry = dict(old_entries[old])
+            else:
+                entry = {'hash': None if page in failed else fingerprint, 'mode': mode}
+                if page in ocr_info:
+                    entry['dpi'] = ocr_info[page]['dpi']
+                    entry['confidence'] = ocr_info[page]['confidence']
+            entries.append(entry)
+        self.ocr_page_info = [{'page': page, 'dpi': entry['dpi'], 'confidence': entry['confidence']}
+                              for page, entry in enumerate(entries, 1) if 'dpi' in entry]
+        if self.ocr_adaptive_dpi is not None:
+            write_ocr_page_info(doc, self.ocr_page_info)
+        
+        with self.progress.stage(STAGE_SAVE):
+            doc.save(word_path)
+            save_manifest(word_path, {'docx': file_hash(word_path), 'options': options,
+                                      'pages': entries})
+        if self.ocr_failures:
+            self._print_ocr_summary(page_count)
+        self.progress.message(f"✓ 增量转换完成！文件保存在: {word_path}")
+        self.converted_file = word_path
+        return word_path
+    
+    def _incremental_options(self) -> dict:
+        """影响输出内容的转换参数（与上次不同时增量转换不复用旧页面）"""
+        return {
+            'ocr_dpi': self.ocr_dpi,
+            'ocr_lang': self.ocr_lang,
+            'ocr_config': self.ocr_config,
+            'ocr_adaptive_dpi': self.ocr_adaptive_dpi,
+            'ocr_min_confidence': self.ocr_min_confidence,
+            'ocr_preprocessor': repr(self.ocr_preprocessor),
+            'ocr_layout': self.ocr_layout,
+        }
+    
+    def _load_incremental_state(self, word_path: str, options: dict) -> tuple:
+        """
+        读取上次转换的清单和输出文档
+        
+        Args:
+            word_path: Word 文件路径
+            options: 本次的转换参数
+            
+        Returns:
+            (旧文档, 清单中的页面记录, 旧文档的逐页片段)，无法复用时为 (None, [], [])
+        """
+        manifest = load_manifest(word_path)
+        if manifest is None or not os.path.exists(word_path):
+            return None, [], []
+        if manifest.get('options') != options:
+            self.progress.message("转换参数已变化，全部页面重新转换...")
+            return None, [], []
+        if file_hash(word_path) != manifest.get('docx'):
+            self.progress.message("输出文档在上次转换后被修改过，全部页面重新转换...")
+            return None, [], []
+        try:
+            doc = Document(word_path)
+            pages = document_pages(doc)
+        except Exception as e:
+            self.progress.warning(f"无法读取已有文档（{e}），全部页面重新转换...")
+            return None, [], []
+        if len(pages) != len(manifest['pages']):
+            self.progress.message("已有文档与清单页数不一致，全部页面重新转换...")
+            return None, [], []
+        return doc, manifest['pages'], pages
+    
+    def _convert_pages(self, pdf_path: str, pages: List[int], modes: List[str],
+                       page_count: int) -> Dict[int, tuple]:
+        """
+        逐页转换指定页面（文本页用 pdf2docx，扫描页用OCR）
+        
+        Args:
+            pdf_path: PDF 文件路径
+            pages: 要转换的页码列表（从1开始，升序）
+            modes: 每页的转换方式（'text' 或 'ocr'），按页码顺序
+            page_count: PDF 总页数
+            
+        Returns:
+            {页码: (所在的 Document, 该页的片段)}，片段格式同 document_pages
+        """
+        text_pages = [page for page in pages if modes[page - 1] == 'text']
+        ocr_pages = [page for page in pages if modes[page - 1] == 'ocr']
+        results = {}
+        with tempfile.TemporaryDirectory(prefix='pdf2word_incremental_') as tmp_dir:
+            if text_pages:
+                # 每页单独转换为一个文档，页面边界即文档边界
+                shards = [(pdf_path, page - 1, page, os.path.join(tmp_dir, f'page_{page:05d}.docx'))
+                          for page in text_pages]
+                workers = min(self.convert_workers, len(shards))
+                with self.progress.stage(STAGE_LAYOUT, f"正在提取 {len(text_pages)} 页的文字...",
+                                         len(text_pages)):
+                    if workers > 1:
+                        with ProcessPoolExecutor(max_workers=workers) as executor:
+                            parts = list(executor.map(_convert_shard, *zip(*shards)))
+                    else:
+                        cv = self.open_document(pdf_path).pdf2docx()
+                        for _, start, end, part_path in shards:
+                            cv.convert(part_path, start=start, end=end)
+                        parts = [part_path for *_, part_path in shards]
+                for page, part_path in zip(text_pages, parts):
+                    doc = Document(part_path)
+                    results[page] = (doc, document_pages(doc)[0])
+            
+            if ocr_pages:
+                self.progress.message(f"正在识别 {len(ocr_pages)} 页的文字...")
+                executor = self._create_ocr_executor()
+                try:
+                    doc = self._ocr_to_document(pdf_path, ocr_pages, page_count, executor)
+                finally:
+                    if executor is not None:
+                        executor.shutdown()
+                for page, elements in zip(ocr_pages, document_pages(doc, split_page_breaks=True)):
+                    results[page] = (doc, elements)
+        return results
+    
+    def _create_ocr_executor(self) -> Optional[ProcessPoolExecutor]:
+        """按 ocr_workers 创建OCR进程池（单进程时返回 None）"""
+        if self.ocr_workers > 1:
+            return ProcessPoolExecutor(max_workers=self.ocr_workers)
+        return None
+    
+    def _convert_with_ocr(self, pdf_path: str, word_path: str) -> str:
+        """
+        使用OCR方式转换扫描版PDF（识别图片中的文字）
+        
+        Args:
+            pdf_path: PDF 文件路径
+            word_path: 输出的 Word 文件路径
+            
+        Returns:
+            生成的 Word 文件路径
+        """
+        self.progress.message(f"正在使用OCR识别 {pdf_path} 中的文字...")
+        
+        page_count = self.open_document(pdf_path).page_count
+        
+        self.progress.message(f"步骤 1/2: 渲染并识别文字（共 {page_count} 页，"
+                              f"{self.ocr_workers} 个进程）...")
+        executor = self._create_ocr_executor()
+        try:
+            doc = self._ocr_to_document(pdf_path, list(range(1, page_count + 1)),
+                                        page_count, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        if self.ocr_adaptive_dpi is not None:
+            # 每页使用的分辨率和置信度记录在文档中
+            write_ocr_page_info(doc, self.ocr_page_info)
+        self._print_ocr_summary(page_count)
         
         # 保存Word文档
-        print(f"步骤 3/3: 保存文档...")
-        doc.save(word_path)
-        print(f"✓ OCR识别和转换完成！文件保存在: {word_path}")
+        with self.progress.stage(STAGE_SAVE, "步骤 2/2: 保存文档..."):
+            doc.save(word_path)
+        self.progress.message(f"✓ OCR识别和转换完成！文件保存在: {word_path}")
         
         self.converted_file = word_path
         return word_path
     
+    def _ocr_to_document(self, pdf_path: str, pages: List[int], page_count: int,
+                         executor: Optional[ProcessPoolExecutor]) -> Document:
+        """
+        识别指定页面并生成新的 Word 文档（每页之间分页）
+        
+        页面按窗口由 poppler 多线程渲染为灰度图片文件，写入临时目录，OCR
+        直接读取文件路径；识别当前窗口时在后台渲染下一个窗口。每个窗口识别
+        完成后立即删除其图片，临时目录在任何情况下都会被清理。
+        每页使用的分辨率和置信度追加到 self.ocr_page_info。
+        
+        Args:
+            pdf_path: PDF 文件路径
+            pages: 要识别的页码列表（从1开始，升序）
+            page_count: PDF 总页数（用于显示进度）
+            executor: OCR 进程池（None=在当前进程中串行识别）
+            
+        Returns:
+            包含识别结果的 Document
+        """
+        # 自适应模式先用低分辨率识别，置信度不足的页面再用 ocr_dpi 重新识别
+        adaptive = self.ocr_adaptive_dpi is not None
+        first_dpi = self.ocr_adaptive_dpi if adaptive else self.ocr_dpi
+        # 需要置信度或段落结构时使用 TSV 输出
+        structured = adaptive or self.ocr_layout
+        
+        lang = self._resolve_ocr_lang(pdf_path, pages)
+        
+        # 窗口至少要能让每个进程分到一页
+        window = max(self.ocr_window, self.ocr_workers)
+        
+        doc = Document()
+        windows = [pages[i:i + window] for i in range(0, len(pages), window)]
+        if not windows:
+            return doc
+        
+        # 退出时先等待后台渲染结束，再删除临时目录；OCR 阶段的耗时包含与识别
+        # 重叠的后台渲染，渲染本身的耗时另见 STAGE_RENDER 事件
+        with self.progress.stage(STAGE_OCR, page_count=len(pages)), \
+                tempfile.TemporaryDirectory(prefix='pdf2word_pages_') as tmp_dir, \
+                ThreadPoolExecutor(max_workers=1) as renderer:
+            rendering = renderer.submit(self._render_pages, pdf_path, windows[0],
+                                        first_dpi, tmp_dir)
+            for index, window_pages in enumerate(windows):
+                paths = rendering.result()
+                if index + 1 < len(windows):
+                    rendering = renderer.submit(self._render_pages, pdf_path,
+                                                windows[index + 1], first_dpi, tmp_dir)
+                
+                results = self._ocr_images(list(zip(window_pages, paths)), page_count,
+                                           executor, lang, first_dpi, structured)
+                for path in paths:
+                    os.remove(path)
+                
+                dpis = dict.fromkeys(results, first_dpi)
+                if adaptive:
+                    # 没有置信度（未识别出文字）也算置信度不足；识别失败的页面不再重试
+                    failed = {page for page, _ in self.ocr_failures}
+                    low_pages = [page for page, (_, confidence) in sorted(results.items())
+                                 if page not in failed
+                                 and (confidence is None
+                                      or confidence < self.ocr_min_confidence)]
+                    if low_pages:
+                        self.progress.message(
+                            f"  第 {', '.join(map(str, low_pages))} 页置信度低于 "
+                            f"{self.ocr_min_confidence}，使用 {self.ocr_dpi} DPI 重新识别...")
+                        failures = len(self.ocr_failures)
+                        retried = self._ocr_pages_at(pdf_path, low_pages, page_count,
+                                                     executor, lang, self.ocr_dpi, tmp_dir)
+                        # 重新识别失败或置信度更低时保留第一次的结果，该页不算识别失败
+                        del self.ocr_failures[failures:]
+                        for page, (text, confidence) in retried.items():
+                            first = results[page][1]
+                            if confidence is not None and (first is None or confidence >= first):
+                                results[page] = (text, confidence)
+                                dpis[page] = self.ocr_dpi
+                
+                # 按页码顺序添加到Word文档
+                for page in sorted(results):
+                    text, confidence = results[page]
+                    if page != pages[0]:
+                        doc.add_page_break()
+                    if self.ocr_layout:
+                        # 空行分隔段落，段落内的换行由 python-docx 转为 Word 换行符
+                        for paragraph in text.split('\n\n'):
+                            doc.add_paragraph(paragraph)
+                    else:
+                        doc.add_paragraph(text)
+                    self.ocr_page_info.append(
+                        {'page': page, 'dpi': dpis[page], 'confidence': confidence})
+        return doc
+    
+    def _resolve_ocr_lang(self, pdf_path: str, pages: List[int]) -> str:
+        """
+        确定本文档OCR使用的语言
+        
+        ocr_lang='auto' 时，从待识别页面中均匀抽取几页，用低分辨率渲染后
+        交给 Tesseract OSD 检测文字系统，选择能覆盖所有抽样页的最小语言组合，
+        避免纯英文文档也加载中文模型。结果按文件缓存。
+        
+        Args:
+            pdf_path: PDF 文件路径
+            pages: 待识别的页码列表
+            
+        Returns:
+            Tesseract 语言字符串（如 'eng'、'chi_sim+eng'）
+        """
+        if self.ocr_lang != OCR_LANG_AUTO:
+            return self.ocr_lang
+        
+        key = self.open_document(pdf_path).key
+        if key in self._lang_cache:
+            return self._lang_cache[key]
+        
+        # 抽样包含首页和末页
+        count = min(_LANG_PROBE_PAGES, len(pages))
+        probe_pages = sorted({pages[i * (len(pages) - 1) // max(count - 1, 1)]
+                              for i in range(count)})
+        codes = []
+        with self.progress.stage(STAGE_DETECT_LANG, page_count=len(probe_pages)), \
+                tempfile.TemporaryDirectory(prefix='pdf2word_probe_') as tmp_dir:
+            for page in probe_pages:
+                script = self._detect_script(
+                    self._render_pages(pdf_path, [page], _LANG_PROBE_DPI, tmp_dir)[0])
+                for code in SCRIPT_LANGS.get(script, DEFAULT_OCR_LANG).split('+'):
+                    if code not in codes:
+                        codes.append(code)
+        
+        # 保持 chi_sim+eng 这类"主语言在前"的顺序，英文放最后
+        codes.sort(key=lambda code: code == 'eng')
+        lang = '+'.join(codes) or DEFAULT_OCR_LANG
+        self.progress.message(f"自动检测识别语言: {lang}"
+                              f"（抽样第 {', '.join(map(str, probe_pages))} 页）")
+        self._lang_cache[key] = lang
+        return lang
+    
+    @staticmethod
+    def _detect_script(image) -> Optional[str]:
+        """用 Tesseract OSD 检测页面的文字系统，检测失败时返回 None"""
+        try:
+            osd = pytesseract.image_to_osd(image, config='--psm 0')
+        except pytesseract.TesseractError:
+            # 页面文字太少或未安装 osd.traineddata
+            return None
+        match = re.search(r'Script:\s*(\w+)', osd)
+        return match.group(1) if match else None
+    
+    def _print_ocr_summary(self, page_count: int):
+        """输出最近一次转换的自适应DPI、缓存命中和失败页统计"""
+        if self.ocr_adaptive_dpi is not None:
+            escalated = sum(1 for info in self.ocr_page_info if info['dpi'] == self.ocr_dpi)
+            self.progress.message(f"自适应DPI: {escalated}/{page_count} 页使用 "
+                                  f"{self.ocr_dpi} DPI 重新识别")
+        if self.ocr_cache is not None:
+            stats = self.ocr_cache.stats()
+            self.progress.message(f"OCR 缓存: 命中 {stats['hits']} 页，"
+                                  f"未命中 {stats['misses']} 页")
+        if self.ocr_failures:
+            self.progress.warning(f"警告: {len(self.ocr_failures)} 页识别失败: "
+                                  f"{', '.join(str(page) for page, _ in self.ocr_failures)}")
+    
+    def _render_pages(self, pdf_path: str, pages: List[int], dpi: int,
+                      output_dir: str) -> List[str]:
+        """
+        把指定页面渲染为灰度图片文件（连续页面合并为一次 poppler 调用，
+        可能在后台线程中执行）
+        
+        Args:
+            pdf_path: PDF 文件路径
+            pages: 页码列表（从1开始，升序）
+            dpi: 渲染分辨率
+            output_dir: 图片输出目录
+            
+        Returns:
+            与 pages 一一对应的图片文件路径列表
+        """
+        paths = []
+        start = 0
+        with self.progress.stage(STAGE_RENDER, page_count=len(pages)):
+            for i in range(1, len(pages) + 1):
+                if i == len(pages) or pages[i] != pages[i - 1] + 1:
+                    paths.extend(convert_from_path(
+                        pdf_path, dpi=dpi, first_page=pages[start], last_page=pages[i - 1],
+                        output_folder=output_dir, paths_only=True, grayscale=True,
+                        thread_count=self.ocr_render_threads))
+                    start = i
+        return paths
+    
+    def _ocr_pages_at(self, pdf_path: str, pages: List[int], page_count: int,
+                      executor: Optional[ProcessPoolExecutor], lang: str, dpi: int,
+                      output_dir: str) -> Dict[int, Tuple[str, Optional[float]]]:
+        """以指定分辨率重新渲染并识别若干页（页数不超过一个窗口）"""
+        paths = self._render_pages(pdf_path, pages, dpi, output_dir)
+        try:
+            return self._ocr_images(list(zip(pages, paths)), page_count, executor, lang,
+                                    dpi, True)
+        finally:
+            for path in paths:
+                os.remove(path)
+    
+    def _ocr_images(self, pages: List[Tuple[int, str]], page_count: int,
+                    executor: Optional[ProcessPoolExecutor], lang: str, dpi: int,
+                    structured: bool = False) -> Dict[int, Tuple[str, Optional[float]]]:
+        """
+        识别一组页面图片文件
+        
+        命中 OCR 缓存的页面不再识别。单页失败不会中断整个转换：失败页
+        记录到 self.ocr_failures，并在文档中以占位文字代替（不写入缓存）。
+        
+        Args:
+            pages: [(页码, 页面图片路径), ...]
+            page_count: PDF 总页数（用于显示进度）
+            executor: 进程池（None=在当前进程中串行识别）
+            lang: Tesseract 识别语言
+            dpi: 图片的渲染分辨率（用于缓存键）
+            structured: 是否使用 TSV 结构化输出（段落结构和平均置信度）
+            
+        Returns:
+            {页码: (文字, 平均置信度)}
+        """
+        results = {}
+        cache_keys = {}
+        pending = []
+        cache_config = (f"{self.ocr_config}|structured={structured}"
+                        f"|preprocess={self.ocr_preprocessor!r}")
+        for page, image in pages:
+            if self.ocr_cache is not None:
+                key = OCRCache.make_key(image, lang, dpi, cache_config)
+                cached = self.ocr_cache.get(key)
+                if cached is not None:
+                    results[page] = tuple(json.loads(cached))
+                    continue
+                cache_keys[page] = key
+            pending.append((page, image))
+        
+        # 划分识别任务：page 后端每页一个任务，batch 后端每个进程一组页面
+        if self.ocr_backend == 'batch' and pending:
+            groups = self.ocr_workers if executor is not None else 1
+            size = -(-len(pending) // groups)
+            chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+        else:
+            chunks = [[item] for item in pending]
+        
+        args = (lang, self.ocr_backend, self.ocr_config, structured,
+                self.ocr_preprocessor)
+        futures = None
+        if executor is not None:
+            futures = [executor.submit(_ocr_chunk, [image for _, image in chunk], *args)
+                       for chunk in chunks]
+        
+        failed = set()
+        for index, chunk in enumerate(chunks):
+            numbers = [page for page, _ in chunk]
+            if len(numbers) > 1:
+                text = f"正在识别第 {numbers[0]}-{numbers[-1]}/{page_count} 页..."
+            else:
+                text = f"正在识别第 {numbers[0]}/{page_count} 页..."
+            self.progress.page(STAGE_OCR, numbers[0], page_count, text)
+            try:
+                if futures is not None:
+                    chunk_results = futures[index].result()
+                else:
+                    chunk_results = _ocr_chunk([image for _, image in chunk], *args)
+                results.update(zip(numbers, chunk_results))
+            except Exception as e:
+                # 整组失败时逐页重试，只把真正失败的页面记为失败
+                for page, image in chunk:
+                    try:
+                        if len(chunk) == 1:
+                            raise e
+                        results[page] = _ocr_chunk([image], *args)[0]
+                    except Exception as page_error:
+                        self.ocr_failures.append((page, str(page_error)))
+                        results[page] = (f"[第 {page} 页识别失败: {page_error}]", None)
+                        failed.add(page)
+        
+        for page, key in cache_keys.items():
+            if page not in failed:
+                self.ocr_cache.put(key, json.dumps(results[page]))
+        
+        return results
+    
     def search_keyword(self, word_path: str, keyword: str) -> List[Tuple[int, str]]:
         """
         在 Word 文档中搜索关键词
@@ -160,14 +1222,42 @@ class PDFToWordConverter:
         if not os.path.exists(word_path):
             raise FileNotFoundError(f"Word 文件不存在: {word_path}")
         
-        doc = Document(word_path)
-        results = []
+        # 只读操作：流式解析正文 XML，不构建整个文档的对象模型
+        return stream_search(word_path, keyword)
+    
+    def _usable_keywords(self, keywords: List[str]) -> List[str]:
+        """去掉空白的关键词，并提示被忽略的个数"""
+        usable = [keyword for keyword in keywords if keyword.strip()]
+        if len(usable) < len(keywords):
+            self.progress.warning(f"⚠ 已忽略 {len(keywords) - len(usable)} 个空白关键词")
+        return usable
+    
+    def search_keywords(self, word_path: str, keywords: List[str]) -> Dict[str, List[dict]]:
+        """
+        在 Word 文档中同时搜索多个关键词
         
-        for idx, para in enumerate(doc.paragraphs):
-            if keyword.lower() in para.text.lower():
-                results.append((idx, para.text))
+        一次流式遍历全部文本容器：正文、文本框、内容控件、表格、页眉页脚、
+        脚注和尾注（search_keyword 只搜索正文段落），范围与 highlight_keywords
+        相同，耗时与关键词个数基本无关。
         
-        return results
+        Args:
+            word_path: Word 文件路径
+            keywords: 要搜索的关键词列表（不区分大小写，空白的关键词忽略）
+            
+        Returns:
+            {关键词: [{'part': 'body'/'textbox'/'table'/'sdt'/'header'/'footer'/
+                       'footnote'/'endnote', 'paragraph': 段落索引,
+                       'offset': 在段落中的位置, 'text': 段落内容, ...}, ...]}，
+            位置字段见 keyword_search.text_paragraphs
+        """
+        if not os.path.exists(word_path):
+            raise FileNotFoundError(f"Word 文件不存在: {word_path}")
+        
+        keywords = self._usable_keywords(list(keywords))
+        if not keywords:
+            self.progress.warning("没有要搜索的关键词")
+            return {}
+        return stream_search_keywords(word_path, keywords)
     
     def highlight_keyword(self, word_path: str, keyword: str, output_path: str = None):
         """
@@ -178,23 +1268,42 @@ class PDFToWordConverter:
             keyword: 要高亮的关键词
             output_path: 输出文件路径（可选）
         """
+        return self.highlight_keywords(word_path, [keyword], output_path)
+    
+    def highlight_keywords(self, word_path: str, keywords: List[str],
+                           output_path: str = None) -> str:
+        """
+        在 Word 文档中同时高亮多个关键词（一次遍历，不区分大小写）
+        
+        只高亮匹配到的字符：文字块只有一部分匹配时在匹配边界处拆分，
+        跨越多个文字块的匹配也能高亮。范围与 search_keywords 相同。
+        
+        Args:
+            word_path: Word 文件路径
+            keywords: 要高亮的关键词列表（空白的关键词忽略）
+            output_path: 输出文件路径（可选）
+            
+        Returns:
+            保存的文件路径
+        """
         if not os.path.exists(word_path):
             raise FileNotFoundError(f"Word 文件不存在: {word_path}")
         
         doc = Document(word_path)
-        
-        for para in doc.paragraphs:
-            if keyword.lower() in para.text.lower():
-                for run in para.runs:
-                    if keyword.lower() in run.text.lower():
-                        run.font.highlight_color = WD_COLOR_INDEX.YELLOW
+        keywords = self._usable_keywords(list(keywords))
+        counts = highlight_keywords(doc, keywords) if keywords else {}
         
         # 保存文件
         if output_path is None:
             output_path = word_path.replace('.docx', '_highlighted.docx')
         
         doc.save(output_path)
-        print(f"已高亮关键词 '{keyword}'，保存在: {output_path}")
+        if not counts:
+            self.progress.warning(f"没有要高亮的关键词，文档内容不变，保存在: {output_path}")
+            return output_path
+        names = ', '.join(f"'{keyword}'" for keyword in counts)
+        self.progress.message(f"已高亮关键词 {names}（共 {sum(counts.values())} 处），"
+                              f"保存在: {output_path}")
         return output_path
     
     def replace_text(self, word_path: str, old_text: str, new_text: str, 
@@ -215,33 +1324,15 @@ class PDFToWordConverter:
             raise FileNotFoundError(f"Word 文件不存在: {word_path}")
         
         doc = Document(word_path)
-        replacement_count = 0
-        
-        # 替换段落中的文本
-        for para in doc.paragraphs:
-            if old_text in para.text:
-                for run in para.runs:
-                    if old_text in run.text:
-                        run.text = run.text.replace(old_text, new_text)
-                        replacement_count += 1
-        
-        # 替换表格中的文本
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    if old_text in cell.text:
-                        for para in cell.paragraphs:
-                            for run in para.runs:
-                                if old_text in run.text:
-                                    run.text = run.text.replace(old_text, new_text)
-                                    replacement_count += 1
+        # 替换段落和表格中的文本
+        replacement_count = replace_in_document(doc, paragraph_texts(doc), old_text, new_text)
         
         # 保存文件
         if output_path is None:
             output_path = word_path.replace('.docx', '_edited.docx')
         
         doc.save(output_path)
-        print(f"已替换 {replacement_count} 处文本，保存在: {output_path}")
+        self.progress.message(f"已替换 {replacement_count} 处文本，保存在: {output_path}")
         return output_path
     
     def add_text_to_document(self, word_path: str, text: str, 
@@ -267,7 +1358,7 @@ class PDFToWordConverter:
             output_path = word_path
         
         doc.save(output_path)
-        print(f"已添加文本，保存在: {output_path}")
+        self.progress.message(f"已添加文本，保存在: {output_path}")
         return output_path
     
     def get_document_info(self, word_path: str) -> dict:
@@ -283,15 +1374,21 @@ class PDFToWordConverter:
         if not os.path.exists(word_path):
             raise FileNotFoundError(f"Word 文件不存在: {word_path}")
         
-        doc = Document(word_path)
-        
-        info = {
-            '段落数': len(doc.paragraphs),
-            '表格数': len(doc.tables),
-            '总字符数': sum(len(para.text) for para in doc.paragraphs),
-        }
+        return stream_document_info(word_path)
+    
+    def document_session(self, word_path: str, output_path: str = None) -> DocumentSession:
+        """
+        打开文档会话：只解析一次文档，在内存中执行多个搜索和编辑操作，
+        with 块结束时只保存一次（比逐个调用上面的方法少解析、少保存多次）
         
-        return info
+        Args:
+            word_path: Word 文件路径
+            output_path: 保存路径（可选，默认覆盖原文件）
+            
+        Returns:
+            DocumentSession（用于 with 语句）
+        """
+        return DocumentSession(word_path, output_path, self.progress)
 
 
 def main():
@@ -311,9 +1408,10 @@ def main():
         print("4. 替换文本")
         print("5. 添加文本")
         print("6. 查看文档信息")
+        print("7. 批量转换目录")
         print("0. 退出")
         
-        choice = input("\n请输入选项 (0-6): ").strip()
+        choice = input("\n请输入选项 (0-7): ").strip()
         
         if choice == '0':
             print("谢谢使用！")
@@ -323,8 +1421,11 @@ def main():
             pdf_path = input("请输入 PDF 文件路径: ").strip()
             word_path = input("请输入输出 Word 文件路径 (直接回车使用默认): ").strip()
             word_path = word_path if word_path else None
+            profile = input("是否按阶段采集性能数据？(y/N): ").strip().lower() == 'y'
             
             try:
+                # 性能分析结果的保存位置在转换结束时打印
+                converter.profile = profile
                 result = converter.convert_pdf_to_word(pdf_path, word_path)
                 print(f"\n✓ 转换成功！")
             except Exception as e:
@@ -394,6 +1495,25 @@ def main():
             except Exception as e:
                 print(f"\n✗ 错误: {e}")
         
+        elif choice == '7':
+            source = input("请输入 PDF 所在目录或通配符: ").strip()
+            output_dir = input("请输入输出目录 (直接回车保存在 PDF 旁边): ").strip()
+            workers = input("请输入同时转换的文件数 (直接回车使用 1): ").strip()
+            profile = input("是否按阶段采集性能数据？(y/N): ").strip().lower() == 'y'
+            
+            try:
+                from batch_converter import BatchConverter
+                batch = BatchConverter(output_dir=output_dir or None,
+                                       workers=int(workers) if workers else 1,
+                                       converter_options={'profile': True} if profile else None)
+                summary = batch.run(source)
+                print(f"\n✓ 批量转换完成！成功 {summary['converted']} 个，"
+                      f"跳过 {summary['skipped']} 个，失败 {summary['failed']} 个")
+                if profile:
+                    print("性能分析结果保存在每个输出文档旁的 *.profile 目录")
+            except Exception as e:
+                print(f"\n✗ 错误: {e}")
+        
         else:
             print("\n✗ 无效选项，请重新选择")
 
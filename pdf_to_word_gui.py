@@ -7,6 +7,8 @@ import os
 from pathlib import Path
 import threading
 from pdf_to_word_converter import PDFToWordConverter
+from profiler import profile_path
+from progress import PAGE, STAGE_END, STAGE_LABELS, STAGE_START
 
 
 class PDFToWordGUI:
@@ -22,8 +24,8 @@ class PDFToWordGUI:
         style = ttk.Style()
         style.theme_use('clam')
         
-        # 创建转换器实例
-        self.converter = PDFToWordConverter()
+        # 创建转换器实例（转换进度显示在界面上）
+        self.converter = PDFToWordConverter(progress_callback=self.on_progress)
         
         # 创建界面
         self.create_widgets()
@@ -114,6 +116,14 @@ class PDFToWordGUI:
             row=4, column=0, sticky=tk.W, pady=(0, 10)
         )
         
+        # 性能分析
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            tab,
+            text="按阶段采集性能数据（保存在输出文档旁的 *.profile 目录）",
+            variable=self.profile_var
+        ).grid(row=5, column=0, sticky=tk.W)
+        
         # 转换按钮
         convert_btn = ttk.Button(
             tab,
@@ -121,14 +131,14 @@ class PDFToWordGUI:
             command=self.convert_pdf,
             style="Accent.TButton"
         )
-        convert_btn.grid(row=5, column=0, pady=20)
+        convert_btn.grid(row=6, column=0, pady=20)
         
         # 进度信息
         self.convert_output = scrolledtext.ScrolledText(
             tab, height=15, width=70, wrap=tk.WORD
         )
-        self.convert_output.grid(row=6, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
-        tab.rowconfigure(6, weight=1)
+        self.convert_output.grid(row=7, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+        tab.rowconfigure(7, weight=1)
         
     def create_search_tab(self):
         """创建关键词搜索选项卡"""
@@ -470,6 +480,23 @@ class PDFToWordGUI:
         if filename:
             self.info_word_path_var.set(filename)
     
+    def on_progress(self, event):
+        """转换进度事件（在转换线程中调用，界面更新交给主线程）"""
+        self.root.after(0, self.show_progress, event)
+        
+    def show_progress(self, event):
+        """在转换输出区和状态栏显示进度事件"""
+        label = STAGE_LABELS.get(event.stage, event.stage)
+        if event.kind == STAGE_START:
+            self.status_var.set(f"正在{label}...")
+        elif event.kind == STAGE_END:
+            self.convert_output.insert(tk.END, f"  [{label}] 用时 {event.elapsed:.2f} 秒\n")
+        elif event.kind == PAGE:
+            self.status_var.set(f"正在{label}：第 {event.page}/{event.page_count} 页")
+        if event.message:
+            self.convert_output.insert(tk.END, event.message.strip() + "\n")
+        self.convert_output.see(tk.END)
+    
     # 功能实现方法
     def convert_pdf(self):
         """PDF转Word"""
@@ -487,15 +514,20 @@ class PDFToWordGUI:
         self.convert_output.delete(1.0, tk.END)
         self.convert_output.insert(tk.END, f"正在转换 {pdf_path}...\n\n")
         self.status_var.set("正在转换...")
+        # 在主线程中设置，转换线程只读取
+        self.converter.profile = self.profile_var.get()
         
         def convert_thread():
             try:
                 result = self.converter.convert_pdf_to_word(pdf_path, word_path)
+                saved = f"文件保存在:\n{result}\n"
+                if self.converter.profile:
+                    saved += f"\n性能分析结果保存在:\n{profile_path(result)}\n"
                 self.root.after(0, lambda: self.convert_output.insert(
-                    tk.END, f"✓ 转换成功！\n\n文件保存在:\n{result}\n"
+                    tk.END, f"✓ 转换成功！\n\n{saved}"
                 ))
                 self.root.after(0, lambda: self.status_var.set("转换完成"))
-                self.root.after(0, lambda: messagebox.showinfo("成功", f"转换完成！\n\n文件保存在:\n{result}"))
+                self.root.after(0, lambda: messagebox.showinfo("成功", f"转换完成！\n\n{saved}"))
             except Exception as e:
                 self.root.after(0, lambda: self.convert_output.insert(
                     tk.END, f"✗ 转换失败:\n{str(e)}\n"
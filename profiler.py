@@ -0,0 +1,140 @@
+"""
+转换性能分析 - 按转换阶段分别采集 cProfile 数据，写出 pstats 文件和文字摘要
+pstats 文件可直接用 snakeviz、gprof2dot 或 flameprof（生成火焰图）查看
+"""
+import cProfile
+import io
+import os
+import pstats
+import threading
+from pathlib import Path
+from typing import Dict
+
+from progress import STAGE_CONVERT, STAGE_END, STAGE_LABELS, STAGE_START
+
+# 合并全部阶段的结果文件和摘要文件
+ALL_STAGES_NAME = 'all.prof'
+SUMMARY_NAME = 'summary.txt'
+# 摘要中每个阶段列出的函数数
+_SUMMARY_LINES = 25
+
+
+def profile_path(word_path: str) -> str:
+    """性能分析结果目录：与输出文档同名，扩展名为 .profile"""
+    return str(Path(word_path).with_suffix('.profile'))
+
+
+class StageProfiler:
+    """
+    按转换阶段分别采集 CPU 性能数据（作为进度事件订阅者使用）
+
+    阶段开始时启用该阶段的 cProfile，结束时停用。阶段嵌套时外层暂停，
+    所以外层阶段只包含不属于任何内层阶段的部分（convert 阶段即各阶段
+    之外的调度开销）。每个线程分别采集（如后台渲染线程），写出时按阶段合并。
+    子进程（分片转换、多进程OCR）中的工作不在采集范围内，需要完整数据时
+    把 convert_workers 和 ocr_workers 设为 1。
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # {(阶段, 线程ID): cProfile.Profile}
+        self._profiles = {}
+
+    def __call__(self, event):
+        if event.kind == STAGE_START:
+            self._start(event.stage)
+        elif event.kind == STAGE_END:
+            self._stop()
+
+    def _stack(self) -> list:
+        """当前线程中正在进行的阶段（栈顶为最内层）"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @staticmethod
+    def _enable(profile):
+        """启用采集，已有其他性能分析工具在运行时返回 None（Python 3.12 起全局只能有一个）"""
+        try:
+            profile.enable()
+        except ValueError:
+            return None
+        return profile
+
+    def _start(self, stage: str):
+        stack = self._stack()
+        if stack and stack[-1] is not None:
+            stack[-1].disable()
+        key = (stage, threading.get_ident())
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = self._profiles[key] = cProfile.Profile()
+        stack.append(self._enable(profile))
+
+    def _stop(self):
+        stack = self._stack()
+        if not stack:
+            return
+        profile = stack.pop()
+        if profile is not None:
+            profile.disable()
+        if stack and stack[-1] is not None:
+            stack[-1] = self._enable(stack[-1])
+
+    def stats(self) -> Dict[str, pstats.Stats]:
+        """按阶段合并后的统计（没有采集到数据的阶段不包含在内）"""
+        with self._lock:
+            profiles = list(self._profiles.items())
+        result = {}
+        for (stage, _), profile in profiles:
+            try:
+                stats = pstats.Stats(profile)
+            except TypeError:
+                # 该线程中这个阶段没有采集到任何调用
+                continue
+            if stage in result:
+                result[stage].add(stats)
+            else:
+                result[stage] = stats
+        return result
+
+    def write(self, output_dir: str) -> Dict[str, float]:
+        """
+        写出各阶段的 pstats 文件（<阶段>.prof）、合并文件 all.prof 和文字摘要 summary.txt
+
+        Args:
+            output_dir: 输出目录（不存在时创建）
+
+        Returns:
+            {阶段: 耗时（秒）}，按耗时从高到低排列
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        stages = self.stats()
+        totals = {stage: stats.total_tt for stage, stats in stages.items()}
+        totals = dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+        combined = None
+        for stage, stats in stages.items():
+            stats.dump_stats(os.path.join(output_dir, f'{stage}.prof'))
+            if combined is None:
+                combined = pstats.Stats(os.path.join(output_dir, f'{stage}.prof'))
+            else:
+                combined.add(stats)
+        if combined is not None:
+            combined.dump_stats(os.path.join(output_dir, ALL_STAGES_NAME))
+
+        with open(os.path.join(output_dir, SUMMARY_NAME), 'w', encoding='utf-8') as f:
+            f.write("各阶段耗时（convert=不属于其他阶段的部分）:\n")
+            for stage, seconds in totals.items():
+                f.write(f"  {stage:<12} {seconds:10.3f} 秒  {STAGE_LABELS.get(stage, stage)}\n")
+            for stage in totals:
+                buffer = io.StringIO()
+                stats = stages[stage]
+                stats.stream = buffer
+                stats.sort_stats('cumulative').print_stats(_SUMMARY_LINES)
+                label = '其他' if stage == STAGE_CONVERT else STAGE_LABELS.get(stage, stage)
+                f.write(f"\n===== {label}（{stage}.prof）=====\n{buffer.getvalue()}")
+        return totals
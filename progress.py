@@ -0,0 +1,214 @@
+"""
+转换进度事件 - 阶段开始/结束、页码进度和耗时，命令行、图形界面和服务都通过订阅获取
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# 事件类型
+STAGE_START = 'stage_start'
+STAGE_END = 'stage_end'
+PAGE = 'page'
+MESSAGE = 'message'
+WARNING = 'warning'
+
+# 转换阶段
+STAGE_CONVERT = 'convert'        # 一次完整的转换
+STAGE_CLASSIFY = 'classify'      # 判断页面类型
+STAGE_LAYOUT = 'layout'          # pdf2docx 版面重建
+STAGE_DETECT_LANG = 'detect_lang'  # 自动检测OCR语言
+STAGE_RENDER = 'render'          # poppler 渲染页面
+STAGE_OCR = 'ocr'                # Tesseract 识别
+STAGE_MERGE = 'merge'            # 合并分片/分段/页面
+STAGE_SAVE = 'save'              # 保存 Word 文档
+STAGE_INDEX = 'index'            # 更新全文检索索引
+
+STAGE_LABELS = {
+    STAGE_CONVERT: '转换',
+    STAGE_CLASSIFY: '页面类型检测',
+    STAGE_LAYOUT: '版面重建',
+    STAGE_DETECT_LANG: '语言检测',
+    STAGE_RENDER: '页面渲染',
+    STAGE_OCR: 'OCR识别',
+    STAGE_MERGE: '合并文档',
+    STAGE_SAVE: '保存文档',
+    STAGE_INDEX: '更新索引',
+}
+
+
+class ProgressEvent:
+    """一个进度事件"""
+
+    __slots__ = ('kind', 'stage', 'message', 'page', 'page_count', 'elapsed', 'timestamp')
+
+    def __init__(self, kind: str, message: str = '', stage: Optional[str] = None,
+                 page: Optional[int] = None, page_count: Optional[int] = None,
+                 elapsed: Optional[float] = None):
+        """
+        Args:
+            kind: 事件类型（STAGE_START / STAGE_END / PAGE / MESSAGE / WARNING）
+            message: 给用户看的说明文字
+            stage: 所属阶段
+            page: 当前页码（从1开始）
+            page_count: 总页数
+            elapsed: 阶段耗时（秒，只有 STAGE_END 有）
+        """
+        self.kind = kind
+        self.message = message
+        self.stage = stage
+        self.page = page
+        self.page_count = page_count
+        self.elapsed = elapsed
+        self.timestamp = time.time()
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"ProgressEvent({self.to_dict()!r})"
+
+
+class ProgressReporter:
+    """进度事件的发布者：订阅者按订阅顺序同步收到每个事件（可能来自后台线程）"""
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[ProgressEvent], None]) -> Callable:
+        """订阅事件，返回 callback 本身（便于之后取消订阅）"""
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+        return callback
+
+    def unsubscribe(self, callback: Callable[[ProgressEvent], None]):
+        """取消订阅"""
+        with self._lock:
+            self._subscribers = [item for item in self._subscribers if item is not callback]
+
+    def emit(self, kind: str, message: str = '', **fields):
+        """发布一个事件（参数同 ProgressEvent）"""
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        event = ProgressEvent(kind, message, **fields)
+        for callback in subscribers:
+            callback(event)
+
+    def message(self, text: str, stage: Optional[str] = None):
+        """普通说明"""
+        self.emit(MESSAGE, text, stage=stage)
+
+    def warning(self, text: str, stage: Optional[str] = None):
+        """警告"""
+        self.emit(WARNING, text, stage=stage)
+
+    def page(self, stage: str, page: int, page_count: int, text: str = ''):
+        """页码进度"""
+        self.emit(PAGE, text, stage=stage, page=page, page_count=page_count)
+
+    @contextmanager
+    def stage(self, name: str, text: str = '', page_count: Optional[int] = None):
+        """
+        用 with 包住一个阶段，自动发布开始和结束事件（结束事件带耗时，出错时也会发布）
+
+        Args:
+            name: 阶段名称（STAGE_*）
+            text: 开始时的说明文字
+            page_count: 本阶段处理的页数
+        """
+        self.emit(STAGE_START, text, stage=name, page_count=page_count)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.emit(STAGE_END, '', stage=name, page_count=page_count,
+                      elapsed=time.perf_counter() - start)
+
+
+def print_progress(event: ProgressEvent):
+    """
+    命令行订阅者：打印说明文字，阶段结束时打印耗时
+
+    页面渲染按窗口多次发生（与OCR重叠），不逐次打印，总耗时已计入OCR阶段。
+    """
+    if event.kind == STAGE_END:
+        if event.stage not in (STAGE_CONVERT, STAGE_RENDER):
+            print(f"  [{STAGE_LABELS.get(event.stage, event.stage)}] 用时 {event.elapsed:.2f} 秒")
+    elif event.kind == PAGE:
+        print(f"  {event.message}")
+    elif event.message:
+        print(event.message)
+
+
+class PrometheusExporter:
+    """
+    累计每个阶段的耗时直方图，输出 Prometheus 文本格式
+
+    作为订阅者使用：converter.progress.subscribe(exporter)。也接受
+    ProgressEvent.to_dict() 形式的字典（如转换服务从工作进程收到的事件）。
+    指定 path 时每次转换结束后原子地写入该文件，可配合 node_exporter
+    的 textfile collector 使用。
+    """
+
+    DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self, path: Optional[str] = None, buckets: tuple = DEFAULT_BUCKETS,
+                 prefix: str = 'pdf2word'):
+        """
+        Args:
+            path: 指标文件路径（None=不写文件，只通过 render() 获取）
+            buckets: 直方图桶的上界（秒，升序）
+            prefix: 指标名前缀
+        """
+        self.path = path
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counts: Dict[str, List[int]] = {}
+        self._sums: Dict[str, float] = {}
+
+    def __call__(self, event):
+        if isinstance(event, dict):
+            kind, stage, elapsed = event.get('kind'), event.get('stage'), event.get('elapsed')
+        else:
+            kind, stage, elapsed = event.kind, event.stage, event.elapsed
+        if kind != STAGE_END or elapsed is None:
+            return
+        self.observe(stage, elapsed)
+        if stage == STAGE_CONVERT and self.path:
+            self.write()
+
+    def observe(self, stage: str, seconds: float):
+        """记录一次阶段耗时"""
+        with self._lock:
+            counts = self._counts.setdefault(stage, [0] * (len(self.buckets) + 1))
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[index] += 1
+            counts[-1] += 1
+            self._sums[stage] = self._sums.get(stage, 0.0) + seconds
+
+    def render(self) -> str:
+        """Prometheus 文本格式的全部指标"""
+        name = f"{self.prefix}_stage_duration_seconds"
+        lines = [f"# HELP {name} 转换各阶段耗时（秒）", f"# TYPE {name} histogram"]
+        with self._lock:
+            for stage in sorted(self._counts):
+                counts = self._counts[stage]
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {count}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {counts[-1]}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {self._sums[stage]:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {counts[-1]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: Optional[str] = None):
+        """原子地写入指标文件"""
+        path = path or self.path
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
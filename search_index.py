@@ -0,0 +1,474 @@
+"""
+全文检索索引 - 按字符 n-gram 为转换生成的 Word 文档建立倒排索引，保存在本地 SQLite 文件中
+中文不需要分词；支持增量添加、更新和删除文档，查询只读取候选段落，耗时与文档总数基本无关
+
+用法:
+    python search_index.py index.db add output/            # 建立/补建索引（目录递归或通配符）
+    python search_index.py index.db search 关键词
+    python search_index.py index.db remove output/a.docx
+    python search_index.py index.db prune                  # 删除源文件已不存在的文档
+"""
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from docx import Document
+
+from docx_merge import paragraph_pages
+from docx_stream import paragraph_text
+from keyword_search import text_paragraphs
+
+# n-gram 长度：2 个字符，中文词语和英文单词都能较好地过滤候选
+NGRAM = 2
+# 索引格式版本（SQLite user_version），格式变化时需要重建索引
+INDEX_VERSION = 2
+# 段落末尾的补位字符：最后一个字也有以它开头的 n-gram，短于 n 的关键词可以按前缀查询
+_PAD = '\x00'
+# 按文档 ID 分批查询候选时每批的数量（SQLite 参数个数有上限）
+_BATCH = 500
+# 一个文档的候选段落超过该数量时顺序读取整个文档，而不是逐个查询
+_SCAN_THRESHOLD = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    paragraphs INTEGER NOT NULL,
+    pages INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paragraphs (
+    doc_id INTEGER NOT NULL,
+    paragraph INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    location TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (doc_id, paragraph)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    paragraphs BLOB NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+"""
+
+
+def ngrams(text: str, n: int = NGRAM) -> set:
+    """
+    文本（不区分大小写）的字符 n-gram 集合，末尾补位
+    
+    Args:
+        text: 段落文字
+        n: n-gram 长度
+    
+    Returns:
+        {n-gram, ...}，空文本返回空集合
+    """
+    if not text:
+        return set()
+    text = text.lower() + _PAD * (n - 1)
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _pack(paragraphs: List[int]) -> bytes:
+    return array('I', paragraphs).tobytes()
+
+
+def _unpack(blob: bytes) -> array:
+    values = array('I')
+    values.frombytes(blob)
+    return values
+
+
+def located_texts(doc) -> List[Tuple[dict, int, str]]:
+    """
+    文档全部文本容器中的段落（范围和顺序与 keyword_search.text_paragraphs 相同）及其页码
+    
+    文本框的页码取所在正文段落的页码，表格和内容控件取其后第一个正文段落的页码；
+    页眉、页脚、脚注和尾注不属于某一页，页码为 0。
+    
+    Args:
+        doc: Document
+    
+    Returns:
+        [(位置, 页码, 段落文字), ...]
+    """
+    pages = paragraph_pages(doc)
+    last = len(pages) - 1
+    previous = -1
+    result = []
+    for location, para in text_paragraphs(doc):
+        part = location['part']
+        if part == 'body':
+            previous = location['paragraph']
+            page = pages[previous]
+        elif part == 'textbox':
+            page = pages[max(previous, 0)] if pages else 0
+        elif part in ('table', 'sdt'):
+            page = pages[min(previous + 1, last)] if pages else 0
+        else:
+            page = 0
+        result.append((location, page, paragraph_text(para)))
+    return result
+
+
+def collect_documents(source: str) -> List[str]:
+    """
+    列出目录树中（或通配符匹配的）全部 .docx 文件，跳过批量转换的未完成文件
+    
+    Args:
+        source: 目录（递归）、通配符或单个文件
+    
+    Returns:
+        排好序的文件路径列表
+    """
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(glob.escape(source), '**', '*.docx'), recursive=True)
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths if os.path.isfile(path)
+                  and path.lower().endswith('.docx')
+                  and not path.lower().endswith('.partial.docx')
+                  and not os.path.basename(path).startswith('~$'))
+
+
+class SearchIndex:
+    """
+    转换结果的倒排索引：n-gram → 文档 → 段落
+    
+    索引全部文本容器（正文、表格、文本框、内容控件、页眉页脚、脚注和尾注）中的
+    段落，每个段落保存位置、文字和所在页码；查询时先用关键词的各个 n-gram 求交集
+    得到候选段落，再逐个核对是否真的包含关键词，结果与 search_keywords 一致
+    （不区分大小写的子串匹配）。
+    
+    按文件大小和修改时间判断文档是否变化，未变化的文档重复添加时直接跳过。
+    转换器设置了 search_index 时每次转换完成后自动添加；已有的文档或转换后
+    又编辑过的文档用 add_documents 补建。多个进程可以同时写入同一个索引。
+    """
+    
+    def __init__(self, index_path: str):
+        """
+        Args:
+            index_path: 索引文件路径（不存在时创建）
+        """
+        self.index_path = str(index_path)
+        parent = os.path.dirname(os.path.abspath(self.index_path))
+        os.makedirs(parent, exist_ok=True)
+        self._local = threading.local()
+        # 创建表结构并检查版本
+        self._connection()
+    
+    def __getstate__(self):
+        # 连接不能跨进程传递（批量转换时随参数发送到工作进程，在工作进程中重新连接）
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=60)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version not in (0, INDEX_VERSION):
+                conn.close()
+                raise ValueError(f"索引格式版本不兼容（{version}），请删除后重建: {self.index_path}")
+            with conn:
+                conn.executescript(_SCHEMA)
+                conn.execute(f'PRAGMA user_version={INDEX_VERSION}')
+            self._local.conn = conn
+        return conn
+    
+    def close(self):
+        """关闭当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
+    @staticmethod
+    def _key(word_path: str) -> str:
+        return os.path.abspath(word_path)
+    
+    def _delete(self, conn: sqlite3.Connection, doc_id: int):
+        """删除一个文档的全部记录（按已保存的段落文字算出要删除的 n-gram）"""
+        terms = set()
+        for (text,) in conn.execute('SELECT text FROM paragraphs WHERE doc_id = ?', (doc_id,)):
+            terms |= ngrams(text)
+        conn.executemany('DELETE FROM postings WHERE term = ? AND doc_id = ?',
+                         ((term, doc_id) for term in terms))
+        conn.execute('DELETE FROM paragraphs WHERE doc_id = ?', (doc_id,))
+        conn.execute('DELETE FROM documents WHERE id = ?', (doc_id,))
+    
+    def add_document(self, word_path: str, force: bool = False) -> bool:
+        """
+        添加或更新一个文档
+        
+        Args:
+            word_path: Word 文件路径
+            force: 文件未变化时也重新建立索引
+        
+        Returns:
+            True=建立了索引，False=文档未变化，已跳过
+        """
+        if not os.path.exists(word_path):
+            raise FileNotFoundError(f"Word 文件不存在: {word_path}")
+        key = self._key(word_path)
+        stat = os.stat(word_path)
+        conn = self._connection()
+        row = conn.execute('SELECT id, size, mtime_ns FROM documents WHERE path = ?',
+                           (key,)).fetchone()
+        if row and not force and row[1:] == (stat.st_size, stat.st_mtime_ns):
+            return False
+        
+        # 解析文档和切分 n-gram 在事务之外进行，不阻塞其他进程写入
+        doc = Document(word_path)
+        texts = located_texts(doc)
+        postings = {}
+        for index, (_, _, text) in enumerate(texts):
+            for term in ngrams(text):
+                postings.setdefault(term, []).append(index)
+        
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT id FROM documents WHERE path = ?', (key,)).fetchone()
+            if row:
+                self._delete(conn, row[0])
+            doc_id = conn.execute(
+                'INSERT INTO documents (path, size, mtime_ns, paragraphs, pages) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, stat.st_size, stat.st_mtime_ns, len(texts),
+                 max((page for _, page, _ in texts), default=0))
+            ).lastrowid
+            conn.executemany('INSERT INTO paragraphs VALUES (?, ?, ?, ?, ?)',
+                             ((doc_id, index, page, json.dumps(location), text)
+                              for index, (location, page, text) in enumerate(texts) if text))
+            conn.executemany('INSERT INTO postings VALUES (?, ?, ?)',
+                             ((term, doc_id, _pack(paragraphs))
+                              for term, paragraphs in postings.items()))
+        return True
+    
+    def add_documents(self, paths: Iterable[str], force: bool = False) -> dict:
+        """
+        批量添加或更新文档（补建已有文件的索引）
+        
+        Args:
+            paths: Word 文件路径
+            force: 文件未变化时也重新建立索引
+        
+        Returns:
+            {'added': 建立索引的文档数, 'skipped': 未变化的文档数,
+             'failed': [(文件路径, 错误信息), ...]}
+        """
+        result = {'added': 0, 'skipped': 0, 'failed': []}
+        for path in paths:
+            try:
+                added = self.add_document(path, force)
+            except Exception as e:
+                result['failed'].append((path, str(e)))
+                continue
+            result['added' if added else 'skipped'] += 1
+        return result
+    
+    def remove_document(self, word_path: str) -> bool:
+        """
+        从索引中删除一个文档
+        
+        Returns:
+            True=已删除，False=索引中没有该文档
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT id FROM documents WHERE path = ?',
+                               (self._key(word_path),)).fetchone()
+            if row is None:
+                return False
+            self._delete(conn, row[0])
+        return True
+    
+    def prune(self) -> List[str]:
+        """
+        删除文件已不存在的文档
+        
+        Returns:
+            被删除的文件路径列表
+        """
+        conn = self._connection()
+        missing = [path for (path,) in conn.execute('SELECT path FROM documents')
+                   if not os.path.exists(path)]
+        for path in missing:
+            self.remove_document(path)
+        return missing
+    
+    def _candidates(self, conn: sqlite3.Connection, keyword: str) -> Dict[int, set]:
+        """按 n-gram 求交集，返回候选段落 {文档ID: {段落索引, ...}}"""
+        if len(keyword) < NGRAM:
+            # 短关键词：以它开头的全部 n-gram 的并集（依靠末尾补位覆盖段落最后一个字）
+            candidates = {}
+            rows = conn.execute('SELECT doc_id, paragraphs FROM postings '
+                                'WHERE term >= ? AND term < ?',
+                                (keyword, keyword + '\U0010ffff'))
+            for doc_id, blob in rows:
+                candidates.setdefault(doc_id, set()).update(_unpack(blob))
+            return candidates
+        
+        terms = {keyword[i:i + NGRAM] for i in range(len(keyword) - NGRAM + 1)}
+        # 先用出现在最少文档中的 n-gram，候选集合最小
+        counts = dict(conn.execute(
+            f"SELECT term, COUNT(*) FROM postings WHERE term IN ({','.join('?' * len(terms))}) "
+            'GROUP BY term', tuple(terms)))
+        if len(counts) < len(terms):
+            return {}
+        candidates = None
+        for term in sorted(terms, key=counts.get):
+            if candidates is None:
+                rows = conn.execute('SELECT doc_id, paragraphs FROM postings WHERE term = ?',
+                                    (term,))
+                candidates = {doc_id: set(_unpack(blob)) for doc_id, blob in rows}
+                continue
+            doc_ids = list(candidates)
+            narrowed = {}
+            for start in range(0, len(doc_ids), _BATCH):
+                batch = doc_ids[start:start + _BATCH]
+                rows = conn.execute(
+                    f"SELECT doc_id, paragraphs FROM postings WHERE term = ? "
+                    f"AND doc_id IN ({','.join('?' * len(batch))})", (term, *batch))
+                for doc_id, blob in rows:
+                    paragraphs = candidates[doc_id].intersection(_unpack(blob))
+                    if paragraphs:
+                        narrowed[doc_id] = paragraphs
+            candidates = narrowed
+            if not candidates:
+                break
+        return candidates
+    
+    def search(self, keyword: str, limit: Optional[int] = None) -> List[dict]:
+        """
+        在全部已索引的文档中搜索关键词（不区分大小写）
+        
+        Args:
+            keyword: 关键词
+            limit: 最多返回的结果数（None=全部）
+        
+        Returns:
+            [{'path': 文件路径, 'page': 页码, 'text': 段落内容, 以及段落位置}, ...]，
+            按文件路径和文档顺序排列；范围和位置与 search_keywords 相同（正文段落的
+            'paragraph' 与 search_keyword 返回的段落索引一致），页眉、页脚、脚注和
+            尾注的页码为 None
+        """
+        if not keyword:
+            raise ValueError("关键词不能为空")
+        keyword = keyword.lower()
+        conn = self._connection()
+        # 查询期间其他进程的写入不影响本次结果
+        with conn:
+            conn.execute('BEGIN')
+            candidates = self._candidates(conn, keyword)
+            paths = {}
+            doc_ids = list(candidates)
+            for start in range(0, len(doc_ids), _BATCH):
+                batch = doc_ids[start:start + _BATCH]
+                paths.update(conn.execute(
+                    f"SELECT id, path FROM documents WHERE id IN ({','.join('?' * len(batch))})",
+                    batch))
+            
+            results = []
+            for doc_id in sorted(candidates, key=lambda doc_id: paths.get(doc_id, '')):
+                if doc_id not in paths:
+                    continue
+                paragraphs = candidates[doc_id]
+                if len(paragraphs) > _SCAN_THRESHOLD:
+                    # 候选很多时顺序读取整个文档的段落，比逐个查询快
+                    rows = (row[1:] for row in conn.execute(
+                        'SELECT paragraph, page, location, text FROM paragraphs '
+                        'WHERE doc_id = ? ORDER BY paragraph', (doc_id,))
+                        if row[0] in paragraphs)
+                else:
+                    rows = (conn.execute(
+                        'SELECT page, location, text FROM paragraphs '
+                        'WHERE doc_id = ? AND paragraph = ?', (doc_id, paragraph)).fetchone()
+                        for paragraph in sorted(paragraphs))
+                for page, location, text in rows:
+                    if keyword in text.lower():
+                        results.append(dict(json.loads(location), path=paths[doc_id],
+                                            page=page or None, text=text))
+                        if limit is not None and len(results) >= limit:
+                            return results
+        return results
+    
+    def documents(self) -> List[str]:
+        """已索引的文件路径"""
+        return [path for (path,) in
+                self._connection().execute('SELECT path FROM documents ORDER BY path')]
+    
+    def stats(self) -> dict:
+        """文档数、段落数、页数、n-gram 数和索引文件大小"""
+        conn = self._connection()
+        documents, paragraphs, pages = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(paragraphs), 0), COALESCE(SUM(pages), 0) '
+            'FROM documents').fetchone()
+        terms = conn.execute('SELECT COUNT(DISTINCT term) FROM postings').fetchone()[0]
+        size = sum(os.path.getsize(path) for path in
+                   (self.index_path, f'{self.index_path}-wal') if os.path.exists(path))
+        return {'documents': documents, 'paragraphs': paragraphs, 'pages': pages,
+                'terms': terms, 'size': size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="转换结果的全文检索索引")
+    parser.add_argument('index', help="索引文件路径（如 index.db）")
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help="添加或更新文档（目录递归或通配符）")
+    add.add_argument('sources', nargs='+')
+    add.add_argument('--force', action='store_true', help="未变化的文档也重新建立索引")
+    search = commands.add_parser('search', help="搜索关键词")
+    search.add_argument('keyword')
+    search.add_argument('-n', '--limit', type=int, help="最多显示的结果数")
+    remove = commands.add_parser('remove', help="从索引中删除文档")
+    remove.add_argument('paths', nargs='+')
+    commands.add_parser('prune', help="删除文件已不存在的文档")
+    commands.add_parser('stats', help="索引统计")
+    args = parser.parse_args()
+    
+    index = SearchIndex(args.index)
+    if args.command == 'add':
+        paths = [path for source in args.sources for path in collect_documents(source)]
+        result = index.add_documents(paths, force=args.force)
+        print(f"建立索引 {result['added']} 个，未变化 {result['skipped']} 个，"
+              f"失败 {len(result['failed'])} 个")
+        for path, error in result['failed']:
+            print(f"✗ {path}: {error}")
+    elif args.command == 'search':
+        results = index.search(args.keyword, args.limit)
+        for item in results:
+            page = f" 第 {item['page']} 页" if item['page'] else ''
+            print(f"{item['path']}{page} {item['part']} 段落 {item['paragraph']}: "
+                  f"{item['text'][:100]}")
+        print(f"共找到 {len(results)} 处")
+    elif args.command == 'remove':
+        for path in args.paths:
+            print(f"{'已删除' if index.remove_document(path) else '索引中没有'}: {path}")
+    elif args.command == 'prune':
+        for path in index.prune():
+            print(f"已删除: {path}")
+    else:
+        for name, value in index.stats().items():
+            print(f"{name}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+AsyncPDFToWordConverter 的取消测试
+"""
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_converter import AsyncPDFToWordConverter
+
+
+class CancelBeforeStartTest(unittest.IsolatedAsyncioTestCase):
+    """任务开始执行前就被取消时，迭代器仍能收到结束事件"""
+
+    async def asyncSetUp(self):
+        self.converter = AsyncPDFToWordConverter(max_concurrency=1)
+
+    async def asyncTearDown(self):
+        await self.converter.close()
+
+    async def _events(self, job):
+        return [event async for event in job]
+
+    async def test_cancel_right_after_start(self):
+        job = self.converter.start_conversion('missing.pdf')
+        self.assertTrue(job.cancel())
+
+        events = await asyncio.wait_for(self._events(job), timeout=5)
+        self.assertEqual([event['type'] for event in events], ['cancelled'])
+        with self.assertRaises(asyncio.CancelledError):
+            await job
+        self.assertEqual(self.converter._listeners, {})
+
+    async def test_cancel_while_queued(self):
+        # 占住唯一的并发名额，第二个任务在排队时被取消
+        self.converter._start()
+        async with self.converter._semaphore:
+            job = self.converter.start_conversion('missing.pdf')
+            await asyncio.sleep(0)
+            job.cancel()
+            events = await asyncio.wait_for(self._events(job), timeout=5)
+        self.assertEqual([event['type'] for event in events], ['cancelled'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+ConversionService 的取消测试：被取消的任务必须结束，不能一直占用名额
+"""
+import asyncio
+import os
+import shutil
+import sys
+import unittest
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversion_service import JOB_CANCELLED, ConversionService, Job
+
+
+class CancelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = ConversionService(port=0, workers=1)
+
+    def tearDown(self):
+        self.service._server.server_close()
+        shutil.rmtree(self.service.work_dir, ignore_errors=True)
+
+    def _job(self):
+        job_id = uuid.uuid4().hex
+        job = Job(job_id, os.path.join(self.service.work_dir, job_id), 'a.pdf', {})
+        self.service.jobs[job_id] = job
+        return job
+
+    def _run(self, job, on_start=None):
+        async def run():
+            original = self.service.converter.start_conversion
+
+            def start_conversion(*args, **kwargs):
+                handle = original(*args, **kwargs)
+                if on_start is not None:
+                    on_start(handle)
+                return handle
+            self.service.converter.start_conversion = start_conversion
+            try:
+                await asyncio.wait_for(self.service._run_job(job), timeout=5)
+            finally:
+                await self.service.converter.close()
+        asyncio.run(run())
+
+    def test_cancel_before_run(self):
+        job = self._job()
+        self.assertTrue(self.service.cancel(job))
+        self._run(job)
+        self.assertEqual(job.status, JOB_CANCELLED)
+        self.assertIsNone(job.handle)
+
+    def test_cancel_right_after_start(self):
+        # 取消在任务第一次执行之前到达（同 DELETE 请求恰好落在任务刚开始时）
+        job = self._job()
+        self._run(job, on_start=lambda handle: handle.cancel())
+        self.assertEqual(job.status, JOB_CANCELLED)
+        self.assertEqual(self.service.metrics()['running'], 0)
+        self.assertEqual(self.service.metrics()['queued'], 0)
+
+    def test_finish_without_terminal_event(self):
+        # 结束事件丢失时，任务完成后事件迭代也要停止
+        job = self._job()
+
+        def on_start(handle):
+            self.service.converter._listeners[handle.job_id] = asyncio.Queue()
+            handle.cancel()
+        self._run(job, on_start=on_start)
+        self.assertEqual(job.status, JOB_CANCELLED)
+
+
+if __name__ == '__main__':
+    unittest.main()